@@ -1,63 +1,81 @@
-from flask import Flask
-from flask.json.provider import DefaultJSONProvider
+from flask import Flask, current_app, session
 from flask_login import LoginManager
 from firebase_admin import auth
 import os
 from dotenv import load_dotenv
-from decimal import Decimal
-from datetime import datetime, date
-import types
 from app.models.user import User
+from app.models.cache_identidade import CacheIdentidade
+from app.utils.metricas import instrumentar
+from app.utils.serializacao import configurar_json
 
 load_dotenv()
 
 login_manager = LoginManager()
 
 
-class CustomJSONProvider(DefaultJSONProvider):
-    """Provider JSON customizado para serializar Decimal, datetime e métodos."""
-
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, date):
-            return obj.isoformat()
-        # Tratar métodos e funções passados sem serem chamados
-        if isinstance(obj, (types.MethodType, types.FunctionType, types.BuiltinMethodType, types.BuiltinFunctionType)):
-            try:
-                result = obj()
-                return result
-            except:
-                return str(obj)
-        return super().default(obj)
-
-
 @login_manager.user_loader
 def load_user(user_id):
+    # Sessão assinada e cache em memória antes de consultar o Firebase Auth
+    cache = CacheIdentidade()
+    sessao = session if current_app.config.get('IDENTIDADE_NA_SESSAO') else None
+    user = cache.obter(user_id, sessao)
+    if user is not None:
+        return user
+
     try:
         user_record = auth.get_user(user_id)
-        return User(uid=user_id, email=user_record.email, nome=user_record.display_name)
     except:
         return None
+    user = User(uid=user_id, email=user_record.email, nome=user_record.display_name)
+    cache.armazenar(user, sessao)
+    return user
 
 
-def criar_app():
+def criar_app(assincrono=False):
     template_dir = os.path.join(os.path.dirname(__file__), 'templates')
     app = Flask(__name__, template_folder=template_dir)
 
     app.config['SECRET_KEY'] = 'chave-secreta-desenvolvimento'
     app.config['FIREBASE_WEB_API_KEY'] = os.environ.get('FIREBASE_WEB_API_KEY', 'REPLACE_WITH_YOUR_KEY')
+    # Guarda uid/email/nome no cookie de sessão assinado após o login
+    app.config['IDENTIDADE_NA_SESSAO'] = os.environ.get('IDENTIDADE_NA_SESSAO', 'false').lower() in ('1', 'true', 'sim')
+
+    # Atualizações ao vivo do dashboard (/api/stream); cada conexão aberta ocupa uma
+    # thread do servidor, por isso o recurso é opcional e limitado por processo
+    app.config['STREAM_TEMPO_REAL'] = os.environ.get('STREAM_TEMPO_REAL', 'false').lower() in ('1', 'true', 'sim')
+    app.config['STREAM_MAX_CONEXOES'] = int(os.environ.get('STREAM_MAX_CONEXOES', '32'))
+
+    # /metrics fica desativado sem token; com ele, exige 'Authorization: Bearer <token>'
+    app.config['METRICAS_TOKEN'] = os.environ.get('METRICAS_TOKEN', '')
 
-    # Usar provider JSON customizado para Decimal, datetime e métodos
-    app.json_provider_class = CustomJSONProvider
-    app.json = CustomJSONProvider(app)
+    # orjson quando instalado ('nao' força o provider da biblioteca padrão)
+    app.config['JSON_ORJSON'] = os.environ.get('JSON_ORJSON', 'auto').lower()
+    configurar_json(app)
+
+    # Server-Timing por requisição e histogramas expostos em /metrics
+    instrumentar(app)
 
     login_manager.init_app(app)
     login_manager.login_view = 'main.login'
 
     from app import routes
-    app.register_blueprint(routes.bp)
+    # assincrono: dashboard com leituras em paralelo (requer flask[async])
+    app.register_blueprint(routes.bp, assincrono=assincrono)
+
+    from app.commands import dados_cli
+    app.cli.add_command(dados_cli)
 
     return app
+
+
+def criar_app_asgi():
+    """Aplicação ASGI (ex.: uvicorn --factory app:criar_app_asgi) com o dashboard assíncrono.
+
+    Não aumenta o número de usuários simultâneos por worker: WsgiToAsgi
+    executa cada requisição em uma thread, e a view assíncrona do Flask roda
+    em um loop próprio dessa requisição. O ganho é só a latência do
+    dashboard (leituras em paralelo); a concorrência continua limitada pelas
+    threads, como no modo WSGI.
+    """
+    from asgiref.wsgi import WsgiToAsgi
+    return WsgiToAsgi(criar_app(assincrono=True))
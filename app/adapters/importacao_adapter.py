@@ -0,0 +1,98 @@
+from typing import Dict, Iterator, IO, Tuple, Union
+import csv
+import re
+
+
+class ImportacaoAdapter:
+    """Converte arquivos de extrato (CSV/OFX) em dicionários no formato do formulário.
+
+    As linhas são lidas sob demanda: o arquivo nunca é carregado inteiro na
+    memória. Cada item produzido é (número do registro, dados), e os dados
+    seguem os nomes de campo esperados por RequestAdapter; um registro que
+    o leitor não consegue interpretar vem como ValueError no lugar dos dados,
+    e a leitura continua no registro seguinte.
+    """
+
+    CATEGORIA_PADRAO = 'Outros'
+    ORIGEM_OFX = 'Importação OFX'
+
+    _TAG_OFX = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+    @staticmethod
+    def ler_csv(arquivo: IO[str]) -> Iterator[Tuple[int, Union[Dict[str, str], ValueError]]]:
+        leitor = csv.DictReader(arquivo)
+        numero = 0
+        while True:
+            numero += 1
+            try:
+                linha = next(leitor)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # O csv.reader segue utilizável após o erro: só este registro é perdido
+                yield numero, ValueError(f"Registro CSV inválido: {e}")
+                continue
+
+            dados = {
+                chave.strip(): (valor or '').strip()
+                for chave, valor in linha.items()
+                if chave
+            }
+            # Aceita tanto YYYY-MM-DD quanto a data ISO completa da exportação
+            dados['data'] = dados.get('data', '')[:10]
+            dados['categoria'] = dados.get('categoria') or ImportacaoAdapter.CATEGORIA_PADRAO
+            yield numero, dados
+
+    @staticmethod
+    def ler_ofx(arquivo: IO[str]) -> Iterator[Tuple[int, Union[Dict[str, str], ValueError]]]:
+        conta = ''
+        campos: Dict[str, str] = {}
+        dentro_transacao = False
+        numero = 0
+
+        for linha in arquivo:
+            for marcacao in re.split(r'(?=<)', linha):
+                marcacao = marcacao.strip()
+                if not marcacao:
+                    continue
+                tag = marcacao.upper()
+                if tag.startswith('<STMTTRN>'):
+                    dentro_transacao = True
+                    campos = {}
+                    continue
+                if tag.startswith('</STMTTRN>'):
+                    dentro_transacao = False
+                    numero += 1
+                    yield numero, ImportacaoAdapter._transacao_ofx(campos, conta)
+                    continue
+
+                encontrado = ImportacaoAdapter._TAG_OFX.match(marcacao)
+                if not encontrado:
+                    continue
+                nome, valor = encontrado.group(1).upper(), encontrado.group(2).strip()
+                if nome == 'ACCTID':
+                    conta = valor
+                elif dentro_transacao:
+                    campos[nome] = valor
+
+    @staticmethod
+    def _transacao_ofx(campos: Dict[str, str], conta: str) -> Dict[str, str]:
+        valor = campos.get('TRNAMT', '').replace(',', '.')
+        data = campos.get('DTPOSTED', '')[:8]
+        descricao = campos.get('MEMO') or campos.get('NAME') or ''
+
+        dados = {
+            'valor': valor.lstrip('-+'),
+            'data': f"{data[:4]}-{data[4:6]}-{data[6:8]}" if len(data) == 8 else data,
+            'descricao': descricao,
+            'categoria': ImportacaoAdapter.CATEGORIA_PADRAO
+        }
+        # O sinal do valor define o tipo no OFX
+        if valor.startswith('-'):
+            dados['tipo'] = 'despesa'
+            dados['metodo_pagamento'] = ImportacaoAdapter.ORIGEM_OFX
+            dados['estabelecimento'] = campos.get('NAME') or descricao
+        else:
+            dados['tipo'] = 'receita'
+            dados['conta_destino'] = conta or ImportacaoAdapter.ORIGEM_OFX
+        return dados
@@ -1,7 +1,30 @@
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from werkzeug.datastructures import ImmutableMultiDict
+import re
+
+from app.models.dinheiro import Dinheiro
+
+
+# Valores simples (até duas casas, vírgula ou ponto) convertidos para centavos sem Decimal
+_VALOR_SIMPLES = re.compile(r'(\d{1,15})(?:[.,](\d{1,2}))?')
+# Datas no formato canônico montadas direto pelo construtor (valida dia e mês), sem strptime
+_DATA_CANONICA = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+_CAMPOS_OBRIGATORIOS = (
+    ('tipo', 'tipo'),
+    ('valor', 'valor'),
+    ('data', 'data'),
+    ('descricao', 'descrição'),
+    ('categoria', 'categoria')
+)
+_CAMPOS_POR_TIPO = {
+    'receita': ('conta_destino',),
+    'despesa': ('metodo_pagamento', 'estabelecimento')
+}
+_CAMPOS = tuple(campo for campo, _ in _CAMPOS_OBRIGATORIOS) + _CAMPOS_POR_TIPO['receita'] + _CAMPOS_POR_TIPO['despesa']
+_PREFIXO_ERRO = "Erro ao processar dados do formulário: "
 
 
 class RequestAdapter:
@@ -30,8 +53,8 @@ class RequestAdapter:
 
             try:
                 valor_limpo = valor_str.replace(',', '.').strip()
-                valor = Decimal(valor_limpo)
-                if valor <= 0:
+                valor = Dinheiro.de_reais(Decimal(valor_limpo))
+                if valor.centavos <= 0:
                     raise ValueError("O valor deve ser maior que zero")
             except (InvalidOperation, ValueError):
                 raise ValueError(f"Valor inválido: '{valor_str}'. Use formato numérico (ex: 100.50)")
@@ -70,3 +93,99 @@ class RequestAdapter:
 
         except (ValueError, InvalidOperation) as e:
             raise ValueError(f"Erro ao processar dados do formulário: {str(e)}")
+
+    @staticmethod
+    def adaptar_lote_transacoes(
+        itens: Sequence[Any]
+    ) -> Tuple[List[Tuple[int, Dict[str, Any]]], Dict[int, str]]:
+        """Versão em lote de adaptar_formulario_transacao para itens JSON.
+
+        As regras e mensagens são as mesmas, aplicadas coluna a coluna: cada
+        data distinta é convertida uma única vez, e datas e valores no formato
+        canônico dispensam strptime e Decimal. Devolve (índice, dados adaptados) dos
+        itens válidos e a mensagem de erro de cada índice inválido.
+        """
+        erros: Dict[int, str] = {}
+        indices: List[int] = []
+        objetos: List[Dict[str, Any]] = []
+        for indice, item in enumerate(itens):
+            if isinstance(item, dict):
+                indices.append(indice)
+                objetos.append(item)
+            else:
+                erros[indice] = _PREFIXO_ERRO + "Cada transação deve ser um objeto JSON"
+
+        colunas = {campo: RequestAdapter._coluna(objetos, campo) for campo in _CAMPOS}
+        datas: Dict[str, Optional[datetime]] = {}
+        for texto in set(colunas['data']):
+            canonica = _DATA_CANONICA.fullmatch(texto)
+            try:
+                if canonica:
+                    datas[texto] = datetime(*map(int, canonica.groups()))
+                else:
+                    datas[texto] = datetime.strptime(texto, '%Y-%m-%d')
+            except ValueError:
+                datas[texto] = None
+
+        validos: List[Tuple[int, Dict[str, Any]]] = []
+        for indice, *valores in zip(indices, *colunas.values()):
+            linha = dict(zip(_CAMPOS, valores))
+            try:
+                validos.append((indice, RequestAdapter._adaptar_linha(linha, datas[linha['data']])))
+            except ValueError as e:
+                erros[indice] = _PREFIXO_ERRO + str(e)
+        return validos, erros
+
+    @staticmethod
+    def _adaptar_linha(linha: Dict[str, str], data: Optional[datetime]) -> Dict[str, Any]:
+        for campo, nome in _CAMPOS_OBRIGATORIOS:
+            if not linha[campo]:
+                raise ValueError(f"O campo '{nome}' é obrigatório")
+
+        valor_str = linha['valor']
+        simples = _VALOR_SIMPLES.fullmatch(valor_str)
+        try:
+            if simples:
+                reais, fracao = simples.groups()
+                valor = Dinheiro(int(reais) * 100 + int((fracao or '0').ljust(2, '0')))
+            else:
+                valor = Dinheiro.de_reais(Decimal(valor_str.replace(',', '.')))
+            if valor.centavos <= 0:
+                raise ValueError("O valor deve ser maior que zero")
+        except (InvalidOperation, ValueError):
+            raise ValueError(f"Valor inválido: '{valor_str}'. Use formato numérico (ex: 100.50)")
+
+        if data is None:
+            raise ValueError(f"Data inválida: '{linha['data']}'. Use formato YYYY-MM-DD (ex: 2024-01-15)")
+
+        dados_adaptados: Dict[str, Any] = {
+            'tipo': linha['tipo'],
+            'valor': valor,
+            'data': data,
+            'descricao': linha['descricao'],
+            'categoria': linha['categoria']
+        }
+        tipo = linha['tipo'].lower()
+        campos = _CAMPOS_POR_TIPO.get(tipo)
+        if campos is None:
+            raise ValueError(f"Tipo inválido: '{linha['tipo']}'. Tipos válidos: 'receita' ou 'despesa'")
+        for campo in campos:
+            if not linha[campo]:
+                raise ValueError(f"O campo '{campo}' é obrigatório para {tipo}s")
+            dados_adaptados[campo] = linha[campo]
+        return dados_adaptados
+
+    @staticmethod
+    def _coluna(objetos: List[Dict[str, Any]], campo: str) -> List[str]:
+        valores = [item.get(campo) for item in objetos]
+        # Caminho comum (textos) sem chamada de função por célula
+        return [v.strip() if v.__class__ is str else RequestAdapter._texto(v) for v in valores]
+
+    @staticmethod
+    def _texto(valor: Any) -> str:
+        # Números JSON são aceitos como no formulário (ex.: valor 100.5)
+        if isinstance(valor, str):
+            return valor.strip()
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return str(valor)
+        return ''
@@ -0,0 +1,128 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from app.models.dinheiro import Dinheiro
+from app.models.transacao import normalizar_categoria
+from app.models.transacao_frame import TransacaoFrame
+
+
+class AgregadorDashboard:
+    """Reúne todos os números do dashboard a partir de um TransacaoFrame.
+
+    Todas as somas são feitas em centavos inteiros e expostas como Dinheiro.
+    As categorias são agrupadas pela chave normalizada (como nos filtros e
+    nos resumos mensais), com um único nome de exibição por chave.
+    """
+
+    def __init__(self) -> None:
+        self._receitas = 0
+        self._despesas = 0
+        self._soma_valores = 0
+        self._receitas_por_categoria: Dict[str, int] = defaultdict(int)
+        self._despesas_por_categoria: Dict[str, int] = defaultdict(int)
+        self._nomes_categorias: Dict[str, str] = {}
+        self._maior: Optional[int] = None
+        self._menor: Optional[int] = None
+        self.quantidade_receitas = 0
+        self.quantidade_despesas = 0
+        self.total_transacoes = 0
+        self._frame: Optional[TransacaoFrame] = None
+
+    def agregar(self, frame: TransacaoFrame) -> 'AgregadorDashboard':
+        self._frame = frame
+        if not len(frame):
+            return self
+
+        self._receitas += frame.soma('receita')
+        self._despesas += frame.soma('despesa')
+        self.quantidade_receitas += frame.contagem('receita')
+        self.quantidade_despesas += frame.contagem('despesa')
+
+        for categoria, soma in frame.somas_por_categoria('receita').items():
+            self._receitas_por_categoria[self._chave(categoria)] += soma
+        for categoria, soma in frame.somas_por_categoria('despesa').items():
+            self._despesas_por_categoria[self._chave(categoria)] += soma
+
+        self.total_transacoes += len(frame)
+        self._soma_valores += frame.soma()
+        self._acumular_extremos(frame.minimo(), frame.maximo())
+
+        return self
+
+    def adicionar_resumos(self, resumos: List[Dict[str, Any]]) -> 'AgregadorDashboard':
+        """Incorpora resumos mensais (soma, quantidade, mínimo e máximo) por tipo e categoria."""
+        for r in resumos:
+            soma = r['soma_centavos']
+            quantidade = r['quantidade']
+            categoria = self._chave(r.get('categoria', 'Sem Categoria'), r.get('categoria_chave'))
+
+            if r['tipo'] == 'receita':
+                self._receitas += soma
+                self.quantidade_receitas += quantidade
+                self._receitas_por_categoria[categoria] += soma
+            elif r['tipo'] == 'despesa':
+                self._despesas += soma
+                self.quantidade_despesas += quantidade
+                self._despesas_por_categoria[categoria] += soma
+
+            self.total_transacoes += quantidade
+            self._soma_valores += soma
+            self._acumular_extremos(r['minimo_centavos'], r['maximo_centavos'])
+
+        return self
+
+    @property
+    def total_receitas(self) -> Dinheiro:
+        return Dinheiro(self._receitas)
+
+    @property
+    def total_despesas(self) -> Dinheiro:
+        return Dinheiro(self._despesas)
+
+    @property
+    def saldo(self) -> Dinheiro:
+        return Dinheiro(self._receitas - self._despesas)
+
+    @property
+    def receitas_por_categoria(self) -> Dict[str, Dinheiro]:
+        return {self._nomes_categorias[chave]: Dinheiro(val) for chave, val in self._receitas_por_categoria.items()}
+
+    @property
+    def despesas_por_categoria(self) -> Dict[str, Dinheiro]:
+        return {self._nomes_categorias[chave]: Dinheiro(val) for chave, val in self._despesas_por_categoria.items()}
+
+    @property
+    def maior_transacao(self) -> Optional[Dinheiro]:
+        return Dinheiro(self._maior) if self._maior is not None else None
+
+    @property
+    def menor_transacao(self) -> Optional[Dinheiro]:
+        return Dinheiro(self._menor) if self._menor is not None else None
+
+    @property
+    def valor_medio(self) -> Decimal:
+        if not self.total_transacoes:
+            return Decimal('0')
+        return Dinheiro(self._soma_valores).para_decimal() / self.total_transacoes
+
+    def recentes(self, limite: int) -> List[Tuple[datetime, Dict[str, Any]]]:
+        if self._frame is None:
+            return []
+        return self._frame.top_k(limite)
+
+    def _chave(self, nome: str, chave: Optional[str] = None) -> str:
+        chave = chave or normalizar_categoria(nome)
+        # O menor nome visto: a mesma grafia qualquer que seja a ordem das leituras
+        nome = nome.strip()
+        atual = self._nomes_categorias.get(chave)
+        if atual is None or nome < atual:
+            self._nomes_categorias[chave] = nome
+        return chave
+
+    def _acumular_extremos(self, minimo: int, maximo: int) -> None:
+        if self._maior is None or maximo > self._maior:
+            self._maior = maximo
+        if self._menor is None or minimo < self._menor:
+            self._menor = minimo
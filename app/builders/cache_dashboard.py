@@ -0,0 +1,53 @@
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.utils.cache import CacheLRU
+
+
+class CacheDashboard:
+    """Dashboards já montados, por usuário, filtros e versão dos dados.
+
+    A versão faz parte da chave: toda gravação do usuário a incrementa, e as
+    entradas anteriores deixam de ser encontradas (e saem pelo LRU).
+    """
+
+    _instancia: Optional['CacheDashboard'] = None
+    _lock: Lock = Lock()
+
+    MAX_ITENS: int = 512
+    TTL_SEGUNDOS: float = 300.0
+
+    def __new__(cls) -> 'CacheDashboard':
+        if cls._instancia is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = super().__new__(cls)
+                    cls._instancia._inicializar()
+        return cls._instancia
+
+    def _inicializar(self) -> None:
+        self._cache = CacheLRU(max_itens=self.MAX_ITENS, ttl_segundos=self.TTL_SEGUNDOS)
+
+    @staticmethod
+    def chave(
+        user_id: str,
+        data_inicio: Optional[str],
+        data_fim: Optional[str],
+        categoria: Optional[str],
+        versao: int
+    ) -> Tuple[Hashable, ...]:
+        return (user_id, data_inicio or None, data_fim or None, categoria or None, versao)
+
+    def obter(self, chave: Tuple[Hashable, ...]) -> Optional[Dict[str, Any]]:
+        dados = self._cache.obter(chave)
+        # Cópia rasa: quem chama pode acrescentar chaves sem alterar a entrada
+        return dict(dados) if dados is not None else None
+
+    def armazenar(self, chave: Tuple[Hashable, ...], dados: Dict[str, Any]) -> None:
+        self._cache.definir(chave, dict(dados))
+
+    def limpar(self) -> None:
+        self._cache.limpar()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return self._cache.estatisticas()
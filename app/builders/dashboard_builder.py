@@ -1,17 +1,32 @@
-from typing import Dict, Any, List, Optional
-from decimal import Decimal
-from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+import asyncio
 
 from app.models.banco_de_dados import BancoDeDados
+from app.models.transacao import Transacao
+from app.models.transacao_frame import TransacaoFrame
+from app.builders.agregador_dashboard import AgregadorDashboard
+from app.builders.cache_dashboard import CacheDashboard
+from app.utils.datas import converter_data_filtro, dividir_em_meses
+from app.utils.metricas import cronometrado, span
 from flask_login import current_user
 
 
+Intervalo = Tuple[Optional[datetime], Optional[datetime]]
+# (intervalo de meses dos resumos mensais ou None, intervalos lidos transação a transação)
+PlanoLeituras = Tuple[Optional[Tuple[Optional[str], Optional[str]]], List[Intervalo]]
+
+
 class DashboardBuilder:
 
     def __init__(self) -> None:
         self._banco = BancoDeDados()
-        self._transacoes_filtradas: Optional[List[Dict[str, Any]]] = None
+        self._frame: Optional[TransacaoFrame] = None
+        self._agregacao: Optional[AgregadorDashboard] = None
+        self._resumos_mensais: Optional[List[Dict[str, Any]]] = None
+        self._categoria_filtro: Optional[str] = None
+        self._intervalo_filtro: Intervalo = (None, None)
+        self._recentes: Optional[Tuple[int, List[Tuple[datetime, Dict[str, Any]]]]] = None
         self._user_id = current_user.id if current_user and current_user.is_authenticated else None
         self.reset()
 
@@ -50,81 +65,49 @@ class DashboardBuilder:
                 'total_transacoes': 0
             }
         }
-        self._transacoes_filtradas = None
+        self._frame = None
+        self._agregacao = None
+        self._resumos_mensais = None
+        self._categoria_filtro = None
+        self._intervalo_filtro = (None, None)
+        self._recentes = None
         return self
 
+    @cronometrado('dashboard_saldo')
     def com_saldo_total(self) -> 'DashboardBuilder':
-        transacoes = self._obter_transacoes()
-
-        receitas = [t for t in transacoes if t['tipo'] == 'receita']
-        despesas = [t for t in transacoes if t['tipo'] == 'despesa']
-
-        total_receitas = sum(Decimal(str(r['valor'])) for r in receitas)
-        total_despesas = sum(Decimal(str(d['valor'])) for d in despesas)
-        saldo = total_receitas - total_despesas
+        agregacao = self._obter_agregacao()
 
-        self._dados['saldo_total'] = float(saldo)
-        self._dados['total_receitas'] = float(total_receitas)
-        self._dados['total_despesas'] = float(total_despesas)
-        self._dados['quantidade_receitas'] = len(receitas)
-        self._dados['quantidade_despesas'] = len(despesas)
+        self._dados['saldo_total'] = float(agregacao.saldo)
+        self._dados['total_receitas'] = float(agregacao.total_receitas)
+        self._dados['total_despesas'] = float(agregacao.total_despesas)
+        self._dados['quantidade_receitas'] = agregacao.quantidade_receitas
+        self._dados['quantidade_despesas'] = agregacao.quantidade_despesas
 
         return self
 
+    @cronometrado('dashboard_recentes')
     def com_transacoes_recentes(self, limite: int = 10) -> 'DashboardBuilder':
-        transacoes = self._obter_transacoes()
-
-        transacoes_ordenadas = sorted(
-            transacoes,
-            key=lambda t: datetime.fromisoformat(t['data']),
-            reverse=True
-        )
-
         transacoes_formatadas = []
-        for t in transacoes_ordenadas[:limite]:
-            data_obj = datetime.fromisoformat(t['data'])
-            transacao_formatada = {
-                'tipo': str(t['tipo']),
-                'descricao': str(t['descricao']),
-                'valor': float(t['valor']),
-                'categoria': str(t['categoria']),
-                'data': data_obj.strftime('%d/%m/%Y'),
-                'data_iso': str(t['data'])
-            }
-
-            if t['tipo'] == 'receita':
-                transacao_formatada['conta_destino'] = str(t.get('conta_destino', '-'))
-            else:
-                transacao_formatada['metodo_pagamento'] = str(t.get('metodo_pagamento', '-'))
-                transacao_formatada['estabelecimento'] = str(t.get('estabelecimento', '-'))
-
+        for data_obj, t in self._selecionar_recentes(limite):
+            transacao_formatada = Transacao.de_documento(t).para_json()
+            transacao_formatada['data_iso'] = transacao_formatada['data']
+            transacao_formatada['data'] = data_obj.strftime('%d/%m/%Y')
             transacoes_formatadas.append(transacao_formatada)
 
         self._dados['transacoes_recentes'] = transacoes_formatadas
         return self
 
+    @cronometrado('dashboard_categorias')
     def com_resumo_por_categoria(self) -> 'DashboardBuilder':
-        transacoes = self._obter_transacoes()
-        receitas = [t for t in transacoes if t['tipo'] == 'receita']
-        despesas = [t for t in transacoes if t['tipo'] == 'despesa']
-
-        receitas_por_categoria: Dict[str, Decimal] = defaultdict(Decimal)
-        for receita in receitas:
-            categoria = receita.get('categoria', 'Sem Categoria')
-            valor = Decimal(str(receita['valor']))
-            receitas_por_categoria[categoria] += valor
-
-        despesas_por_categoria: Dict[str, Decimal] = defaultdict(Decimal)
-        for despesa in despesas:
-            categoria = despesa.get('categoria', 'Sem Categoria')
-            valor = Decimal(str(despesa['valor']))
-            despesas_por_categoria[categoria] += valor
+        agregacao = self._obter_agregacao()
+        receitas_por_categoria = agregacao.receitas_por_categoria
+        despesas_por_categoria = agregacao.despesas_por_categoria
 
-        total_despesas = sum(despesas_por_categoria.values())
+        total_despesas = agregacao.total_despesas
 
         despesas_com_percentual = []
         for categoria, valor in despesas_por_categoria.items():
-            percentual = (valor / total_despesas * 100) if total_despesas > 0 else 0
+            percentual = (valor.para_decimal() / total_despesas.para_decimal() * 100) if total_despesas else 0
             despesas_com_percentual.append({
                 'categoria': categoria,
                 'valor': float(valor),
@@ -146,21 +129,16 @@ class DashboardBuilder:
 
         return self
 
+    @cronometrado('dashboard_estatisticas')
     def com_estatisticas_adicionais(self) -> 'DashboardBuilder':
-        transacoes = self._obter_transacoes()
-
-        if transacoes:
-            valores = [Decimal(str(t['valor'])) for t in transacoes]
-            valor_medio = sum(valores) / len(valores)
-
-            maior_transacao = max(valores)
-            menor_transacao = min(valores)
+        agregacao = self._obter_agregacao()
 
+        if agregacao.total_transacoes:
             self._dados['estatisticas'] = {
-                'valor_medio': float(valor_medio),
-                'maior_transacao': float(maior_transacao),
-                'menor_transacao': float(menor_transacao),
-                'total_transacoes': len(transacoes)
+                'valor_medio': float(agregacao.valor_medio),
+                'maior_transacao': float(agregacao.maior_transacao),
+                'menor_transacao': float(agregacao.menor_transacao),
+                'total_transacoes': agregacao.total_transacoes
             }
         else:
             self._dados['estatisticas'] = {
@@ -172,77 +150,142 @@ class DashboardBuilder:
 
         return self
 
+    @cronometrado('dashboard_filtros')
     def com_filtros(
         self,
         data_inicio: Optional[str] = None,
         data_fim: Optional[str] = None,
         categoria: Optional[str] = None
     ) -> 'DashboardBuilder':
-        transacoes = self._banco.obter_todas_transacoes(self._user_id)
-        transacoes_filtradas = transacoes.copy()
+        plano = self._planejar_filtros(data_inicio, data_fim, categoria)
+        if plano is None:
+            return self
+
+        meses, intervalos = plano
+        resumos = None
+        if meses is not None:
+            resumos = self._banco.obter_resumos_mensais(self._user_id, *meses, self._categoria_filtro)
+        transacoes = []
+        for inicio, fim in intervalos:
+            transacoes.extend(self._banco.consultar_transacoes(
+                self._user_id,
+                data_inicio=inicio,
+                data_fim=fim,
+                categoria=self._categoria_filtro
+            ))
+        self._aplicar_leituras(resumos, transacoes)
+        return self
+
+    async def com_filtros_async(
+        self,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        categoria: Optional[str] = None,
+        limite_recentes: int = 10
+    ) -> 'DashboardBuilder':
+        """Como com_filtros, mas as leituras independentes (resumos mensais, bordas
+        do intervalo e transações recentes) são feitas em paralelo."""
+        with span('dashboard_filtros'):
+            plano = self._planejar_filtros(data_inicio, data_fim, categoria)
+            if plano is None:
+                return self
+
+            meses, intervalos = plano
+            leituras = [
+                self._banco.consultar_transacoes_async(
+                    self._user_id, data_inicio=inicio, data_fim=fim, categoria=self._categoria_filtro
+                )
+                for inicio, fim in intervalos
+            ]
+            if meses is not None:
+                # Sem os resumos não há transações dos meses completos: as recentes
+                # vêm de uma consulta própria em vez da varredura mês a mês
+                leituras.append(self._banco.obter_recentes_async(
+                    self._user_id, limite_recentes, *self._intervalo_filtro, self._categoria_filtro
+                ))
+                leituras.append(self._banco.obter_resumos_mensais_async(
+                    self._user_id, *meses, self._categoria_filtro
+                ))
+
+            resultados = await asyncio.gather(*leituras)
+            resumos = None
+            if meses is not None:
+                *resultados, recentes, resumos = resultados
+                self._recentes = (limite_recentes, recentes)
+            self._aplicar_leituras(resumos, [t for transacoes in resultados for t in transacoes])
+        return self
 
+    def _planejar_filtros(
+        self,
+        data_inicio: Optional[str],
+        data_fim: Optional[str],
+        categoria: Optional[str]
+    ) -> Optional[PlanoLeituras]:
+        """Registra os filtros e devolve as leituras necessárias (None quando o
+        histórico em cache já atende ao filtro)."""
         filtros_ativos = {}
+        categoria_filtro: Optional[str] = None
 
-        if data_inicio:
-            try:
-                data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d')
-                transacoes_filtradas = [
-                    t for t in transacoes_filtradas
-                    if datetime.fromisoformat(t['data']) >= data_inicio_obj
-                ]
-                filtros_ativos['data_inicio'] = data_inicio_obj.strftime('%d/%m/%Y')
-            except ValueError:
-                pass
-
-        if data_fim:
-            try:
-                # Adicionar 23:59:59 para incluir o dia inteiro
-                data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').replace(
-                    hour=23, minute=59, second=59
-                )
-                transacoes_filtradas = [
-                    t for t in transacoes_filtradas
-                    if datetime.fromisoformat(t['data']) <= data_fim_obj
-                ]
-                filtros_ativos['data_fim'] = data_fim_obj.strftime('%d/%m/%Y')
-            except ValueError:
-                pass
+        data_inicio_obj = converter_data_filtro(data_inicio)
+        if data_inicio_obj:
+            filtros_ativos['data_inicio'] = data_inicio_obj.strftime('%d/%m/%Y')
+
+        data_fim_obj = converter_data_filtro(data_fim, fim_do_dia=True)
+        if data_fim_obj:
+            filtros_ativos['data_fim'] = data_fim_obj.strftime('%d/%m/%Y')
 
         if categoria and categoria != 'todas':
-            transacoes_filtradas = [
-                t for t in transacoes_filtradas
-                if t.get('categoria', '').lower() == categoria.lower()
-            ]
+            categoria_filtro = categoria
             filtros_ativos['categoria'] = categoria
 
-        self._transacoes_filtradas = transacoes_filtradas
+        self._categoria_filtro = categoria_filtro
+        self._intervalo_filtro = (data_inicio_obj, data_fim_obj)
+        self._resumos_mensais = None
+        self._recentes = None
+        self._agregacao = None
         self._dados['filtros_ativos'] = filtros_ativos
 
-        return self
+        if self._banco.historico_em_cache(self._user_id):
+            # Histórico já em memória: filtro vetorizado, sem nenhuma leitura
+            self._frame = self._banco.obter_frame(self._user_id).filtrar_por(
+                data_inicio=data_inicio_obj,
+                data_fim=data_fim_obj,
+                categoria=categoria_filtro
+            )
+            return None
+
+        # Meses completos do intervalo vêm dos resumos mensais; apenas as
+        # bordas parciais são lidas transação a transação
+        divisao = None
+        if data_inicio_obj or data_fim_obj:
+            divisao = dividir_em_meses(data_inicio_obj, data_fim_obj)
+
+        if divisao is None:
+            # Filtros enviados ao banco: apenas os documentos do intervalo são lidos
+            return None, [(data_inicio_obj, data_fim_obj)]
+        mes_inicio, mes_fim, bordas = divisao
+        return (mes_inicio, mes_fim), list(bordas)
+
+    def _aplicar_leituras(
+        self,
+        resumos_mensais: Optional[List[Dict[str, Any]]],
+        transacoes: List[Dict[str, Any]]
+    ) -> None:
+        self._resumos_mensais = resumos_mensais
+        self._frame = TransacaoFrame.de_transacoes(transacoes)
 
+    @cronometrado('dashboard_grafico')
     def com_dados_grafico(self) -> 'DashboardBuilder':
-        transacoes = self._obter_transacoes()
-
-        receitas = [t for t in transacoes if t['tipo'] == 'receita']
-        despesas = [t for t in transacoes if t['tipo'] == 'despesa']
-
-        total_receitas = sum(Decimal(str(r['valor'])) for r in receitas)
-        total_despesas = sum(Decimal(str(d['valor'])) for d in despesas)
+        agregacao = self._obter_agregacao()
 
         grafico_receitas_despesas = {
             'labels': ['Receitas', 'Despesas'],
-            'data': [float(total_receitas), float(total_despesas)],
+            'data': [float(agregacao.total_receitas), float(agregacao.total_despesas)],
             'colors': ['#10b981', '#ef4444']
         }
 
-        despesas_por_categoria: Dict[str, Decimal] = defaultdict(Decimal)
-        for despesa in despesas:
-            categoria = despesa.get('categoria', 'Sem Categoria')
-            valor = Decimal(str(despesa['valor']))
-            despesas_por_categoria[categoria] += valor
-
         categorias_ordenadas = sorted(
-            despesas_por_categoria.items(),
+            agregacao.despesas_por_categoria.items(),
             key=lambda x: x[1],
             reverse=True
         )[:8]
@@ -253,14 +296,8 @@ class DashboardBuilder:
             'color': '#ef4444'
         }
 
-        receitas_por_categoria: Dict[str, Decimal] = defaultdict(Decimal)
-        for receita in receitas:
-            categoria = receita.get('categoria', 'Sem Categoria')
-            valor = Decimal(str(receita['valor']))
-            receitas_por_categoria[categoria] += valor
-
         categorias_receitas_ordenadas = sorted(
-            receitas_por_categoria.items(),
+            agregacao.receitas_por_categoria.items(),
             key=lambda x: x[1],
             reverse=True
         )[:8]
@@ -279,19 +316,100 @@ class DashboardBuilder:
 
         return self
 
-    def _obter_transacoes(self) -> List[Dict[str, Any]]:
-        if self._transacoes_filtradas is not None:
-            return self._transacoes_filtradas
-        return self._banco.obter_todas_transacoes(self._user_id)
+    def _obter_frame(self) -> TransacaoFrame:
+        if self._frame is not None:
+            return self._frame
+        return self._banco.obter_frame(self._user_id)
+
+    def _obter_agregacao(self) -> AgregadorDashboard:
+        # Agregação calculada uma única vez e compartilhada pelos métodos com_*
+        if self._agregacao is None:
+            frame = self._obter_frame()
+            with span('agregacao'):
+                self._agregacao = (AgregadorDashboard()
+                                   .adicionar_resumos(self._resumos_mensais or [])
+                                   .agregar(frame))
+        return self._agregacao
+
+    def _selecionar_recentes(self, limite: int) -> List[Tuple[datetime, Dict[str, Any]]]:
+        if self._recentes is not None and limite <= self._recentes[0]:
+            # Já lidas em paralelo por com_filtros_async
+            return self._recentes[1][:limite]
+
+        if not self._resumos_mensais:
+            # Todas as transações do filtro estão no frame: seleção parcial em memória
+            return self._obter_agregacao().recentes(limite)
+
+        # Os resumos não guardam transações: consulta indexada ordenada por
+        # data decrescente, lendo apenas `limite` documentos
+        return self._banco.obter_recentes(self._user_id, limite, *self._intervalo_filtro, self._categoria_filtro)
 
     def build(self) -> Dict[str, Any]:
         return self._dados.copy()
 
-    def build_completo(self) -> Dict[str, Any]:
-        return (self.reset()
-                .com_saldo_total()
-                .com_transacoes_recentes()
-                .com_resumo_por_categoria()
-                .com_estatisticas_adicionais()
-                .com_dados_grafico()
-                .build())
+    def build_completo(
+        self,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        categoria: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Dashboard completo; repetido com os mesmos filtros e sem gravações
+        novas, vem do CacheDashboard sem nenhuma agregação."""
+        versao = self._banco.obter_versao(self._user_id) if self._user_id is not None else None
+        chave = self._chave_cache(data_inicio, data_fim, categoria, versao)
+        dados = CacheDashboard().obter(chave) if chave else None
+        if dados is not None:
+            return dados
+
+        self.reset()
+        if data_inicio or data_fim or categoria:
+            self.com_filtros(data_inicio=data_inicio, data_fim=data_fim, categoria=categoria)
+        return self._montar_completo(chave)
+
+    async def build_completo_async(
+        self,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        categoria: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # Leitura assíncrona da versão: não bloqueia o loop antes do gather das leituras
+        versao = await self._banco.obter_versao_async(self._user_id) if self._user_id is not None else None
+        chave = self._chave_cache(data_inicio, data_fim, categoria, versao)
+        dados = CacheDashboard().obter(chave) if chave else None
+        if dados is not None:
+            return dados
+
+        self.reset()
+        if data_inicio or data_fim or categoria:
+            await self.com_filtros_async(data_inicio=data_inicio, data_fim=data_fim, categoria=categoria)
+        return self._montar_completo(chave)
+
+    def _montar_completo(self, chave: Optional[Tuple[Any, ...]]) -> Dict[str, Any]:
+        dados = (self.com_saldo_total()
+                 .com_transacoes_recentes()
+                 .com_resumo_por_categoria()
+                 .com_estatisticas_adicionais()
+                 .com_dados_grafico()
+                 .build())
+        if chave:
+            CacheDashboard().armazenar(chave, dados)
+        return dados
+
+    def _chave_cache(
+        self,
+        data_inicio: Optional[str],
+        data_fim: Optional[str],
+        categoria: Optional[str],
+        versao: Optional[int]
+    ) -> Optional[Tuple[Any, ...]]:
+        if self._user_id is None or versao is None:
+            return None
+        # Versão lida antes da montagem (e com ela validado o histórico em
+        # cache): uma gravação concorrente só gera uma nova entrada
+        return CacheDashboard.chave(
+            self._user_id,
+            data_inicio,
+            data_fim,
+            categoria if categoria != 'todas' else None,
+            versao
+        )
@@ -0,0 +1,23 @@
+import click
+from flask.cli import AppGroup
+
+from app.models.banco_de_dados import BancoDeDados
+
+
+dados_cli = AppGroup('dados', help='Manutenção dos dados de transações.')
+
+
+@dados_cli.command('migrar-campos')
+@click.option('--user-id', default=None, help='Migrar apenas as transações deste usuário.')
+def migrar_campos(user_id):
+    """Preenche data_ts e categoria_chave nas transações antigas."""
+    migrados = BancoDeDados().migrar_campos_consulta(user_id)
+    click.echo(f'{migrados} transação(ões) migrada(s).')
+
+
+@dados_cli.command('reconciliar-resumos')
+@click.option('--user-id', default=None, help='Reconciliar apenas o resumo deste usuário.')
+def reconciliar_resumos(user_id):
+    """Reconstrói os documentos de saldo a partir das transações."""
+    resumos = BancoDeDados().reconciliar_resumos(user_id)
+    click.echo(f'{len(resumos)} resumo(s) reconstruído(s).')
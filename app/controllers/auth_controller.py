@@ -1,11 +1,16 @@
-from flask import current_app
-from flask_login import login_user, logout_user
+from flask import current_app, session
+from flask_login import current_user, login_user, logout_user
 from firebase_admin import auth, firestore, exceptions
 import requests
 from app.models.user import User
+from app.models.cache_identidade import CacheIdentidade
+from app.utils.cliente_http import ClienteHTTP
 
 class AuthController:
 
+    # Sessão HTTP única para o Identity Toolkit, compartilhada entre requisições
+    _cliente_http = ClienteHTTP()
+
     def __init__(self):
         self._erro_traducoes = {
             'EMAIL_EXISTS': 'Este email já está cadastrado.',
@@ -38,7 +43,7 @@ class AuthController:
                 "password": password,
                 "returnSecureToken": True
             }
-            response = requests.post(url, json=payload)
+            response = self._cliente_http.post(url, json=payload)
             data = response.json()
 
             if 'error' in data:
@@ -50,9 +55,12 @@ class AuthController:
 
             user = User(uid=uid, email=email, nome=user_record.display_name or email)
             login_user(user)
+            CacheIdentidade().armazenar(user, self._sessao_identidade())
             return True, "Login realizado com sucesso!"
         except exceptions.FirebaseError as e:
             return False, self._traduzir_erro(str(e))
+        except requests.Timeout:
+            return False, "Serviço de autenticação indisponível. Tente novamente."
         except Exception as e:
             return False, f"Erro ao fazer login: {str(e)}"
 
@@ -88,4 +96,14 @@ class AuthController:
             return False, f"Erro inesperado: {str(e)}"
 
     def logout(self):
+        if current_user.is_authenticated:
+            CacheIdentidade().invalidar(current_user.id, session)
         logout_user()
+
+    @classmethod
+    def estatisticas_http(cls):
+        return cls._cliente_http.estatisticas()
+
+    @staticmethod
+    def _sessao_identidade():
+        return session if current_app.config.get('IDENTIDADE_NA_SESSAO') else None
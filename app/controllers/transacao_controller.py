@@ -1,14 +1,38 @@
-from typing import Dict, Any, Tuple
-from decimal import Decimal
+from typing import Dict, Any, IO, Iterable, Iterator, List, Optional, Tuple
 from flask_login import current_user
+import csv
+import io
+import json
 
+from app.builders.cache_dashboard import CacheDashboard
+from app.builders.dashboard_builder import DashboardBuilder
 from app.models.banco_de_dados import BancoDeDados
+from app.models.dinheiro import Dinheiro
+from app.models.transacao import Transacao
 from app.models.transacao_factory import TransacaoFactory
+from app.adapters.importacao_adapter import ImportacaoAdapter
 from app.adapters.request_adapter import RequestAdapter
+from app.utils.datas import converter_data_filtro
+from app.utils.eventos import CanalEventos
 
 
 class TransacaoController:
 
+    # Tamanho de página das listagens da API
+    LIMITE_PADRAO: int = 50
+    LIMITE_MAXIMO: int = 500
+
+    # Itens por chamada de /api/transacoes/lote
+    LIMITE_LOTE: int = 1000
+
+    TIPOS = ('receita', 'despesa')
+    FORMATOS_EXPORTACAO = ('ndjson', 'csv')
+    FORMATOS_IMPORTACAO = ('csv', 'ofx')
+    COLUNAS_CSV = [
+        'tipo', 'valor', 'data', 'descricao', 'categoria',
+        'conta_destino', 'metodo_pagamento', 'estabelecimento'
+    ]
+
     def __init__(self) -> None:
         self._banco = BancoDeDados()
 
@@ -21,6 +45,8 @@ class TransacaoController:
             self._banco.salvar_transacao(current_user.id, transacao.para_dicionario())
 
             saldo_atual = self._banco.calcular_saldo(current_user.id)
+            # Backends com notificações (Firestore, memória) entregam o evento pelo observar
+            CanalEventos().publicar_local(current_user.id, 'transacao', CanalEventos.delta_transacao(transacao))
 
             tipo = transacao.obter_tipo()
             mensagem = (
@@ -35,53 +61,227 @@ class TransacaoController:
         except Exception as e:
             return False, f"Erro inesperado: {str(e)}"
 
-    def listar_transacoes(self) -> Dict[str, Any]:
-        transacoes = self._banco.obter_todas_transacoes(current_user.id)
-        receitas = self._banco.obter_transacoes_por_tipo(current_user.id, 'receita')
-        despesas = self._banco.obter_transacoes_por_tipo(current_user.id, 'despesa')
+    def importar_transacoes(self, arquivo: IO[str], formato: str) -> Dict[str, Any]:
+        if formato not in self.FORMATOS_IMPORTACAO:
+            raise ValueError(
+                f"Formato inválido: '{formato}'. Formatos válidos: 'csv' ou 'ofx'"
+            )
 
-        total_receitas = sum(Decimal(str(r['valor'])) for r in receitas)
-        total_despesas = sum(Decimal(str(d['valor'])) for d in despesas)
-        saldo = self._banco.calcular_saldo(current_user.id)
+        leitor = ImportacaoAdapter.ler_csv if formato == 'csv' else ImportacaoAdapter.ler_ofx
+        erros: List[Dict[str, Any]] = []
 
-        # Garantir que todas as transações sejam serializáveis
-        transacoes_serializaveis = []
-        for t in transacoes:
-            transacao_serializada = {
-                'tipo': str(t.get('tipo', '')),
-                'valor': float(t.get('valor', 0)),
-                'data': str(t.get('data', '')),
-                'descricao': str(t.get('descricao', '')),
-                'categoria': str(t.get('categoria', ''))
-            }
-            # Campos específicos por tipo
-            if t.get('tipo') == 'receita':
-                transacao_serializada['conta_destino'] = str(t.get('conta_destino', ''))
-            else:
-                transacao_serializada['metodo_pagamento'] = str(t.get('metodo_pagamento', ''))
-                transacao_serializada['estabelecimento'] = str(t.get('estabelecimento', ''))
-            transacoes_serializaveis.append(transacao_serializada)
+        def _validas() -> Iterator[Dict[str, Any]]:
+            # Linhas inválidas são relatadas sem interromper a importação
+            for numero, dados in leitor(arquivo):
+                try:
+                    if isinstance(dados, ValueError):
+                        raise dados
+                    dados_adaptados = RequestAdapter.adaptar_formulario_transacao(dados)
+                    transacao = TransacaoFactory.criar_transacao(**dados_adaptados)
+                except ValueError as e:
+                    erros.append({'linha': numero, 'erro': str(e)})
+                    continue
+                yield transacao.para_dicionario()
+
+        importadas, resumo = self._gravar_lote(_validas())
+
+        return {
+            'importadas': importadas,
+            'erros': erros,
+            'saldo': float(Dinheiro(resumo['saldo_centavos']))
+        }
+
+    def criar_transacoes_em_lote(self, itens: Any) -> Dict[str, Any]:
+        """Cria as transações de uma lista JSON com uma única gravação em lote.
+
+        Itens inválidos não impedem os demais; a resposta traz o status de
+        cada item, na ordem recebida, e o saldo após a gravação.
+        """
+        if not isinstance(itens, list):
+            raise ValueError("O corpo deve ser uma lista JSON de transações")
+        if len(itens) > self.LIMITE_LOTE:
+            raise ValueError(f"Máximo de {self.LIMITE_LOTE} transações por lote")
+
+        validos, erros = RequestAdapter.adaptar_lote_transacoes(itens)
+        documentos: List[Dict[str, Any]] = []
+        for indice, dados_adaptados in validos:
+            try:
+                documentos.append(TransacaoFactory.criar_transacao(**dados_adaptados).para_dicionario())
+            except ValueError as e:
+                erros[indice] = str(e)
+
+        criadas, resumo = self._gravar_lote(documentos)
+
+        return {
+            'criadas': criadas,
+            'rejeitadas': len(erros),
+            'saldo': float(Dinheiro(resumo['saldo_centavos'])),
+            'itens': [
+                {'indice': indice, 'status': 'erro', 'erro': erros[indice]} if indice in erros
+                else {'indice': indice, 'status': 'criada'}
+                for indice in range(len(itens))
+            ]
+        }
+
+    def _gravar_lote(self, documentos: Iterable[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+        # Uma gravação em lote (agregados atualizados uma vez) e uma leitura do resumo
+        gravadas = self._banco.salvar_transacoes_em_lote(current_user.id, documentos)
+        resumo = self._banco.obter_resumo(current_user.id)
+        if gravadas:
+            CanalEventos().publicar_local(current_user.id, 'lote', {'quantidade': gravadas})
+        return gravadas, resumo
+
+    def listar_transacoes(
+        self,
+        limite: Optional[int] = None,
+        cursor: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        categoria: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # Com os filtros do dashboard, a primeira página são as transações
+        # recentes exibidas nele e o cursor continua na mesma ordem
+        filtros = self._filtros_listagem(data_inicio, data_fim, categoria)
+        transacoes, proximo_cursor = self._banco.listar_pagina(
+            current_user.id, self._normalizar_limite(limite), cursor, **filtros
+        )
+        totais = self._totais_listagem(filtros, data_inicio, data_fim, categoria)
 
         return {
-            'transacoes': transacoes_serializaveis,
-            'total_receitas': float(total_receitas),
-            'total_despesas': float(total_despesas),
-            'saldo': float(saldo),
-            'quantidade_transacoes': len(transacoes)
+            'transacoes': [Transacao.de_documento(t) for t in transacoes],
+            'total_receitas': totais['total_receitas'],
+            'total_despesas': totais['total_despesas'],
+            'saldo': totais['saldo_total'],
+            'quantidade_transacoes': totais['quantidade_receitas'] + totais['quantidade_despesas'],
+            'proximo_cursor': proximo_cursor
         }
 
+    def listar_transacoes_por_tipo(
+        self,
+        tipo: str,
+        limite: Optional[int] = None,
+        cursor: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        categoria: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Tipo inválido: '{tipo}'. Tipos válidos: 'receita' ou 'despesa'")
+
+        filtros = self._filtros_listagem(data_inicio, data_fim, categoria)
+        transacoes, proximo_cursor = self._banco.listar_pagina(
+            current_user.id, self._normalizar_limite(limite), cursor, tipo=tipo, **filtros
+        )
+        totais = self._totais_listagem(filtros, data_inicio, data_fim, categoria)
+
+        return {
+            'tipo': tipo,
+            'transacoes': [Transacao.de_documento(t) for t in transacoes],
+            'quantidade': totais.get(f'quantidade_{tipo}s', 0),
+            'proximo_cursor': proximo_cursor
+        }
+
+    def _totais_listagem(
+        self,
+        filtros: Dict[str, Any],
+        data_inicio: Optional[str],
+        data_fim: Optional[str],
+        categoria: Optional[str]
+    ) -> Dict[str, Any]:
+        """Totais das transações listadas: do filtro, quando há filtros; senão do documento agregado."""
+        if any(filtros.values()):
+            # Todas as páginas do mesmo filtro têm os mesmos totais: ficam no
+            # CacheDashboard pela versão, e só a primeira página (ou uma
+            # gravação nova) agrega
+            versao = self._banco.obter_versao(current_user.id)
+            chave = CacheDashboard.chave(current_user.id, data_inicio, data_fim, filtros['categoria'], versao)
+            totais = CacheDashboard().obter(chave) or CacheDashboard().obter(('totais',) + chave)
+            if totais is not None:
+                return totais
+
+            # Mesma agregação do dashboard: resumos mensais dos meses completos
+            # e transações apenas das bordas parciais do intervalo
+            totais = (DashboardBuilder()
+                      .com_filtros(data_inicio=data_inicio, data_fim=data_fim, categoria=categoria)
+                      .com_saldo_total()
+                      .build())
+            CacheDashboard().armazenar(('totais',) + chave, totais)
+            return totais
+
+        resumo = self._banco.obter_resumo(current_user.id)
+        return {
+            'saldo_total': float(Dinheiro(resumo['saldo_centavos'])),
+            'total_receitas': float(Dinheiro(resumo['total_receitas_centavos'])),
+            'total_despesas': float(Dinheiro(resumo['total_despesas_centavos'])),
+            'quantidade_receitas': resumo['quantidade_receitas'],
+            'quantidade_despesas': resumo['quantidade_despesas']
+        }
+
+    def exportar_transacoes(
+        self,
+        formato: str,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        categoria: Optional[str] = None
+    ) -> Iterator[str]:
+        if formato not in self.FORMATOS_EXPORTACAO:
+            raise ValueError(
+                f"Formato inválido: '{formato}'. Formatos válidos: 'ndjson' ou 'csv'"
+            )
+
+        transacoes = self._banco.iterar_transacoes(
+            current_user.id,
+            data_inicio=converter_data_filtro(data_inicio),
+            data_fim=converter_data_filtro(data_fim, fim_do_dia=True),
+            categoria=categoria if categoria and categoria != 'todas' else None
+        )
+        if formato == 'csv':
+            return self._gerar_csv(transacoes)
+        return self._gerar_ndjson(transacoes)
+
     def obter_resumo_financeiro(self) -> Dict[str, Any]:
-        receitas = self._banco.obter_transacoes_por_tipo(current_user.id, 'receita')
-        despesas = self._banco.obter_transacoes_por_tipo(current_user.id, 'despesa')
+        resumo = self._banco.obter_resumo(current_user.id)
 
-        total_receitas = sum(Decimal(str(r['valor'])) for r in receitas)
-        total_despesas = sum(Decimal(str(d['valor'])) for d in despesas)
-        saldo = self._banco.calcular_saldo(current_user.id)
+        return {
+            'saldo_atual': float(Dinheiro(resumo['saldo_centavos'])),
+            'total_receitas': float(Dinheiro(resumo['total_receitas_centavos'])),
+            'total_despesas': float(Dinheiro(resumo['total_despesas_centavos'])),
+            'quantidade_receitas': resumo['quantidade_receitas'],
+            'quantidade_despesas': resumo['quantidade_despesas']
+        }
 
+    @staticmethod
+    def _filtros_listagem(
+        data_inicio: Optional[str],
+        data_fim: Optional[str],
+        categoria: Optional[str]
+    ) -> Dict[str, Any]:
         return {
-            'saldo_atual': float(saldo),
-            'total_receitas': float(total_receitas),
-            'total_despesas': float(total_despesas),
-            'quantidade_receitas': len(receitas),
-            'quantidade_despesas': len(despesas)
+            'data_inicio': converter_data_filtro(data_inicio),
+            'data_fim': converter_data_filtro(data_fim, fim_do_dia=True),
+            'categoria': categoria if categoria and categoria != 'todas' else None
         }
+
+    def _normalizar_limite(self, limite: Optional[int]) -> int:
+        if not limite or limite < 1:
+            return self.LIMITE_PADRAO
+        return min(limite, self.LIMITE_MAXIMO)
+
+    @staticmethod
+    def _gerar_ndjson(transacoes: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        for t in transacoes:
+            yield json.dumps(Transacao.de_documento(t).para_json(), ensure_ascii=False) + '\n'
+
+    @staticmethod
+    def _gerar_csv(transacoes: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        # Um único buffer reaproveitado: a memória não cresce com o histórico
+        buffer = io.StringIO()
+        escritor = csv.DictWriter(buffer, fieldnames=TransacaoController.COLUNAS_CSV, restval='')
+
+        escritor.writeheader()
+        for t in transacoes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            escritor.writerow(Transacao.de_documento(t).para_json())
+        yield buffer.getvalue()
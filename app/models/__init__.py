@@ -1,11 +1,15 @@
 from app.models.banco_de_dados import BancoDeDados
+from app.models.dinheiro import Dinheiro
 from app.models.transacao import Transacao, Receita, Despesa
 from app.models.transacao_factory import TransacaoFactory
+from app.models.transacao_frame import TransacaoFrame
 
 __all__ = [
     'BancoDeDados',
+    'Dinheiro',
     'Transacao',
     'Receita',
     'Despesa',
-    'TransacaoFactory'
+    'TransacaoFactory',
+    'TransacaoFrame'
 ]
@@ -0,0 +1,26 @@
+import os
+
+from app.models.armazenamento.base import Armazenamento
+from app.models.armazenamento.armazenamento_memoria import ArmazenamentoMemoria
+from app.models.armazenamento.armazenamento_sqlite import ArmazenamentoSQLite
+
+
+def criar_armazenamento(nome: str) -> Armazenamento:
+    """Instancia o backend pelo nome configurado em BACKEND_ARMAZENAMENTO."""
+    if nome == 'memoria':
+        return ArmazenamentoMemoria()
+    if nome == 'sqlite':
+        return ArmazenamentoSQLite(os.environ.get('SQLITE_CAMINHO', 'controle_financeiro.db'))
+    if nome == 'firestore':
+        # Importado sob demanda: o backend em memória não depende do Firebase
+        from app.models.armazenamento.armazenamento_firestore import ArmazenamentoFirestore
+        return ArmazenamentoFirestore()
+    raise ValueError(f"Backend de armazenamento desconhecido: '{nome}'")
+
+
+__all__ = [
+    'Armazenamento',
+    'ArmazenamentoMemoria',
+    'ArmazenamentoSQLite',
+    'criar_armazenamento'
+]
@@ -0,0 +1,473 @@
+from google.cloud.firestore import FieldFilter
+import firebase_admin
+from firebase_admin import credentials, firestore, firestore_async
+from datetime import datetime
+from threading import Lock, Thread
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import os
+
+from app.models.armazenamento.base import Armazenamento, Mudanca
+
+
+class ArmazenamentoFirestore(Armazenamento):
+    """Transações na coleção raiz 'transacoes', saldo em 'resumos' e totais mensais em 'resumos_mensais'."""
+
+    def __init__(self) -> None:
+        if not firebase_admin._apps:
+            cred_path = os.path.join(os.getcwd(), 'serviceAccountKey.json')
+            if os.path.exists(cred_path):
+                cred = credentials.Certificate(cred_path)
+                firebase_admin.initialize_app(cred)
+            else:
+                pass
+        self.db = firestore.client()
+        # AsyncClient e seu loop de eventos são criados no primeiro uso assíncrono
+        self._db_async: Any = None
+        self._loop_async: Optional[asyncio.AbstractEventLoop] = None
+        self._lock_async = Lock()
+
+    def _no_loop_async(self, corrotina: Coroutine[Any, Any, Any]) -> Awaitable[Any]:
+        """Executa a corrotina do AsyncClient em um loop dedicado e de vida longa.
+
+        Os canais gRPC ficam presos ao loop em que foram abertos, e o Flask
+        cria um loop por requisição assíncrona; com um loop próprio as
+        conexões são reaproveitadas entre requisições.
+        """
+        if self._loop_async is None:
+            with self._lock_async:
+                if self._loop_async is None:
+                    loop = asyncio.new_event_loop()
+                    Thread(target=loop.run_forever, name='firestore-async', daemon=True).start()
+                    self._db_async = firestore_async.client()
+                    self._loop_async = loop
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(corrotina, self._loop_async))
+
+    def salvar(self, user_id: str, transacao: Dict[str, Any]) -> None:
+        transacao_ref = self.db.collection('transacoes').document()
+        resumo_ref = self.db.collection('resumos').document(user_id)
+        mensal_ref = self.db.collection('resumos_mensais').document(
+            self._id_resumo_mensal(user_id, transacao)
+        )
+
+        @firestore.transactional
+        def _gravar(transaction) -> None:
+            # No Firestore todas as leituras precedem as escritas
+            resumo = resumo_ref.get(transaction=transaction)
+            if not resumo.exists:
+                # Agregados ainda não materializados: construídos do histórico
+                # (com esta transação) na mesma transação que a grava
+                self._construir_agregados(transaction, user_id, 1, transacao)
+                transaction.set(transacao_ref, transacao)
+                return
+            mensal = mensal_ref.get(transaction=transaction)
+            # Salvar na coleção raiz 'transacoes'
+            transaction.set(transacao_ref, transacao)
+            transaction.update(resumo_ref, {**self._incrementos_resumo(transacao), 'versao': firestore.Increment(1)})
+            transaction.set(mensal_ref, self._acumular_resumo_mensal(
+                mensal.to_dict() if mensal.exists else None, user_id, transacao
+            ))
+
+        _gravar(self.db.transaction())
+
+    # Limite de escritas de um WriteBatch (documentos, resumos mensais e resumo)
+    LIMITE_ESCRITAS_LOTE: int = 500
+
+    def salvar_em_lote(self, user_id: str, transacoes: Iterable[Dict[str, Any]]) -> int:
+        """Grava em WriteBatches de até 500 escritas, cada um com os agregados das suas transações.
+
+        Cada lote leva os documentos, um set(merge) por resumo mensal tocado
+        (Increment, Minimum e Maximum) e os incrementos do resumo, com
+        'versao': o commit é atômico, e uma falha no meio da importação deixa
+        os agregados coerentes com os lotes já gravados.
+        """
+        resumo_ref = self.db.collection('resumos').document(user_id)
+        if not resumo_ref.get().exists:
+            self._materializar_agregados(user_id)
+
+        colecao = self.db.collection('transacoes')
+        gravadas = 0
+        documentos: List[Dict[str, Any]] = []
+        delta = self._resumo_vazio()
+        mensais: Dict[str, Dict[str, Any]] = {}
+        for transacao in transacoes:
+            id_mensal = self._id_resumo_mensal(user_id, transacao)
+            # Uma escrita por documento e por resumo mensal, mais a do resumo
+            escritas = len(documentos) + len(mensais) + (id_mensal not in mensais) + 2
+            if escritas > self.LIMITE_ESCRITAS_LOTE:
+                gravadas += self._gravar_lote_com_agregados(resumo_ref, colecao, documentos, delta, mensais)
+                documentos, delta, mensais = [], self._resumo_vazio(), {}
+            documentos.append(transacao)
+            self._acumular_resumo(delta, transacao)
+            mensais[id_mensal] = self._acumular_resumo_mensal(mensais.get(id_mensal), user_id, transacao)
+        if documentos:
+            gravadas += self._gravar_lote_com_agregados(resumo_ref, colecao, documentos, delta, mensais)
+        return gravadas
+
+    def _gravar_lote_com_agregados(
+        self,
+        resumo_ref: Any,
+        colecao: Any,
+        documentos: List[Dict[str, Any]],
+        delta: Dict[str, Any],
+        mensais: Dict[str, Dict[str, Any]]
+    ) -> int:
+        batch = self.db.batch()
+        for transacao in documentos:
+            batch.set(colecao.document(), transacao)
+
+        colecao_mensal = self.db.collection('resumos_mensais')
+        for id_mensal, mensal in mensais.items():
+            # Transformações do servidor: nenhuma leitura do documento atual
+            batch.set(colecao_mensal.document(id_mensal), {
+                **mensal,
+                'soma_centavos': firestore.Increment(mensal['soma_centavos']),
+                'quantidade': firestore.Increment(mensal['quantidade']),
+                'minimo_centavos': firestore.Minimum(mensal['minimo_centavos']),
+                'maximo_centavos': firestore.Maximum(mensal['maximo_centavos'])
+            }, merge=True)
+
+        batch.update(resumo_ref, {
+            'saldo_centavos': firestore.Increment(
+                delta['total_receitas_centavos'] - delta['total_despesas_centavos']
+            ),
+            'total_receitas_centavos': firestore.Increment(delta['total_receitas_centavos']),
+            'total_despesas_centavos': firestore.Increment(delta['total_despesas_centavos']),
+            'quantidade_receitas': firestore.Increment(delta['quantidade_receitas']),
+            'quantidade_despesas': firestore.Increment(delta['quantidade_despesas']),
+            'versao': firestore.Increment(1)
+        })
+        batch.commit()
+        return len(documentos)
+
+    def _materializar_agregados(self, user_id: str) -> None:
+        """Cria o resumo e os resumos mensais a partir do histórico, se o resumo ainda não existe."""
+        resumo_ref = self.db.collection('resumos').document(user_id)
+
+        @firestore.transactional
+        def _materializar(transaction) -> None:
+            # Outra gravação pode tê-lo criado: a leitura do resumo na transação decide
+            if not resumo_ref.get(transaction=transaction).exists:
+                self._construir_agregados(transaction, user_id, 1)
+
+        _materializar(self.db.transaction())
+
+    def _construir_agregados(
+        self,
+        transaction: Any,
+        user_id: str,
+        versao: int,
+        nova: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Regrava o resumo e os resumos mensais do usuário a partir do histórico, dentro da transação.
+
+        Lê o histórico e os resumos mensais existentes antes de qualquer
+        escrita; resumos mensais que o histórico não produz mais são removidos.
+        """
+        historico = [
+            doc.to_dict()
+            for doc in self._consulta_transacoes(self.db, user_id, None, None, None, None).get(transaction=transaction)
+        ]
+        existentes = [doc.id for doc in self._consulta_mensal(self.db, user_id, None, None, None).get(transaction=transaction)]
+        if nova is not None:
+            historico.append(nova)
+        resumo, mensais = self._agregados_do_historico(user_id, historico)
+
+        colecao_mensal = self.db.collection('resumos_mensais')
+        for id_mensal, dados in mensais.items():
+            transaction.set(colecao_mensal.document(id_mensal), dados)
+        for id_mensal in set(existentes) - set(mensais):
+            transaction.delete(colecao_mensal.document(id_mensal))
+        transaction.set(self.db.collection('resumos').document(user_id), {**resumo, 'versao': versao})
+        return resumo
+
+    def _agregados_do_historico(
+        self,
+        user_id: str,
+        historico: Iterable[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        resumo = self._resumo_vazio()
+        mensais: Dict[str, Dict[str, Any]] = {}
+        for transacao in historico:
+            id_mensal = self._id_resumo_mensal(user_id, transacao)
+            mensais[id_mensal] = self._acumular_resumo_mensal(mensais.get(id_mensal), user_id, transacao)
+            self._acumular_resumo(resumo, transacao)
+        return self._com_saldo(resumo), mensais
+
+    def consultar(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        consulta = self._consulta_transacoes(self.db, user_id, data_inicio, data_fim, categoria_chave, tipo)
+        for doc in consulta.stream():
+            yield doc.to_dict()
+
+    async def consultar_async(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        async def _consultar() -> List[Dict[str, Any]]:
+            consulta = self._consulta_transacoes(self._db_async, user_id, data_inicio, data_fim, categoria_chave, tipo)
+            return [doc.to_dict() async for doc in consulta.stream()]
+
+        return await self._no_loop_async(_consultar())
+
+    @staticmethod
+    def _consulta_transacoes(
+        db: Any,
+        user_id: str,
+        data_inicio: Optional[datetime],
+        data_fim: Optional[datetime],
+        categoria_chave: Optional[str],
+        tipo: Optional[str]
+    ) -> Any:
+        # Filtros de igualdade e intervalo executados pelo Firestore
+        # (índices compostos em firestore.indexes.json); vale para o cliente síncrono e o assíncrono
+        consulta = db.collection('transacoes').where(filter=FieldFilter('user_id', '==', user_id))
+        if tipo:
+            consulta = consulta.where(filter=FieldFilter('tipo', '==', tipo))
+        if categoria_chave:
+            consulta = consulta.where(filter=FieldFilter('categoria_chave', '==', categoria_chave))
+        if data_inicio:
+            consulta = consulta.where(filter=FieldFilter('data_ts', '>=', data_inicio))
+        if data_fim:
+            consulta = consulta.where(filter=FieldFilter('data_ts', '<=', data_fim))
+        return consulta
+
+    def listar_pagina(
+        self,
+        user_id: str,
+        limite: int,
+        cursor: Optional[str] = None,
+        tipo: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        colecao = self.db.collection('transacoes')
+        # order_by(data_ts DESC).limit(n + 1): lê só a página, pelos índices decrescentes
+        consulta = self._consulta_transacoes(self.db, user_id, data_inicio, data_fim, categoria_chave, tipo)
+        consulta = (consulta
+                    .order_by('data_ts', direction=firestore.Query.DESCENDING)
+                    .order_by('__name__', direction=firestore.Query.DESCENDING))
+
+        if cursor:
+            data_ts, doc_id = self._decodificar_cursor(cursor)
+            consulta = consulta.start_after({'data_ts': data_ts, '__name__': colecao.document(doc_id)})
+
+        # Um documento a mais indica se existe próxima página
+        docs = list(consulta.limit(limite + 1).stream())
+        pagina = docs[:limite]
+        proximo_cursor = None
+        if len(docs) > limite:
+            ultimo = pagina[-1]
+            proximo_cursor = self._codificar_cursor(ultimo.get('data_ts'), ultimo.id)
+
+        return [doc.to_dict() for doc in pagina], proximo_cursor
+
+    def obter_resumo(self, user_id: str) -> Dict[str, Any]:
+        """Lê o documento agregado do usuário (uma única leitura, sem escritas).
+
+        Enquanto o resumo não existe (histórico anterior aos resumos), os
+        totais são calculados do histórico sem gravar nada; a primeira
+        gravação do usuário os materializa na própria transação.
+        """
+        doc = self.db.collection('resumos').document(user_id).get()
+        if doc.exists:
+            return doc.to_dict()
+        resumo, _ = self._agregados_do_historico(user_id, self.consultar(user_id))
+        return resumo
+
+    def obter_versao(self, user_id: str) -> int:
+        """Lê apenas o campo 'versao' do documento de resumo."""
+        doc = self.db.collection('resumos').document(user_id).get(field_paths=['versao'])
+        return (doc.to_dict() or {}).get('versao', 0) if doc.exists else 0
+
+    async def obter_versao_async(self, user_id: str) -> int:
+        async def _ler() -> int:
+            doc = await self._db_async.collection('resumos').document(user_id).get(field_paths=['versao'])
+            return (doc.to_dict() or {}).get('versao', 0) if doc.exists else 0
+
+        return await self._no_loop_async(_ler())
+
+    _TIPOS_MUDANCA = {'ADDED': 'adicionado', 'MODIFIED': 'modificado', 'REMOVED': 'removido'}
+
+    def observar(
+        self,
+        user_id: str,
+        ao_mudar_transacoes: Callable[[List[Mudanca]], None],
+        ao_mudar_resumo: Callable[[Optional[Dict[str, Any]]], None]
+    ) -> Optional[Callable[[], None]]:
+        """Dois on_snapshot: a consulta das transações do usuário e o documento de resumo.
+
+        Os avisos chegam na thread do watch do SDK, que reconecta sozinho.
+        """
+        def _transacoes(_documentos: List[Any], mudancas: List[Any], _lido_em: Any) -> None:
+            ao_mudar_transacoes([
+                (
+                    self._TIPOS_MUDANCA[m.type.name],
+                    m.document.id,
+                    None if m.type.name == 'REMOVED' else m.document.to_dict()
+                )
+                for m in mudancas
+            ])
+
+        def _resumo(documentos: List[Any], _mudancas: List[Any], _lido_em: Any) -> None:
+            documento = documentos[0] if documentos else None
+            ao_mudar_resumo(documento.to_dict() if documento is not None and documento.exists else None)
+
+        observacoes = [
+            self._consulta_transacoes(self.db, user_id, None, None, None, None).on_snapshot(_transacoes),
+            self.db.collection('resumos').document(user_id).on_snapshot(_resumo)
+        ]
+
+        def cancelar() -> None:
+            for observacao in observacoes:
+                observacao.unsubscribe()
+
+        return cancelar
+
+    def reconciliar_resumos(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Reconstrói o resumo e os resumos mensais a partir do histórico, uma transação por usuário.
+
+        A transação lê o resumo, o histórico e os resumos mensais antes de
+        gravar: uma gravação concorrente do usuário conflita e a reconstrução
+        é repetida, em vez de ser sobrescrita.
+        """
+        if user_id:
+            usuarios = {user_id}
+        else:
+            # Usuários com transações e também os que só têm resumo (histórico apagado)
+            usuarios = {doc.get('user_id') for doc in self.db.collection('transacoes').select(['user_id']).stream()}
+            usuarios.update(doc.id for doc in self.db.collection('resumos').select([]).stream())
+        return {uid: self._reconstruir_agregados(uid) for uid in sorted(usuarios)}
+
+    def _reconstruir_agregados(self, user_id: str) -> Dict[str, Any]:
+        resumo_ref = self.db.collection('resumos').document(user_id)
+
+        @firestore.transactional
+        def _reconstruir(transaction) -> Dict[str, Any]:
+            atual = resumo_ref.get(transaction=transaction)
+            versao = (atual.to_dict() or {}).get('versao', 0) if atual.exists else 0
+            return self._construir_agregados(transaction, user_id, versao + 1)
+
+        return _reconstruir(self.db.transaction())
+
+    def obter_resumos_mensais(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if not self.db.collection('resumos').document(user_id).get(field_paths=['versao']).exists:
+            return self._mensais_do_historico(user_id, mes_inicio, mes_fim, categoria_chave)
+        consulta = self._consulta_mensal(self.db, user_id, mes_inicio, mes_fim, categoria_chave)
+        return [doc.to_dict() for doc in consulta.stream()]
+
+    async def obter_resumos_mensais_async(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        async def _consultar() -> Optional[List[Dict[str, Any]]]:
+            resumo = await self._db_async.collection('resumos').document(user_id).get(field_paths=['versao'])
+            if not resumo.exists:
+                return None
+            consulta = self._consulta_mensal(self._db_async, user_id, mes_inicio, mes_fim, categoria_chave)
+            return [doc.to_dict() async for doc in consulta.stream()]
+
+        resumos = await self._no_loop_async(_consultar())
+        if resumos is None:
+            return await asyncio.to_thread(self._mensais_do_historico, user_id, mes_inicio, mes_fim, categoria_chave)
+        return resumos
+
+    def _mensais_do_historico(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str],
+        mes_fim: Optional[str],
+        categoria_chave: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        # Resumos mensais ainda não materializados: calculados do histórico, sem gravar
+        _, mensais = self._agregados_do_historico(user_id, self.consultar(user_id, categoria_chave=categoria_chave))
+        return [
+            mensal for mensal in mensais.values()
+            if (not mes_inicio or mensal['mes'] >= mes_inicio) and (not mes_fim or mensal['mes'] <= mes_fim)
+        ]
+
+    @staticmethod
+    def _consulta_mensal(
+        db: Any,
+        user_id: str,
+        mes_inicio: Optional[str],
+        mes_fim: Optional[str],
+        categoria_chave: Optional[str]
+    ) -> Any:
+        consulta = db.collection('resumos_mensais').where(filter=FieldFilter('user_id', '==', user_id))
+        if categoria_chave:
+            consulta = consulta.where(filter=FieldFilter('categoria_chave', '==', categoria_chave))
+        if mes_inicio:
+            consulta = consulta.where(filter=FieldFilter('mes', '>=', mes_inicio))
+        if mes_fim:
+            consulta = consulta.where(filter=FieldFilter('mes', '<=', mes_fim))
+        return consulta
+
+    def migrar_campos(self, user_id: Optional[str] = None) -> int:
+        consulta = self.db.collection('transacoes')
+        if user_id:
+            consulta = consulta.where(filter=FieldFilter('user_id', '==', user_id))
+
+        escritas = []
+        for doc in consulta.stream():
+            campos = self._campos_migrados(doc.to_dict())
+            if campos is not None:
+                escritas.append((doc.reference, campos))
+        return self._gravar_em_lotes(escritas, merge=True)
+
+    def _gravar_em_lotes(
+        self,
+        escritas: Iterable[Tuple[Any, Dict[str, Any]]],
+        merge: bool = False
+    ) -> int:
+        batch = self.db.batch()
+        pendentes = 0
+        total = 0
+        for ref, dados in escritas:
+            batch.set(ref, dados, merge=merge)
+            pendentes += 1
+            total += 1
+            # Limite de 500 operações por WriteBatch
+            if pendentes == 500:
+                batch.commit()
+                batch = self.db.batch()
+                pendentes = 0
+        if pendentes:
+            batch.commit()
+        return total
+
+    @staticmethod
+    def _incrementos_resumo(transacao: Dict[str, Any]) -> Dict[str, Any]:
+        # Incrementos inteiros: o saldo acumulado é sempre exato
+        centavos = transacao['valor_centavos']
+        if transacao['tipo'] == 'receita':
+            return {
+                'saldo_centavos': firestore.Increment(centavos),
+                'total_receitas_centavos': firestore.Increment(centavos),
+                'quantidade_receitas': firestore.Increment(1)
+            }
+        return {
+            'saldo_centavos': firestore.Increment(-centavos),
+            'total_despesas_centavos': firestore.Increment(centavos),
+            'quantidade_despesas': firestore.Increment(1)
+        }
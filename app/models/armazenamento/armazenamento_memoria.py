@@ -0,0 +1,259 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from threading import RLock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import itertools
+
+from app.models.armazenamento.base import Armazenamento, Mudanca
+from app.utils.datas import converter_data, data_da_transacao
+
+
+class ArmazenamentoMemoria(Armazenamento):
+    """Backend em processo, sem dependências externas, para desenvolvimento e benchmarks.
+
+    Cada usuário tem um índice ordenado por (data, id), usado nos filtros de
+    intervalo e na paginação; resumo e resumos mensais são mantidos a cada
+    gravação. Os documentos devolvidos são os próprios objetos armazenados.
+
+    Também emite eventos de mudança (observar), fazendo o papel do
+    on_snapshot do Firestore em desenvolvimento, e serve de réplica local
+    para o OuvinteTransacoes (aplicar_mudancas).
+    """
+
+    # Maior id possível, para incluir no intervalo todas as transações da data final
+    _ID_MAXIMO = '\U0010ffff'
+
+    def __init__(self) -> None:
+        self._lock = RLock()
+        self._documentos: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._indices: Dict[str, List[Tuple[datetime, str]]] = {}
+        self._resumos: Dict[str, Dict[str, Any]] = {}
+        self._mensais: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._versoes: Dict[str, int] = {}
+        self._observadores: Dict[str, List[Tuple[Callable[..., None], Callable[..., None]]]] = {}
+        # Ids crescentes: transações da mesma data mantêm a ordem de gravação
+        self._sequencia = itertools.count(1)
+
+    def salvar(self, user_id: str, transacao: Dict[str, Any]) -> None:
+        with self._lock:
+            doc_id = self._inserir(user_id, transacao)
+            self._incrementar_versao(user_id)
+            self._notificar(user_id, [('adicionado', doc_id, transacao)])
+
+    def salvar_em_lote(self, user_id: str, transacoes: Iterable[Dict[str, Any]]) -> int:
+        gravadas: List[Mudanca] = []
+        with self._lock:
+            for transacao in transacoes:
+                gravadas.append(('adicionado', self._inserir(user_id, transacao), transacao))
+            if gravadas:
+                self._incrementar_versao(user_id)
+                self._notificar(user_id, gravadas)
+        return len(gravadas)
+
+    def aplicar_mudancas(self, user_id: str, mudancas: Iterable[Mudanca]) -> None:
+        """Aplica eventos de mudança de outro backend, mantendo os ids de origem.
+
+        Inserções são acumuladas nos agregados; remoções e alterações
+        (raras) recalculam os agregados do usuário.
+        """
+        with self._lock:
+            documentos = self._documentos.setdefault(user_id, {})
+            recalcular = False
+            for tipo, doc_id, transacao in mudancas:
+                if doc_id in documentos:
+                    self._remover(user_id, doc_id)
+                    recalcular = True
+                if tipo != 'removido':
+                    self._inserir(user_id, transacao, doc_id)
+            if recalcular:
+                self._recalcular_agregados(user_id)
+            self._incrementar_versao(user_id)
+
+    def descartar(self, user_id: str) -> None:
+        """Remove todos os dados do usuário (réplica que deixou de ser acompanhada)."""
+        with self._lock:
+            for dados in (self._documentos, self._indices, self._resumos, self._mensais, self._versoes):
+                dados.pop(user_id, None)
+
+    def observar(
+        self,
+        user_id: str,
+        ao_mudar_transacoes: Callable[[List[Mudanca]], None],
+        ao_mudar_resumo: Callable[[Optional[Dict[str, Any]]], None]
+    ) -> Optional[Callable[[], None]]:
+        observador = (ao_mudar_transacoes, ao_mudar_resumo)
+        with self._lock:
+            self._observadores.setdefault(user_id, []).append(observador)
+            # Como no on_snapshot, o primeiro aviso traz o estado atual
+            ao_mudar_transacoes(self.estado(user_id))
+            ao_mudar_resumo(self._resumo_publicado(user_id))
+
+        def cancelar() -> None:
+            with self._lock:
+                observadores = self._observadores.get(user_id, [])
+                if observador in observadores:
+                    observadores.remove(observador)
+
+        return cancelar
+
+    def estado(self, user_id: str) -> List[Mudanca]:
+        """Transações atuais do usuário como avisos de inserção (o primeiro aviso de observar)."""
+        with self._lock:
+            return [('adicionado', doc_id, t) for doc_id, t in self._documentos.get(user_id, {}).items()]
+
+    def _notificar(self, user_id: str, mudancas: List[Mudanca]) -> None:
+        # Chamado com o lock adquirido: os avisos chegam na ordem das gravações
+        for ao_mudar_transacoes, ao_mudar_resumo in self._observadores.get(user_id, ()):
+            if mudancas:
+                ao_mudar_transacoes(mudancas)
+            ao_mudar_resumo(self._resumo_publicado(user_id))
+
+    def _resumo_publicado(self, user_id: str) -> Optional[Dict[str, Any]]:
+        resumo = self._resumos.get(user_id)
+        if resumo is None:
+            return None
+        return {**self._com_saldo(resumo), 'versao': self._versoes.get(user_id, 0)}
+
+    def _incrementar_versao(self, user_id: str) -> None:
+        self._versoes[user_id] = self._versoes.get(user_id, 0) + 1
+
+    def _inserir(self, user_id: str, transacao: Dict[str, Any], doc_id: Optional[str] = None) -> str:
+        if doc_id is None:
+            doc_id = f'{next(self._sequencia):012d}'
+        self._documentos.setdefault(user_id, {})[doc_id] = transacao
+        insort(self._indices.setdefault(user_id, []), (data_da_transacao(transacao), doc_id))
+
+        resumo = self._resumos.setdefault(user_id, self._resumo_vazio())
+        self._acumular_resumo(resumo, transacao)
+        mensais = self._mensais.setdefault(user_id, {})
+        id_mensal = self._id_resumo_mensal(user_id, transacao)
+        mensais[id_mensal] = self._acumular_resumo_mensal(mensais.get(id_mensal), user_id, transacao)
+        return doc_id
+
+    def _remover(self, user_id: str, doc_id: str) -> None:
+        # Só o documento e o índice; os agregados ficam para _recalcular_agregados
+        transacao = self._documentos[user_id].pop(doc_id)
+        indice = self._indices[user_id]
+        del indice[bisect_left(indice, (data_da_transacao(transacao), doc_id))]
+
+    def _recalcular_agregados(self, user_id: str) -> Dict[str, Any]:
+        resumo = self._resumo_vazio()
+        mensais: Dict[str, Dict[str, Any]] = {}
+        for t in self._documentos.get(user_id, {}).values():
+            self._acumular_resumo(resumo, t)
+            id_mensal = self._id_resumo_mensal(user_id, t)
+            mensais[id_mensal] = self._acumular_resumo_mensal(mensais.get(id_mensal), user_id, t)
+        self._resumos[user_id] = resumo
+        self._mensais[user_id] = mensais
+        return resumo
+
+    def consultar(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            indice = self._indices.get(user_id, [])
+            documentos = self._documentos.get(user_id, {})
+            inicio = bisect_left(indice, (data_inicio, '')) if data_inicio else 0
+            fim = bisect_right(indice, (data_fim, self._ID_MAXIMO)) if data_fim else len(indice)
+            selecionados = [documentos[doc_id] for _, doc_id in indice[inicio:fim]]
+
+        for t in selecionados:
+            if tipo and t.get('tipo') != tipo:
+                continue
+            if categoria_chave and self._chave_categoria(t) != categoria_chave:
+                continue
+            yield t
+
+    def listar_pagina(
+        self,
+        user_id: str,
+        limite: int,
+        cursor: Optional[str] = None,
+        tipo: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        with self._lock:
+            indice = self._indices.get(user_id, [])
+            documentos = self._documentos.get(user_id, {})
+            posicao = bisect_right(indice, (data_fim, self._ID_MAXIMO)) if data_fim else len(indice)
+            if cursor:
+                data_cursor, id_cursor = self._decodificar_cursor(cursor)
+                # Cursores do Firestore trazem o fuso; o índice guarda datas ingênuas em UTC
+                posicao = min(posicao, bisect_left(indice, (converter_data(data_cursor), id_cursor)))
+            inicio = bisect_left(indice, (data_inicio, '')) if data_inicio else 0
+
+            # Da mais recente para a mais antiga; um item a mais indica próxima página
+            pagina: List[Tuple[datetime, str]] = []
+            for i in range(posicao - 1, inicio - 1, -1):
+                chave = indice[i]
+                documento = documentos[chave[1]]
+                if tipo and documento.get('tipo') != tipo:
+                    continue
+                if categoria_chave and self._chave_categoria(documento) != categoria_chave:
+                    continue
+                pagina.append(chave)
+                if len(pagina) > limite:
+                    break
+
+            proximo_cursor = None
+            if len(pagina) > limite:
+                pagina = pagina[:limite]
+                proximo_cursor = self._codificar_cursor(*pagina[-1])
+            return [documentos[doc_id] for _, doc_id in pagina], proximo_cursor
+
+    def obter_resumo(self, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._com_saldo(self._resumos.get(user_id) or self._resumo_vazio())
+
+    def obter_versao(self, user_id: str) -> int:
+        with self._lock:
+            return self._versoes.get(user_id, 0)
+
+    def reconciliar_resumos(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            usuarios = [user_id] if user_id else list(self._documentos)
+            resumos: Dict[str, Dict[str, Any]] = {}
+            for uid in usuarios:
+                resumo = self._recalcular_agregados(uid)
+                self._incrementar_versao(uid)
+                self._notificar(uid, [])
+                resumos[uid] = self._com_saldo(resumo)
+            return resumos
+
+    def obter_resumos_mensais(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                dict(r) for r in self._mensais.get(user_id, {}).values()
+                if (not categoria_chave or r['categoria_chave'] == categoria_chave)
+                and (not mes_inicio or r['mes'] >= mes_inicio)
+                and (not mes_fim or r['mes'] <= mes_fim)
+            ]
+
+    def migrar_campos(self, user_id: Optional[str] = None) -> int:
+        migrados = 0
+        with self._lock:
+            usuarios = [user_id] if user_id else list(self._documentos)
+            for uid in usuarios:
+                alterados: List[Mudanca] = []
+                for doc_id, t in self._documentos.get(uid, {}).items():
+                    campos = self._campos_migrados(t)
+                    if campos is not None:
+                        t.update(campos)
+                        alterados.append(('modificado', doc_id, t))
+                migrados += len(alterados)
+                if alterados:
+                    self._notificar(uid, alterados)
+        return migrados
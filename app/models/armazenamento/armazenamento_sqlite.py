@@ -0,0 +1,243 @@
+from datetime import datetime
+from threading import local
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import sqlite3
+
+from app.models.armazenamento.base import Armazenamento
+from app.models.dinheiro import Dinheiro
+from app.utils.datas import data_da_transacao, proximo_mes
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Backend SQLite para instalações em um único nó.
+
+    Usa WAL (leitores não bloqueiam o escritor) e uma conexão por thread.
+    Saldo, totais mensais por categoria e páginas de transações (inclusive as
+    recentes) são calculados pelo próprio SQLite com SUM/GROUP BY e ORDER BY ... LIMIT.
+    """
+
+    _ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS transacoes (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            categoria_chave TEXT NOT NULL,
+            valor_centavos INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            documento TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transacoes_usuario_data
+            ON transacoes (user_id, data);
+        CREATE INDEX IF NOT EXISTS idx_transacoes_usuario_tipo_categoria
+            ON transacoes (user_id, tipo, categoria_chave);
+        CREATE TABLE IF NOT EXISTS versoes (
+            user_id TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL
+        );
+    """
+
+    _INSERIR = """
+        INSERT INTO transacoes (user_id, tipo, categoria, categoria_chave, valor_centavos, data, documento)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _INCREMENTAR_VERSAO = """
+        INSERT INTO versoes (user_id, versao) VALUES (?, 1)
+        ON CONFLICT (user_id) DO UPDATE SET versao = versao + 1
+    """
+
+    def __init__(self, caminho: str) -> None:
+        self._caminho = caminho
+        self._local = local()
+        self._conexao().executescript(self._ESQUEMA)
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self._caminho, timeout=30.0)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            self._local.conexao = conexao
+        return conexao
+
+    def salvar(self, user_id: str, transacao: Dict[str, Any]) -> None:
+        with self._conexao() as conexao:
+            conexao.execute(self._INSERIR, self._linha(user_id, transacao))
+            conexao.execute(self._INCREMENTAR_VERSAO, (user_id,))
+
+    def salvar_em_lote(self, user_id: str, transacoes: Iterable[Dict[str, Any]]) -> int:
+        # Uma única transação SQL para todo o lote
+        with self._conexao() as conexao:
+            cursor = conexao.executemany(
+                self._INSERIR,
+                (self._linha(user_id, transacao) for transacao in transacoes)
+            )
+            if cursor.rowcount > 0:
+                conexao.execute(self._INCREMENTAR_VERSAO, (user_id,))
+        return max(cursor.rowcount, 0)
+
+    def consultar(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        condicoes, parametros = self._filtros(user_id, data_inicio, data_fim, categoria_chave, tipo)
+        cursor = self._conexao().execute(
+            f"SELECT data, documento FROM transacoes WHERE {condicoes} ORDER BY data, id",
+            parametros
+        )
+        for data, documento in cursor:
+            yield self._documento(data, documento)
+
+    def listar_pagina(
+        self,
+        user_id: str,
+        limite: int,
+        cursor: Optional[str] = None,
+        tipo: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        condicoes, parametros = self._filtros(user_id, data_inicio, data_fim, categoria_chave, tipo)
+        if cursor:
+            data_ts, doc_id = self._decodificar_cursor(cursor)
+            try:
+                parametros.extend([self._texto_data(data_ts), int(doc_id)])
+            except ValueError:
+                raise ValueError("Cursor de paginação inválido")
+            condicoes += " AND (data, id) < (?, ?)"
+
+        # Uma linha a mais indica se existe próxima página
+        linhas = self._conexao().execute(
+            f"SELECT id, data, documento FROM transacoes WHERE {condicoes} "
+            f"ORDER BY data DESC, id DESC LIMIT ?",
+            parametros + [limite + 1]
+        ).fetchall()
+
+        pagina = linhas[:limite]
+        proximo_cursor = None
+        if len(linhas) > limite:
+            doc_id, data, _ = pagina[-1]
+            proximo_cursor = self._codificar_cursor(datetime.fromisoformat(data), str(doc_id))
+        return [self._documento(data, documento) for _, data, documento in pagina], proximo_cursor
+
+    def obter_resumo(self, user_id: str) -> Dict[str, Any]:
+        resumo = self._resumo_vazio()
+        linhas = self._conexao().execute(
+            "SELECT tipo, SUM(valor_centavos), COUNT(*) FROM transacoes "
+            "WHERE user_id = ? GROUP BY tipo",
+            (user_id,)
+        )
+        for tipo, soma, quantidade in linhas:
+            if tipo == 'receita':
+                resumo['total_receitas_centavos'] = soma
+                resumo['quantidade_receitas'] = quantidade
+            elif tipo == 'despesa':
+                resumo['total_despesas_centavos'] = soma
+                resumo['quantidade_despesas'] = quantidade
+        return self._com_saldo(resumo)
+
+    def obter_versao(self, user_id: str) -> int:
+        linha = self._conexao().execute("SELECT versao FROM versoes WHERE user_id = ?", (user_id,)).fetchone()
+        return linha[0] if linha else 0
+
+    def reconciliar_resumos(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        # Os agregados são calculados na leitura: não há nada materializado para reconstruir
+        if user_id:
+            return {user_id: self.obter_resumo(user_id)}
+        usuarios = self._conexao().execute("SELECT DISTINCT user_id FROM transacoes")
+        return {uid: self.obter_resumo(uid) for (uid,) in usuarios.fetchall()}
+
+    def obter_resumos_mensais(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        condicoes, parametros = self._filtros(user_id, categoria_chave=categoria_chave)
+        if mes_inicio:
+            condicoes += " AND data >= ?"
+            parametros.append(mes_inicio)
+        if mes_fim:
+            condicoes += " AND data < ?"
+            parametros.append(self._texto_data(proximo_mes(datetime.strptime(mes_fim, '%Y-%m'))))
+
+        linhas = self._conexao().execute(
+            "SELECT substr(data, 1, 7) AS mes, tipo, categoria_chave, MIN(categoria), "
+            "SUM(valor_centavos), COUNT(*), MIN(valor_centavos), MAX(valor_centavos) "
+            f"FROM transacoes WHERE {condicoes} GROUP BY mes, tipo, categoria_chave",
+            parametros
+        )
+        return [
+            {
+                'user_id': user_id,
+                'mes': mes,
+                'tipo': tipo,
+                'categoria': categoria,
+                'categoria_chave': chave,
+                'soma_centavos': soma,
+                'quantidade': quantidade,
+                'minimo_centavos': minimo,
+                'maximo_centavos': maximo
+            }
+            for mes, tipo, chave, categoria, soma, quantidade, minimo, maximo in linhas
+        ]
+
+    def migrar_campos(self, user_id: Optional[str] = None) -> int:
+        # As colunas de consulta são preenchidas na gravação
+        return 0
+
+    def _filtros(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> Tuple[str, List[Any]]:
+        condicoes = ["user_id = ?"]
+        parametros: List[Any] = [user_id]
+        if tipo:
+            condicoes.append("tipo = ?")
+            parametros.append(tipo)
+        if categoria_chave:
+            condicoes.append("categoria_chave = ?")
+            parametros.append(categoria_chave)
+        if data_inicio:
+            condicoes.append("data >= ?")
+            parametros.append(self._texto_data(data_inicio))
+        if data_fim:
+            condicoes.append("data <= ?")
+            parametros.append(self._texto_data(data_fim))
+        return " AND ".join(condicoes), parametros
+
+    def _linha(self, user_id: str, transacao: Dict[str, Any]) -> Tuple[Any, ...]:
+        # data_ts é reconstruído a partir da coluna data na leitura
+        documento = {chave: valor for chave, valor in transacao.items() if chave != 'data_ts'}
+        return (
+            user_id,
+            transacao['tipo'],
+            transacao.get('categoria', 'Sem Categoria'),
+            self._chave_categoria(transacao),
+            Dinheiro.de_documento(transacao).centavos,
+            self._texto_data(data_da_transacao(transacao)),
+            json.dumps(documento, default=str)
+        )
+
+    @staticmethod
+    def _documento(data: str, documento: str) -> Dict[str, Any]:
+        transacao = json.loads(documento)
+        transacao['data_ts'] = datetime.fromisoformat(data)
+        return transacao
+
+    @staticmethod
+    def _texto_data(data: datetime) -> str:
+        # Largura fixa: a ordem do texto é a ordem cronológica
+        return data.strftime('%Y-%m-%dT%H:%M:%S.%f')
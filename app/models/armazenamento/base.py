@@ -0,0 +1,240 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import base64
+import json
+
+from app.models.dinheiro import Dinheiro
+from app.models.transacao import normalizar_categoria
+from app.utils.datas import chave_mes, data_da_transacao
+
+
+# Evento de mudança: ('adicionado' | 'modificado' | 'removido', id do documento, documento ou None)
+Mudanca = Tuple[str, str, Optional[Dict[str, Any]]]
+
+class Armazenamento(ABC):
+    """Interface dos backends de armazenamento usados por BancoDeDados.
+
+    As transações recebidas já estão preparadas (user_id, valor_centavos,
+    data_ts e categoria_chave preenchidos). Cada backend mantém o resumo
+    do usuário e os resumos mensais coerentes com as transações gravadas.
+    """
+
+    @abstractmethod
+    def salvar(self, user_id: str, transacao: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def salvar_em_lote(self, user_id: str, transacoes: Iterable[Dict[str, Any]]) -> int:
+        pass
+
+    @abstractmethod
+    def consultar(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def listar_pagina(
+        self,
+        user_id: str,
+        limite: int,
+        cursor: Optional[str] = None,
+        tipo: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Página da mais recente para a mais antiga, ordenada por (data, id) decrescentes."""
+        pass
+
+    @abstractmethod
+    def obter_resumo(self, user_id: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def obter_versao(self, user_id: str) -> int:
+        """Contador incrementado a cada gravação do usuário (0 se ainda não há dados)."""
+        pass
+
+    @abstractmethod
+    def reconciliar_resumos(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def obter_resumos_mensais(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def migrar_campos(self, user_id: Optional[str] = None) -> int:
+        pass
+
+    def recentes(
+        self,
+        user_id: str,
+        limite: int,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """As transações mais recentes do filtro, da mais nova para a mais antiga.
+
+        É a primeira página de listar_pagina: uma consulta indexada que lê
+        apenas `limite` documentos, e cujo cursor continua na mesma ordem.
+        """
+        pagina, _ = self.listar_pagina(
+            user_id, limite, data_inicio=data_inicio, data_fim=data_fim, categoria_chave=categoria_chave
+        )
+        return [(data_da_transacao(t), t) for t in pagina]
+
+    def observar(
+        self,
+        user_id: str,
+        ao_mudar_transacoes: Callable[[List[Mudanca]], None],
+        ao_mudar_resumo: Callable[[Optional[Dict[str, Any]]], None]
+    ) -> Optional[Callable[[], None]]:
+        """Assina as mudanças das transações e do resumo (com 'versao') do usuário.
+
+        O primeiro aviso traz o estado atual completo; os seguintes, apenas as
+        diferenças. Devolve a função que cancela a assinatura, ou None quando
+        o backend não oferece notificações.
+        """
+        return None
+
+    # Leituras assíncronas (modo ASGI). Por padrão a versão síncrona roda em
+    # uma thread, o que já permite executar leituras independentes em paralelo
+
+    async def consultar_async(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            lambda: list(self.consultar(user_id, data_inicio, data_fim, categoria_chave, tipo))
+        )
+
+    async def obter_resumos_mensais_async(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.obter_resumos_mensais, user_id, mes_inicio, mes_fim, categoria_chave)
+
+    async def obter_versao_async(self, user_id: str) -> int:
+        return await asyncio.to_thread(self.obter_versao, user_id)
+
+    async def recentes_async(
+        self,
+        user_id: str,
+        limite: int,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria_chave: Optional[str] = None
+    ) -> List[Tuple[datetime, Dict[str, Any]]]:
+        return await asyncio.to_thread(self.recentes, user_id, limite, data_inicio, data_fim, categoria_chave)
+
+    @staticmethod
+    def _codificar_cursor(data_ts: datetime, doc_id: str) -> str:
+        conteudo = json.dumps({'d': data_ts.isoformat(), 'id': doc_id}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(conteudo.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decodificar_cursor(cursor: str) -> Tuple[datetime, str]:
+        try:
+            preenchimento = '=' * (-len(cursor) % 4)
+            conteudo = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+            return datetime.fromisoformat(conteudo['d']), str(conteudo['id'])
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Cursor de paginação inválido")
+
+    @staticmethod
+    def _chave_categoria(transacao: Dict[str, Any]) -> str:
+        return transacao.get('categoria_chave') or normalizar_categoria(transacao.get('categoria', ''))
+
+    @staticmethod
+    def _id_resumo_mensal(user_id: str, transacao: Dict[str, Any]) -> str:
+        categoria_chave = Armazenamento._chave_categoria(transacao)
+        mes = chave_mes(data_da_transacao(transacao))
+        # '/' não é permitido em IDs de documentos do Firestore
+        return f"{user_id}_{mes}_{transacao['tipo']}_{categoria_chave}".replace('/', '_')
+
+    @staticmethod
+    def _acumular_resumo_mensal(
+        atual: Optional[Dict[str, Any]],
+        user_id: str,
+        transacao: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        centavos = Dinheiro.de_documento(transacao).centavos
+        if atual is None:
+            return {
+                'user_id': user_id,
+                'mes': chave_mes(data_da_transacao(transacao)),
+                'tipo': transacao['tipo'],
+                'categoria': transacao.get('categoria', 'Sem Categoria'),
+                'categoria_chave': Armazenamento._chave_categoria(transacao),
+                'soma_centavos': centavos,
+                'quantidade': 1,
+                'minimo_centavos': centavos,
+                'maximo_centavos': centavos
+            }
+        return {
+            **atual,
+            'soma_centavos': atual['soma_centavos'] + centavos,
+            'quantidade': atual['quantidade'] + 1,
+            'minimo_centavos': min(atual['minimo_centavos'], centavos),
+            'maximo_centavos': max(atual['maximo_centavos'], centavos)
+        }
+
+    @staticmethod
+    def _acumular_resumo(resumo: Dict[str, Any], transacao: Dict[str, Any]) -> None:
+        centavos = Dinheiro.de_documento(transacao).centavos
+        if transacao.get('tipo') == 'receita':
+            resumo['total_receitas_centavos'] += centavos
+            resumo['quantidade_receitas'] += 1
+        elif transacao.get('tipo') == 'despesa':
+            resumo['total_despesas_centavos'] += centavos
+            resumo['quantidade_despesas'] += 1
+
+    @staticmethod
+    def _resumo_vazio() -> Dict[str, Any]:
+        return {
+            'total_receitas_centavos': 0,
+            'total_despesas_centavos': 0,
+            'quantidade_receitas': 0,
+            'quantidade_despesas': 0
+        }
+
+    @staticmethod
+    def _com_saldo(resumo: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'saldo_centavos': resumo['total_receitas_centavos'] - resumo['total_despesas_centavos'],
+            **resumo
+        }
+
+    @staticmethod
+    def _campos_migrados(transacao: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Campos de consulta ausentes em documentos antigos (None se já migrado)."""
+        if 'data_ts' in transacao and 'categoria_chave' in transacao and 'valor_centavos' in transacao:
+            return None
+        return {
+            'data_ts': data_da_transacao(transacao),
+            'categoria_chave': normalizar_categoria(transacao.get('categoria', '')),
+            'valor_centavos': Dinheiro.de_documento(transacao).centavos
+        }
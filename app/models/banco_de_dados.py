@@ -1,15 +1,27 @@
-from google.cloud.firestore import FieldFilter
-import firebase_admin
-from firebase_admin import credentials, firestore
 from threading import Lock
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from decimal import Decimal
+from datetime import datetime
 import os
 
+from app.models.armazenamento import Armazenamento, criar_armazenamento
+from app.models.dinheiro import Dinheiro
+from app.models.ouvinte_transacoes import OuvinteTransacoes
+from app.models.transacao import normalizar_categoria
+from app.models.transacao_frame import TransacaoFrame
+from app.utils.cache import CacheLRU
+from app.utils.datas import data_da_transacao
+from app.utils.metricas import registrar_leituras, span
+
 class BancoDeDados:
     _instancia: Optional['BancoDeDados'] = None
     _lock: Lock = Lock()
 
+    # Limites do cache de transações por usuário (em processo)
+    CACHE_MAX_USUARIOS: int = 128
+    CACHE_TTL_SEGUNDOS: float = 300.0
+    CACHE_MAX_TRANSACOES: int = 200_000
+
     def __new__(cls) -> 'BancoDeDados':
         if cls._instancia is None:
             with cls._lock:
@@ -19,53 +31,383 @@ class BancoDeDados:
         return cls._instancia
 
     def _inicializar(self) -> None:
-        if not firebase_admin._apps:
-            cred_path = os.path.join(os.getcwd(), 'serviceAccountKey.json')
-            if os.path.exists(cred_path):
-                cred = credentials.Certificate(cred_path)
-                firebase_admin.initialize_app(cred)
-            else:
-                pass
-        self.db = firestore.client()
+        # 'firestore' (padrão), 'sqlite' ou 'memoria'
+        self._armazenamento = criar_armazenamento(os.environ.get('BACKEND_ARMAZENAMENTO', 'firestore'))
+        # O peso de cada entrada é a quantidade de transações do usuário,
+        # limitando a memória total ocupada pelo cache
+        self._cache = CacheLRU(
+            max_itens=self.CACHE_MAX_USUARIOS,
+            ttl_segundos=self.CACHE_TTL_SEGUNDOS,
+            max_peso=self.CACHE_MAX_TRANSACOES,
+            peso=len
+        )
+        # Frames colunares derivados do histórico em cache
+        self._frames = CacheLRU(
+            max_itens=self.CACHE_MAX_USUARIOS,
+            ttl_segundos=self.CACHE_TTL_SEGUNDOS,
+            max_peso=self.CACHE_MAX_TRANSACOES,
+            peso=len
+        )
+        # Versão dos dados com que o histórico em cache foi validado. Outro
+        # processo pode ter gravado: ao ler uma versão diferente, _cache e
+        # _frames do usuário são descartados (ver obter_versao). Limitada por
+        # LRU e sem TTL; uma versão despejada só faz o histórico ser relido
+        self._versao_historico = CacheLRU(max_itens=self.CACHE_MAX_USUARIOS * 4, ttl_segundos=None)
+        self._lock_versoes = Lock()
+        self._ouvinte = self._criar_ouvinte()
+
+    def _criar_ouvinte(self) -> Optional[OuvinteTransacoes]:
+        # Opcional (OUVINTE_TEMPO_REAL=true): réplica em memória dos usuários ativos,
+        # atualizada pelas notificações do backend (on_snapshot no Firestore)
+        if os.environ.get('OUVINTE_TEMPO_REAL', 'false').lower() not in ('1', 'true', 'sim'):
+            return None
+        return OuvinteTransacoes(self._armazenamento, ao_atualizar=self.invalidar_cache)
+
+    @property
+    def armazenamento(self) -> Armazenamento:
+        return self._armazenamento
+
+    @property
+    def fonte_eventos(self) -> Union[Armazenamento, OuvinteTransacoes]:
+        """Quem assina as mudanças para o canal SSE: o ouvinte, quando ativo, para não duplicar a assinatura do backend."""
+        return self._ouvinte if self._ouvinte is not None else self._armazenamento
+
+    def usar_armazenamento(self, armazenamento: Armazenamento) -> None:
+        """Troca o backend em uso (ex.: benchmarks); o cache é descartado."""
+        if self._ouvinte is not None:
+            self._ouvinte.encerrar()
+        self._armazenamento = armazenamento
+        self._ouvinte = self._criar_ouvinte()
+        self.invalidar_cache()
+
+    def _origem(self, user_id: str) -> Armazenamento:
+        """Réplica em memória do usuário, quando acompanhado e em dia; senão o backend."""
+        replica = self._ouvinte.origem(user_id) if self._ouvinte is not None else None
+        return replica if replica is not None else self._armazenamento
+
+    def _registrar_leituras(self, origem: Armazenamento, quantidade: int) -> None:
+        # Leituras da réplica local não custam documentos no backend
+        if origem is self._armazenamento:
+            registrar_leituras(quantidade)
 
     def salvar_transacao(self, user_id: str, transacao: Dict[str, Any]) -> None:
-        transacao_fs = transacao.copy()
-        
-        # Converter Decimal para float
-        if 'valor' in transacao_fs and isinstance(transacao_fs['valor'], Decimal):
-             transacao_fs['valor'] = float(transacao_fs['valor'])
-        
-        # Adicionar user_id para isolamento na coleção raiz
-        transacao_fs['user_id'] = user_id
-        
-        # Salvar na coleção raiz 'transacoes'
-        self.db.collection('transacoes').add(transacao_fs)
+        transacao_fs = self._preparar_documento(user_id, transacao)
+        if self._ouvinte is not None:
+            self._ouvinte.aguardar_gravacao(user_id)
+        self._armazenamento.salvar(user_id, transacao_fs)
+
+        # Write-through: manter a entrada em cache coerente com o armazenamento
+        def _anexar(transacoes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            transacoes.append(transacao_fs)
+            return transacoes
+
+        self._cache.atualizar(user_id, _anexar)
+        self._frames.invalidar(user_id)
+        # A gravação incrementou a versão remota em um; outra gravação
+        # concorrente gera uma versão diferente e invalida o cache na próxima leitura
+        with self._lock_versoes:
+            self._versao_historico.atualizar(user_id, lambda versao: versao + 1)
+
+    def salvar_transacoes_em_lote(self, user_id: str, transacoes: Iterable[Dict[str, Any]]) -> int:
+        """Grava muitas transações de uma vez.
+
+        As transações são consumidas sob demanda; os agregados (saldo e
+        resumos mensais) são gravados junto com cada lote de transações.
+        """
+        if self._ouvinte is not None:
+            self._ouvinte.aguardar_gravacao(user_id)
+        gravadas = self._armazenamento.salvar_em_lote(
+            user_id,
+            (self._preparar_documento(user_id, transacao) for transacao in transacoes)
+        )
+        if gravadas:
+            self.invalidar_cache(user_id)
+        return gravadas
 
     def obter_todas_transacoes(self, user_id: str) -> List[Dict[str, Any]]:
+        transacoes = self._cache.obter(user_id)
+        if transacoes is not None:
+            return list(transacoes)
+
+        origem = self._origem(user_id)
+        versao = self._versao_historico.obter(user_id)
         try:
-            # Buscar na coleção raiz filtrando por user_id usando FieldFilter
-            docs = self.db.collection('transacoes').where(filter=FieldFilter('user_id', '==', user_id)).stream()
-            transacoes = []
-            for doc in docs:
-                t = doc.to_dict()
-                transacoes.append(t)
-            return transacoes
+            with span('armazenamento'):
+                transacoes = list(origem.consultar(user_id))
         except Exception as e:
             print(f"Erro ao obter transações: {e}")
             return []
+        self._registrar_leituras(origem, len(transacoes))
+
+        # Uma versão nova registrada durante a leitura pode não estar nesta cópia
+        with self._lock_versoes:
+            if self._versao_historico.obter(user_id) == versao:
+                self._cache.definir(user_id, transacoes)
+        return list(transacoes)
+
+    def obter_frame(self, user_id: str) -> TransacaoFrame:
+        """Histórico completo do usuário em formato colunar (construído uma vez por versão em cache)."""
+        frame = self._frames.obter(user_id)
+        if frame is None:
+            transacoes = self.obter_todas_transacoes(user_id)
+            with span('frame'):
+                frame = TransacaoFrame.de_transacoes(transacoes)
+            self._frames.definir(user_id, frame)
+        return frame
+
+    def consultar_transacoes(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        try:
+            em_cache = self.historico_em_cache(user_id)
+            with span('armazenamento'):
+                transacoes = list(self.iterar_transacoes(user_id, data_inicio, data_fim, categoria, tipo))
+            if not em_cache:
+                registrar_leituras(len(transacoes))
+            return transacoes
+        except Exception as e:
+            print(f"Erro ao consultar transações: {e}")
+            return []
+
+    async def consultar_transacoes_async(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Versão assíncrona de consultar_transacoes, para leituras em paralelo (asyncio.gather)."""
+        if self.historico_em_cache(user_id):
+            return self.consultar_transacoes(user_id, data_inicio, data_fim, categoria, tipo)
+        try:
+            with span('armazenamento'):
+                transacoes = await self._armazenamento.consultar_async(
+                    user_id, data_inicio, data_fim, normalizar_categoria(categoria) if categoria else None, tipo
+                )
+        except Exception as e:
+            print(f"Erro ao consultar transações: {e}")
+            return []
+        registrar_leituras(len(transacoes))
+        return transacoes
+
+    def iterar_transacoes(
+        self,
+        user_id: str,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Percorre as transações filtradas uma a uma, sem materializar a lista."""
+        categoria_chave = normalizar_categoria(categoria) if categoria else None
+
+        # Com o histórico completo em cache, filtrar em memória é mais barato
+        transacoes = self._cache.obter(user_id)
+        if transacoes is not None:
+            for t in transacoes:
+                if tipo and t.get('tipo') != tipo:
+                    continue
+                if categoria_chave and (
+                    t.get('categoria_chave') or normalizar_categoria(t.get('categoria', ''))
+                ) != categoria_chave:
+                    continue
+                if data_inicio or data_fim:
+                    data_obj = data_da_transacao(t)
+                    if data_inicio and data_obj < data_inicio:
+                        continue
+                    if data_fim and data_obj > data_fim:
+                        continue
+                yield t
+            return
+
+        yield from self._origem(user_id).consultar(user_id, data_inicio, data_fim, categoria_chave, tipo)
+
+    def listar_pagina(
+        self,
+        user_id: str,
+        limite: int,
+        cursor: Optional[str] = None,
+        tipo: Optional[str] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Uma página de transações, da mais recente para a mais antiga.
+
+        A ordenação (data, id do documento) é estável mesmo com datas
+        repetidas; o cursor devolvido é opaco para o cliente. Com os mesmos
+        filtros, a primeira página é a lista de recentes do dashboard.
+        """
+        origem = self._origem(user_id)
+        with span('armazenamento'):
+            pagina, proximo_cursor = origem.listar_pagina(
+                user_id, limite, cursor, tipo,
+                data_inicio, data_fim, normalizar_categoria(categoria) if categoria else None
+            )
+        self._registrar_leituras(origem, len(pagina) + (proximo_cursor is not None))
+        return pagina, proximo_cursor
+
+    def obter_recentes(
+        self,
+        user_id: str,
+        limite: int,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria: Optional[str] = None
+    ) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """As transações mais recentes do filtro, sem ordenar o histórico inteiro:
+        seleção parcial no frame em cache ou consulta indexada com limite."""
+        if self.historico_em_cache(user_id):
+            return self.obter_frame(user_id).filtrar_por(data_inicio, data_fim, categoria).top_k(limite)
+        with span('armazenamento'):
+            recentes = self._armazenamento.recentes(
+                user_id, limite, data_inicio, data_fim, normalizar_categoria(categoria) if categoria else None
+            )
+        registrar_leituras(len(recentes))
+        return recentes
+
+    async def obter_recentes_async(
+        self,
+        user_id: str,
+        limite: int,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria: Optional[str] = None
+    ) -> List[Tuple[datetime, Dict[str, Any]]]:
+        if self.historico_em_cache(user_id):
+            return self.obter_recentes(user_id, limite, data_inicio, data_fim, categoria)
+        with span('armazenamento'):
+            recentes = await self._armazenamento.recentes_async(
+                user_id, limite, data_inicio, data_fim, normalizar_categoria(categoria) if categoria else None
+            )
+        registrar_leituras(len(recentes))
+        return recentes
 
     def obter_transacoes_por_tipo(self, user_id: str, tipo: str) -> List[Dict[str, Any]]:
         todas = self.obter_todas_transacoes(user_id)
         return [t for t in todas if t.get('tipo') == tipo]
 
     def calcular_saldo(self, user_id: str) -> Decimal:
-        receitas = self.obter_transacoes_por_tipo(user_id, 'receita')
-        despesas = self.obter_transacoes_por_tipo(user_id, 'despesa')
+        resumo = self.obter_resumo(user_id)
+        return Dinheiro(resumo['saldo_centavos']).para_decimal()
+
+    def obter_resumo(self, user_id: str) -> Dict[str, Any]:
+        """Saldo e totais materializados do usuário."""
+        origem = self._origem(user_id)
+        with span('armazenamento'):
+            resumo = origem.obter_resumo(user_id)
+        self._registrar_leituras(origem, 1)
+        return resumo
+
+    def obter_versao(self, user_id: str) -> int:
+        """Versão dos dados do usuário; muda a cada gravação (base dos ETags da API).
+
+        Também valida o histórico em cache: lido com outra versão, ele é
+        descartado antes de servir a montagem que usará esta versão.
+        """
+        versao = self._ouvinte.versao(user_id) if self._ouvinte is not None else None
+        if versao is None:
+            with span('armazenamento'):
+                versao = self._armazenamento.obter_versao(user_id)
+            registrar_leituras(1)
+        self._validar_historico(user_id, versao)
+        return versao
+
+    async def obter_versao_async(self, user_id: str) -> int:
+        versao = self._ouvinte.versao(user_id) if self._ouvinte is not None else None
+        if versao is None:
+            with span('armazenamento'):
+                versao = await self._armazenamento.obter_versao_async(user_id)
+            registrar_leituras(1)
+        self._validar_historico(user_id, versao)
+        return versao
+
+    def _validar_historico(self, user_id: str, versao: int) -> None:
+        with self._lock_versoes:
+            if self._versao_historico.obter(user_id) != versao:
+                self._cache.invalidar(user_id)
+                self._frames.invalidar(user_id)
+                self._versao_historico.definir(user_id, versao)
+
+    def reconciliar_resumos(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Reconstrói os agregados a partir das transações gravadas."""
+        return self._armazenamento.reconciliar_resumos(user_id)
+
+    def obter_resumos_mensais(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Lê os resumos mensais (soma, quantidade, mínimo e máximo) de um intervalo de meses."""
+        origem = self._origem(user_id)
+        with span('armazenamento'):
+            resumos = origem.obter_resumos_mensais(
+                user_id, mes_inicio, mes_fim, normalizar_categoria(categoria) if categoria else None
+            )
+        self._registrar_leituras(origem, len(resumos))
+        return resumos
+
+    async def obter_resumos_mensais_async(
+        self,
+        user_id: str,
+        mes_inicio: Optional[str] = None,
+        mes_fim: Optional[str] = None,
+        categoria: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if self._origem(user_id) is not self._armazenamento:
+            return self.obter_resumos_mensais(user_id, mes_inicio, mes_fim, categoria)
+        with span('armazenamento'):
+            resumos = await self._armazenamento.obter_resumos_mensais_async(
+                user_id, mes_inicio, mes_fim, normalizar_categoria(categoria) if categoria else None
+            )
+        registrar_leituras(len(resumos))
+        return resumos
+
+    def historico_em_cache(self, user_id: str) -> bool:
+        return user_id in self._cache or self._origem(user_id) is not self._armazenamento
+
+    @staticmethod
+    def _preparar_documento(user_id: str, transacao: Dict[str, Any]) -> Dict[str, Any]:
+        transacao_fs = transacao.copy()
+
+        # Centavos inteiros são a fonte de verdade do valor
+        valor = Dinheiro.de_documento(transacao_fs)
+        transacao_fs['valor_centavos'] = valor.centavos
+        transacao_fs['valor'] = float(valor)
+
+        # Adicionar user_id para isolamento na coleção raiz
+        transacao_fs['user_id'] = user_id
+        return transacao_fs
+
+    def migrar_campos_consulta(self, user_id: Optional[str] = None) -> int:
+        """Preenche data_ts, categoria_chave e valor_centavos em documentos gravados antes desses campos."""
+        migrados = self._armazenamento.migrar_campos(user_id)
+        self.invalidar_cache(user_id)
+        return migrados
+
+    def invalidar_cache(self, user_id: Optional[str] = None) -> None:
+        if user_id is None:
+            self._cache.limpar()
+            self._frames.limpar()
+            self._versao_historico.limpar()
+        else:
+            self._cache.invalidar(user_id)
+            self._frames.invalidar(user_id)
+            self._versao_historico.invalidar(user_id)
 
-        total_receitas = sum(Decimal(str(r['valor'])) for r in receitas)
-        total_despesas = sum(Decimal(str(d['valor'])) for d in despesas)
+    def estatisticas_cache(self) -> Dict[str, Any]:
+        return self._cache.estatisticas()
 
-        return total_receitas - total_despesas
+    def estatisticas_ouvinte(self) -> Optional[Dict[str, Any]]:
+        return self._ouvinte.estatisticas() if self._ouvinte is not None else None
 
     def limpar_dados(self, user_id: str) -> None:
-        pass
+        self.invalidar_cache(user_id)
@@ -0,0 +1,60 @@
+from threading import Lock
+import time
+from typing import Any, Dict, Optional
+
+from app.models.user import User
+from app.utils.cache import CacheLRU
+
+
+class CacheIdentidade:
+    """Identidades de usuários já autenticados, evitando auth.get_user a cada requisição."""
+
+    _instancia: Optional['CacheIdentidade'] = None
+    _lock: Lock = Lock()
+
+    MAX_USUARIOS: int = 1024
+    TTL_SEGUNDOS: float = 300.0
+
+    # Chave da identidade no cookie de sessão assinado
+    CHAVE_SESSAO = 'identidade'
+
+    def __new__(cls) -> 'CacheIdentidade':
+        if cls._instancia is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = super().__new__(cls)
+                    cls._instancia._inicializar()
+        return cls._instancia
+
+    def _inicializar(self) -> None:
+        self._cache = CacheLRU(max_itens=self.MAX_USUARIOS, ttl_segundos=self.TTL_SEGUNDOS)
+        self.acertos_sessao = 0
+
+    def obter(self, uid: str, sessao: Optional[Dict[str, Any]] = None) -> Optional[User]:
+        if sessao is not None:
+            identidade = sessao.get(self.CHAVE_SESSAO)
+            # Relógio de parede: o cookie passa por processos e reinícios; depois
+            # do TTL a identidade volta a ser confirmada no LRU ou no auth.get_user
+            if (identidade and identidade.get('uid') == uid
+                    and time.time() - identidade.get('verificada_em', 0.0) < self.TTL_SEGUNDOS):
+                self.acertos_sessao += 1
+                return User(uid=uid, email=identidade.get('email'), nome=identidade.get('nome'))
+        return self._cache.obter(uid)
+
+    def armazenar(self, user: User, sessao: Optional[Dict[str, Any]] = None) -> None:
+        self._cache.definir(user.id, user)
+        if sessao is not None:
+            sessao[self.CHAVE_SESSAO] = {
+                'uid': user.id,
+                'email': user.email,
+                'nome': user.nome,
+                'verificada_em': time.time()
+            }
+
+    def invalidar(self, uid: str, sessao: Optional[Dict[str, Any]] = None) -> None:
+        self._cache.invalidar(uid)
+        if sessao is not None:
+            sessao.pop(self.CHAVE_SESSAO, None)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {**self._cache.estatisticas(), 'acertos_sessao': self.acertos_sessao}
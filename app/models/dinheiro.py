@@ -0,0 +1,78 @@
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from typing import Any, Dict, Union
+
+
+class Dinheiro:
+    """Valor monetário em centavos inteiros: somas exatas e sem float."""
+
+    __slots__ = ('centavos',)
+
+    def __init__(self, centavos: int = 0) -> None:
+        self.centavos = int(centavos)
+
+    @classmethod
+    def de_reais(cls, valor: Union['Dinheiro', Decimal, float, int, str]) -> 'Dinheiro':
+        if isinstance(valor, Dinheiro):
+            return valor
+        try:
+            reais = valor if isinstance(valor, Decimal) else Decimal(str(valor))
+            if not reais.is_finite():
+                # NaN passaria pelo quantize sem sinalizar
+                raise InvalidOperation
+            centavos = (reais * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValueError(f"Valor monetário inválido: '{valor}'")
+        return cls(int(centavos))
+
+    @classmethod
+    def de_documento(cls, documento: Dict[str, Any]) -> 'Dinheiro':
+        # Documentos antigos só possuem 'valor' em float
+        centavos = documento.get('valor_centavos')
+        if centavos is not None:
+            return cls(centavos)
+        return cls.de_reais(documento.get('valor', 0))
+
+    def para_decimal(self) -> Decimal:
+        return Decimal(self.centavos) / 100
+
+    def __float__(self) -> float:
+        return self.centavos / 100
+
+    def __format__(self, especificacao: str) -> str:
+        return format(self.para_decimal(), especificacao)
+
+    def __str__(self) -> str:
+        return f"{self.para_decimal():.2f}"
+
+    def __repr__(self) -> str:
+        return f"Dinheiro({self})"
+
+    def __add__(self, outro: 'Dinheiro') -> 'Dinheiro':
+        return Dinheiro(self.centavos + outro.centavos)
+
+    def __sub__(self, outro: 'Dinheiro') -> 'Dinheiro':
+        return Dinheiro(self.centavos - outro.centavos)
+
+    def __neg__(self) -> 'Dinheiro':
+        return Dinheiro(-self.centavos)
+
+    def __eq__(self, outro: object) -> bool:
+        return isinstance(outro, Dinheiro) and self.centavos == outro.centavos
+
+    def __lt__(self, outro: 'Dinheiro') -> bool:
+        return self.centavos < outro.centavos
+
+    def __le__(self, outro: 'Dinheiro') -> bool:
+        return self.centavos <= outro.centavos
+
+    def __gt__(self, outro: 'Dinheiro') -> bool:
+        return self.centavos > outro.centavos
+
+    def __ge__(self, outro: 'Dinheiro') -> bool:
+        return self.centavos >= outro.centavos
+
+    def __hash__(self) -> int:
+        return hash(self.centavos)
+
+    def __bool__(self) -> bool:
+        return self.centavos != 0
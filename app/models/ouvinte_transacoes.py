@@ -0,0 +1,296 @@
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import time
+
+from app.models.armazenamento import Armazenamento, ArmazenamentoMemoria
+from app.models.armazenamento.base import Mudanca
+
+
+# Par de callbacks de Armazenamento.observar (transações, resumo)
+Observador = Tuple[Callable[[List[Mudanca]], None], Callable[[Optional[Dict[str, Any]]], None]]
+
+
+class _Acompanhamento:
+    """Estado de um usuário acompanhado: assinatura, último resumo recebido, último acesso e observadores."""
+
+    __slots__ = (
+        'cancelar', 'resumo', 'resumo_recebido', 'transacoes_recebidas', 'ultimo_acesso', 'versao_minima',
+        'observadores'
+    )
+
+    def __init__(self, agora: float) -> None:
+        self.cancelar: Optional[Callable[[], None]] = None
+        self.observadores: List[Observador] = []
+        self.resumo: Optional[Dict[str, Any]] = None
+        self.resumo_recebido = False
+        self.transacoes_recebidas = False
+        self.ultimo_acesso = agora
+        self.versao_minima = 0
+
+    @property
+    def versao(self) -> int:
+        return (self.resumo or {}).get('versao', 0)
+
+
+class OuvinteTransacoes:
+    """Mantém em memória o histórico dos usuários ativos, atualizado pelos avisos do backend.
+
+    Ao ser lido, o usuário passa a ser acompanhado (Armazenamento.observar)
+    e as mudanças recebidas são aplicadas em uma réplica ArmazenamentoMemoria,
+    com índices e agregados próprios. A réplica só responde pelo usuário
+    quando está em dia com o resumo remoto (mesmas quantidades e a versão
+    esperada); caso contrário a leitura vai ao backend. Usuários sem acesso
+    há `tempo_ocioso` segundos deixam de ser acompanhados. Usuários sem
+    resumo remoto (versão 0) não são anexados: a réplica nunca estaria em
+    dia, e o estado inicial da assinatura leria o histórico à toa.
+
+    Outros consumidores das mudanças (o canal SSE) usam `observar`, que
+    repassa os avisos desta mesma assinatura: cada usuário tem uma única
+    assinatura do backend no processo.
+    """
+
+    TEMPO_OCIOSO_SEGUNDOS: float = 600.0
+    MAX_USUARIOS: int = 256
+    INTERVALO_VARREDURA_SEGUNDOS: float = 60.0
+
+    def __init__(
+        self,
+        armazenamento: Armazenamento,
+        ao_atualizar: Optional[Callable[[str], None]] = None,
+        tempo_ocioso: Optional[float] = None,
+        relogio: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._armazenamento = armazenamento
+        self._ao_atualizar = ao_atualizar
+        self._tempo_ocioso = tempo_ocioso if tempo_ocioso is not None else self.TEMPO_OCIOSO_SEGUNDOS
+        self._relogio = relogio
+        self.replica = ArmazenamentoMemoria()
+        self._usuarios: Dict[str, _Acompanhamento] = {}
+        # Usuários sem resumo remoto e quando isso foi verificado (nova verificação após INTERVALO_VARREDURA_SEGUNDOS)
+        self._sem_resumo: Dict[str, float] = {}
+        self._lock = Lock()
+        # Fica False se o backend não oferece notificações (ex.: SQLite)
+        self._suportado = True
+        self._ultima_varredura = relogio()
+        self._mudancas_aplicadas = 0
+        self._desanexados = 0
+
+    def origem(self, user_id: str) -> Optional[ArmazenamentoMemoria]:
+        """Registra o acesso do usuário; devolve a réplica se ela estiver em dia (None: ler do backend)."""
+        return self.replica if self._acessar(user_id) is not None else None
+
+    def versao(self, user_id: str) -> Optional[int]:
+        """Versão remota conhecida pelo acompanhamento em dia (None: ler do backend)."""
+        acompanhamento = self._acessar(user_id)
+        return acompanhamento.versao if acompanhamento is not None else None
+
+    def observar(
+        self,
+        user_id: str,
+        ao_mudar_transacoes: Callable[[List[Mudanca]], None],
+        ao_mudar_resumo: Callable[[Optional[Dict[str, Any]]], None]
+    ) -> Optional[Callable[[], None]]:
+        """Mesmo contrato de Armazenamento.observar, servido pela assinatura do acompanhamento.
+
+        O primeiro aviso traz o estado atual (da réplica, ou o primeiro aviso
+        do backend se ele ainda não chegou). Enquanto houver observadores, o
+        usuário não é desanexado por ociosidade nem por capacidade.
+        """
+        if not self._suportado:
+            return None
+        observador: Observador = (ao_mudar_transacoes, ao_mudar_resumo)
+        agora = self._relogio()
+        with self._lock:
+            acompanhamento = self._usuarios.get(user_id)
+            novo = acompanhamento is None
+            if novo:
+                acompanhamento = self._usuarios[user_id] = _Acompanhamento(agora)
+            acompanhamento.ultimo_acesso = agora
+            acompanhamento.observadores.append(observador)
+            # Sob o lock: nenhum aviso do backend se intercala com o estado inicial
+            if acompanhamento.transacoes_recebidas:
+                ao_mudar_transacoes(self.replica.estado(user_id))
+            if acompanhamento.resumo_recebido:
+                ao_mudar_resumo(acompanhamento.resumo)
+
+        if novo:
+            self._anexar(user_id, acompanhamento)
+
+        def cancelar() -> None:
+            with self._lock:
+                if observador in acompanhamento.observadores:
+                    acompanhamento.observadores.remove(observador)
+                    acompanhamento.ultimo_acesso = self._relogio()
+
+        with self._lock:
+            if self._usuarios.get(user_id) is acompanhamento:
+                return cancelar
+        # Assinatura do backend não criada (ou sem suporte a notificações)
+        cancelar()
+        return None
+
+    def aguardar_gravacao(self, user_id: str) -> None:
+        """Chamado antes de uma gravação: a réplica só volta a responder quando o aviso dela chegar."""
+        with self._lock:
+            acompanhamento = self._usuarios.get(user_id)
+            if acompanhamento is not None:
+                acompanhamento.versao_minima = max(acompanhamento.versao_minima, acompanhamento.versao + 1)
+            # A gravação cria o resumo remoto: o próximo acesso verifica de novo
+            self._sem_resumo.pop(user_id, None)
+
+    def desanexar_ociosos(self, agora: Optional[float] = None) -> int:
+        """Cancela o acompanhamento dos usuários ociosos (e dos mais antigos, acima de MAX_USUARIOS)."""
+        agora = self._relogio() if agora is None else agora
+        with self._lock:
+            self._ultima_varredura = agora
+            self._sem_resumo = {
+                user_id: verificado_em for user_id, verificado_em in self._sem_resumo.items()
+                if agora - verificado_em < self.INTERVALO_VARREDURA_SEGUNDOS
+            }
+            # Usuários com observadores (conexões SSE abertas) continuam acompanhados
+            ociosos = {
+                user_id for user_id, acompanhamento in self._usuarios.items()
+                if not acompanhamento.observadores and agora - acompanhamento.ultimo_acesso > self._tempo_ocioso
+            }
+            excedentes = len(self._usuarios) - len(ociosos) - self.MAX_USUARIOS
+            if excedentes > 0:
+                ativos = sorted(
+                    (acompanhamento.ultimo_acesso, user_id)
+                    for user_id, acompanhamento in self._usuarios.items()
+                    if user_id not in ociosos and not acompanhamento.observadores
+                )
+                ociosos.update(user_id for _, user_id in ativos[:excedentes])
+            removidos = [self._desanexar(user_id) for user_id in ociosos]
+        self._cancelar(removidos)
+        return len(removidos)
+
+    def encerrar(self) -> None:
+        with self._lock:
+            removidos = [self._desanexar(user_id) for user_id in list(self._usuarios)]
+        self._cancelar(removidos)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'usuarios': len(self._usuarios),
+                'em_dia': sum(self._em_dia(user_id, a) for user_id, a in self._usuarios.items()),
+                'mudancas_aplicadas': self._mudancas_aplicadas,
+                'desanexados': self._desanexados
+            }
+
+    def _acessar(self, user_id: str) -> Optional[_Acompanhamento]:
+        if not self._suportado:
+            return None
+        agora = self._relogio()
+        with self._lock:
+            anexado = user_id in self._usuarios
+            verificado_em = self._sem_resumo.get(user_id)
+        if not anexado:
+            if verificado_em is not None and agora - verificado_em < self.INTERVALO_VARREDURA_SEGUNDOS:
+                return None
+            if not self._tem_resumo_remoto(user_id):
+                with self._lock:
+                    self._sem_resumo[user_id] = agora
+                return None
+
+        with self._lock:
+            acompanhamento = self._usuarios.get(user_id)
+            novo = acompanhamento is None
+            if novo:
+                acompanhamento = self._usuarios[user_id] = _Acompanhamento(agora)
+            acompanhamento.ultimo_acesso = agora
+
+        if novo:
+            # Fora do lock: o backend em memória já avisa o estado atual dentro de observar
+            self._anexar(user_id, acompanhamento)
+        if agora - self._ultima_varredura >= self.INTERVALO_VARREDURA_SEGUNDOS or len(self._usuarios) > self.MAX_USUARIOS:
+            self.desanexar_ociosos(agora)
+
+        with self._lock:
+            if self._usuarios.get(user_id) is acompanhamento and self._em_dia(user_id, acompanhamento):
+                return acompanhamento
+        return None
+
+    def _tem_resumo_remoto(self, user_id: str) -> bool:
+        try:
+            return self._armazenamento.obter_versao(user_id) > 0
+        except Exception as e:
+            print(f"Erro ao ler a versão do resumo: {e}")
+            return False
+
+    def _anexar(self, user_id: str, acompanhamento: _Acompanhamento) -> None:
+        try:
+            cancelar = self._armazenamento.observar(
+                user_id,
+                partial(self._ao_mudar_transacoes, user_id, acompanhamento),
+                partial(self._ao_mudar_resumo, user_id, acompanhamento)
+            )
+        except Exception as e:
+            print(f"Erro ao observar transações: {e}")
+            cancelar = None
+        else:
+            if cancelar is None:
+                self._suportado = False
+
+        with self._lock:
+            if cancelar is not None and self._usuarios.get(user_id) is acompanhamento:
+                acompanhamento.cancelar = cancelar
+                return
+            if self._usuarios.get(user_id) is acompanhamento:
+                # Assinatura não criada: o usuário volta a ser lido do backend
+                del self._usuarios[user_id]
+                self.replica.descartar(user_id)
+        # Desanexado enquanto a assinatura era criada
+        if cancelar is not None:
+            cancelar()
+
+    def _ao_mudar_transacoes(self, user_id: str, acompanhamento: _Acompanhamento, mudancas: List[Mudanca]) -> None:
+        with self._lock:
+            if self._usuarios.get(user_id) is not acompanhamento:
+                return
+            self.replica.aplicar_mudancas(user_id, mudancas)
+            acompanhamento.transacoes_recebidas = True
+            self._mudancas_aplicadas += len(mudancas)
+            observadores = list(acompanhamento.observadores)
+        if self._ao_atualizar is not None:
+            self._ao_atualizar(user_id)
+        for ao_mudar_transacoes, _ in observadores:
+            ao_mudar_transacoes(mudancas)
+
+    def _ao_mudar_resumo(self, user_id: str, acompanhamento: _Acompanhamento, resumo: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            if self._usuarios.get(user_id) is not acompanhamento:
+                return
+            acompanhamento.resumo = resumo
+            acompanhamento.resumo_recebido = True
+            observadores = list(acompanhamento.observadores)
+        for _, ao_mudar_resumo in observadores:
+            ao_mudar_resumo(resumo)
+
+    def _em_dia(self, user_id: str, acompanhamento: _Acompanhamento) -> bool:
+        # Transações e resumo chegam por assinaturas separadas: a réplica vale
+        # quando as quantidades conferem com o resumo da versão esperada
+        if not (acompanhamento.transacoes_recebidas and acompanhamento.resumo_recebido):
+            return False
+        remoto = acompanhamento.resumo or {}
+        if acompanhamento.versao < acompanhamento.versao_minima:
+            return False
+        local = self.replica.obter_resumo(user_id)
+        return (
+            remoto.get('quantidade_receitas', 0) == local['quantidade_receitas']
+            and remoto.get('quantidade_despesas', 0) == local['quantidade_despesas']
+        )
+
+    def _desanexar(self, user_id: str) -> _Acompanhamento:
+        # Chamado com o lock adquirido; o cancelamento da assinatura fica para depois
+        acompanhamento = self._usuarios.pop(user_id)
+        self.replica.descartar(user_id)
+        self._desanexados += 1
+        return acompanhamento
+
+    @staticmethod
+    def _cancelar(removidos: List[_Acompanhamento]) -> None:
+        for acompanhamento in removidos:
+            if acompanhamento.cancelar is not None:
+                acompanhamento.cancelar()
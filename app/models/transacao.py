@@ -1,30 +1,67 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, Any
-from decimal import Decimal
+from typing import Dict, Any, Optional
+
+from app.models.dinheiro import Dinheiro
+from app.utils.datas import converter_data
+
+
+def normalizar_categoria(categoria: str) -> str:
+    return (categoria or '').strip().lower()
 
 
 class Transacao(ABC):
+    # Slots: sem __dict__ por instância, uma alocação por linha lida
+    __slots__ = ('_valor', '_data', '_data_texto', '_descricao', '_categoria')
+
     def __init__(
         self,
-        valor: Decimal,
+        valor: Dinheiro,
         data: datetime,
         descricao: str,
         categoria: str
     ) -> None:
         self._valor = valor
         self._data = data
+        self._data_texto: Optional[str] = None
         self._descricao = descricao
         self._categoria = categoria
 
+    @staticmethod
+    def de_documento(documento: Dict[str, Any]) -> 'Transacao':
+        """Reconstrói a transação de um documento armazenado, sem validar nem copiar os campos."""
+        if documento.get('tipo') == 'receita':
+            transacao: Transacao = Receita.__new__(Receita)
+            transacao._conta_destino = documento.get('conta_destino', '')
+        else:
+            transacao = Despesa.__new__(Despesa)
+            transacao._metodo_pagamento = documento.get('metodo_pagamento', '')
+            transacao._estabelecimento = documento.get('estabelecimento', '')
+
+        transacao._valor = Dinheiro.de_documento(documento)
+        # A data em texto ISO é mantida como gravada; o datetime só é criado se usado
+        transacao._data_texto = documento.get('data')
+        transacao._data = None if transacao._data_texto else converter_data(documento['data_ts'])
+        transacao._descricao = documento.get('descricao', '')
+        transacao._categoria = documento.get('categoria', '')
+        return transacao
+
     @property
-    def valor(self) -> Decimal:
+    def valor(self) -> Dinheiro:
         return self._valor
 
     @property
     def data(self) -> datetime:
+        if self._data is None:
+            self._data = converter_data(self._data_texto)
         return self._data
 
+    @property
+    def data_texto(self) -> str:
+        if self._data_texto is None:
+            self._data_texto = self._data.isoformat()
+        return self._data_texto
+
     @property
     def descricao(self) -> str:
         return self._descricao
@@ -37,15 +74,27 @@ class Transacao(ABC):
     def para_dicionario(self) -> Dict[str, Any]:
         pass
 
+    def para_json(self) -> Dict[str, Any]:
+        """Representação pública usada pela API, exportação e dashboard."""
+        return {
+            'tipo': self.obter_tipo(),
+            'valor': float(self._valor),
+            'data': self.data_texto,
+            'descricao': self._descricao,
+            'categoria': self._categoria
+        }
+
     @abstractmethod
     def obter_tipo(self) -> str:
         pass
 
 
 class Receita(Transacao):
+    __slots__ = ('_conta_destino',)
+
     def __init__(
         self,
-        valor: Decimal,
+        valor: Dinheiro,
         data: datetime,
         descricao: str,
         categoria: str,
@@ -61,21 +110,33 @@ class Receita(Transacao):
     def para_dicionario(self) -> Dict[str, Any]:
         return {
             'tipo': self.obter_tipo(),
+            # 'valor' em float é mantido para leitores antigos; a fonte
+            # de verdade é 'valor_centavos'
             'valor': float(self.valor),
+            'valor_centavos': self.valor.centavos,
             'data': self.data.isoformat(),
+            'data_ts': self.data,
             'descricao': self.descricao,
             'categoria': self.categoria,
+            'categoria_chave': normalizar_categoria(self.categoria),
             'conta_destino': self.conta_destino
         }
 
+    def para_json(self) -> Dict[str, Any]:
+        dados = super().para_json()
+        dados['conta_destino'] = self._conta_destino
+        return dados
+
     def obter_tipo(self) -> str:
         return 'receita'
 
 
 class Despesa(Transacao):
+    __slots__ = ('_metodo_pagamento', '_estabelecimento')
+
     def __init__(
         self,
-        valor: Decimal,
+        valor: Dinheiro,
         data: datetime,
         descricao: str,
         categoria: str,
@@ -98,12 +159,21 @@ class Despesa(Transacao):
         return {
             'tipo': self.obter_tipo(),
             'valor': float(self.valor),
+            'valor_centavos': self.valor.centavos,
             'data': self.data.isoformat(),
+            'data_ts': self.data,
             'descricao': self.descricao,
             'categoria': self.categoria,
+            'categoria_chave': normalizar_categoria(self.categoria),
             'metodo_pagamento': self.metodo_pagamento,
             'estabelecimento': self.estabelecimento
         }
 
+    def para_json(self) -> Dict[str, Any]:
+        dados = super().para_json()
+        dados['metodo_pagamento'] = self._metodo_pagamento
+        dados['estabelecimento'] = self._estabelecimento
+        return dados
+
     def obter_tipo(self) -> str:
         return 'despesa'
@@ -1,7 +1,8 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Optional, Union
 
+from app.models.dinheiro import Dinheiro
 from app.models.transacao import Transacao, Receita, Despesa
 
 
@@ -9,13 +10,14 @@ class TransacaoFactory:
     @staticmethod
     def criar_transacao(
         tipo: str,
-        valor: Decimal,
+        valor: Union[Dinheiro, Decimal],
         data: datetime,
         descricao: str,
         categoria: str,
         **kwargs
     ) -> Transacao:
         tipo = tipo.lower().strip()
+        valor = Dinheiro.de_reais(valor)
 
         if tipo == 'receita':
             return TransacaoFactory._criar_receita(
@@ -33,7 +35,7 @@ class TransacaoFactory:
 
     @staticmethod
     def _criar_receita(
-        valor: Decimal,
+        valor: Dinheiro,
         data: datetime,
         descricao: str,
         categoria: str,
@@ -56,7 +58,7 @@ class TransacaoFactory:
 
     @staticmethod
     def _criar_despesa(
-        valor: Decimal,
+        valor: Dinheiro,
         data: datetime,
         descricao: str,
         categoria: str,
@@ -0,0 +1,193 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.dinheiro import Dinheiro
+from app.models.transacao import normalizar_categoria
+
+
+_EPOCA = datetime(1970, 1, 1)
+
+
+def _segundos_utc(data: Any) -> float:
+    if isinstance(data, str):
+        data = datetime.fromisoformat(data)
+    if data.tzinfo is None:
+        return (data - _EPOCA).total_seconds()
+    return data.timestamp()
+
+
+class TransacaoFrame:
+    """Transações em colunas NumPy para agregações vetorizadas.
+
+    valor é guardado em centavos (int64), data como datetime64[us] e
+    tipo/categoria como códigos inteiros de um dicionário. Os documentos
+    originais não são copiados: o frame guarda apenas a posição de cada
+    linha na lista de origem.
+    """
+
+    TIPOS: Tuple[str, ...] = ('receita', 'despesa')
+
+    def __init__(
+        self,
+        valores: np.ndarray,
+        datas: np.ndarray,
+        tipos: np.ndarray,
+        categorias: np.ndarray,
+        nomes_categorias: List[str],
+        chaves_categorias: List[str],
+        linhas: Sequence[Dict[str, Any]],
+        indices: np.ndarray
+    ) -> None:
+        self.valores = valores
+        self.datas = datas
+        self.tipos = tipos
+        self.categorias = categorias
+        self.nomes_categorias = nomes_categorias
+        self._chaves_categorias = chaves_categorias
+        self._linhas = linhas
+        self._indices = indices
+
+    @classmethod
+    def de_transacoes(cls, transacoes: Sequence[Dict[str, Any]]) -> 'TransacaoFrame':
+        n = len(transacoes)
+        valores = np.empty(n, dtype=np.int64)
+        tipos = np.full(n, -1, dtype=np.int8)
+        categorias = np.empty(n, dtype=np.int32)
+        datas: List[Any] = []
+        somente_texto = True
+
+        codigos_tipo = {tipo: codigo for codigo, tipo in enumerate(cls.TIPOS)}
+        codigos_categoria: Dict[str, int] = {}
+        nomes_categorias: List[str] = []
+
+        for i, t in enumerate(transacoes):
+            centavos = t.get('valor_centavos')
+            valores[i] = centavos if centavos is not None else Dinheiro.de_documento(t).centavos
+            tipos[i] = codigos_tipo.get(t.get('tipo'), -1)
+            nome = t.get('categoria', 'Sem Categoria')
+            codigo = codigos_categoria.get(nome)
+            if codigo is None:
+                codigo = codigos_categoria[nome] = len(nomes_categorias)
+                nomes_categorias.append(nome)
+            categorias[i] = codigo
+            data = t.get('data_ts') or t['data']
+            if somente_texto and not isinstance(data, str):
+                somente_texto = False
+            datas.append(data)
+
+        # Datas ISO são convertidas pelo NumPy de uma só vez; timestamps do
+        # Firestore (com fuso) viram microssegundos UTC desde a época
+        if somente_texto:
+            colunas_datas = np.array(datas, dtype='datetime64[us]')
+        else:
+            segundos = np.array([_segundos_utc(data) for data in datas], dtype=np.float64)
+            colunas_datas = np.rint(segundos * 1_000_000).astype(np.int64).astype('datetime64[us]')
+
+        return cls(
+            valores=valores,
+            datas=colunas_datas,
+            tipos=tipos,
+            categorias=categorias,
+            nomes_categorias=nomes_categorias,
+            chaves_categorias=[normalizar_categoria(nome) for nome in nomes_categorias],
+            linhas=transacoes,
+            indices=np.arange(n)
+        )
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    def filtrar(self, mascara: np.ndarray) -> 'TransacaoFrame':
+        return TransacaoFrame(
+            valores=self.valores[mascara],
+            datas=self.datas[mascara],
+            tipos=self.tipos[mascara],
+            categorias=self.categorias[mascara],
+            nomes_categorias=self.nomes_categorias,
+            chaves_categorias=self._chaves_categorias,
+            linhas=self._linhas,
+            indices=self._indices[mascara]
+        )
+
+    def filtrar_por(
+        self,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        categoria: Optional[str] = None,
+        tipo: Optional[str] = None
+    ) -> 'TransacaoFrame':
+        mascara = np.ones(len(self), dtype=bool)
+        if data_inicio is not None:
+            mascara &= self.datas >= np.datetime64(data_inicio, 'us')
+        if data_fim is not None:
+            mascara &= self.datas <= np.datetime64(data_fim, 'us')
+        if categoria:
+            chave = normalizar_categoria(categoria)
+            codigos = [c for c, k in enumerate(self._chaves_categorias) if k == chave]
+            mascara &= np.isin(self.categorias, codigos)
+        if tipo:
+            mascara &= self.tipos == self._codigo_tipo(tipo)
+        return self.filtrar(mascara)
+
+    def soma(self, tipo: Optional[str] = None) -> int:
+        if tipo is None:
+            return int(self.valores.sum())
+        return int(self.valores[self.tipos == self._codigo_tipo(tipo)].sum())
+
+    def contagem(self, tipo: Optional[str] = None) -> int:
+        if tipo is None:
+            return len(self)
+        return int(np.count_nonzero(self.tipos == self._codigo_tipo(tipo)))
+
+    def minimo(self) -> Optional[int]:
+        return int(self.valores.min()) if len(self) else None
+
+    def maximo(self) -> Optional[int]:
+        return int(self.valores.max()) if len(self) else None
+
+    def media(self) -> float:
+        return float(self.valores.mean()) if len(self) else 0.0
+
+    def somas_por_categoria(self, tipo: str) -> Dict[str, int]:
+        mascara = self.tipos == self._codigo_tipo(tipo)
+        codigos = self.categorias[mascara]
+        if not len(codigos):
+            return {}
+        # Somas em centavos são exatas em float64 até 2**53
+        somas = np.bincount(
+            codigos,
+            weights=self.valores[mascara],
+            minlength=len(self.nomes_categorias)
+        )
+        presentes = np.bincount(codigos, minlength=len(self.nomes_categorias)) > 0
+        return {
+            self.nomes_categorias[codigo]: int(round(somas[codigo]))
+            for codigo in np.flatnonzero(presentes)
+        }
+
+    def top_k(self, k: int) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """As k transações mais recentes, da mais nova para a mais antiga."""
+        if k <= 0 or not len(self):
+            return []
+        if k < len(self):
+            limiar = np.partition(self.datas, len(self) - k)[len(self) - k]
+            maiores = np.flatnonzero(self.datas > limiar)
+            empates = np.flatnonzero(self.datas == limiar)[::-1][:k - len(maiores)]
+            candidatos = np.concatenate([maiores, empates])
+        else:
+            candidatos = np.arange(len(self))
+        # Data decrescente e, nos empates, a última gravada primeiro: a mesma
+        # ordem (data, id) decrescente das páginas do armazenamento
+        ordem = candidatos[np.lexsort((-candidatos, -self.datas[candidatos].astype(np.int64)))]
+        return [(self.datas[i].item(), self._linhas[self._indices[i]]) for i in ordem]
+
+    def linhas(self) -> List[Dict[str, Any]]:
+        return [self._linhas[i] for i in self._indices]
+
+    def _codigo_tipo(self, tipo: str) -> int:
+        try:
+            return self.TIPOS.index(tipo)
+        except ValueError:
+            return -1
@@ -1,11 +1,20 @@
-from flask import Blueprint, request, render_template, redirect, url_for, flash, jsonify
+from flask import Blueprint, Response, abort, current_app, request, render_template, redirect, url_for, flash, jsonify, stream_with_context
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
+import codecs
+import hmac
+import os
 
 from app.controllers.transacao_controller import TransacaoController
 from app.controllers.auth_controller import AuthController
+from app.builders.cache_dashboard import CacheDashboard
 from app.builders.dashboard_builder import DashboardBuilder
 from app.models.banco_de_dados import BancoDeDados
+from app.models.cache_identidade import CacheIdentidade
+from app.utils.eventos import CanalEventos
+from app.utils.metricas import Metricas
+from app.utils.etag import com_etag
+from app.utils.serializacao import resposta_transacoes
 
 
 bp = Blueprint('main', __name__)
@@ -55,63 +64,89 @@ def logout():
     return redirect(url_for('main.login'))
 
 
-@bp.route('/')
 @login_required
 def index():
+    data_inicio, data_fim, categoria = _periodo_dashboard()
     try:
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
-        categoria = request.args.get('categoria')
-
-        # Default dates: Current month
-        if not data_inicio:
-            today = datetime.now()
-            data_inicio = today.replace(day=1).strftime('%Y-%m-%d')
+        # Always apply filters if dates are present (which they should be now);
+        # repeated views with unchanged data come from the dashboard cache
+        dados_dashboard = DashboardBuilder().build_completo(
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            categoria=categoria
+        )
+        return _renderizar_dashboard(dados_dashboard, data_inicio, data_fim, categoria)
 
-        if not data_fim:
-            today = datetime.now()
-            data_fim = today.strftime('%Y-%m-%d')
+    except Exception as e:
+        return _renderizar_dashboard_com_erro(e)
 
-        builder = DashboardBuilder()
 
-        # Always apply filters if dates are present (which they should be now)
-        builder.com_filtros(
+@login_required
+async def index_assincrono():
+    """Dashboard no modo ASGI: as leituras do armazenamento são feitas em paralelo."""
+    data_inicio, data_fim, categoria = _periodo_dashboard()
+    try:
+        dados_dashboard = await DashboardBuilder().build_completo_async(
             data_inicio=data_inicio,
             data_fim=data_fim,
             categoria=categoria
         )
+        return _renderizar_dashboard(dados_dashboard, data_inicio, data_fim, categoria)
+
+    except Exception as e:
+        return _renderizar_dashboard_com_erro(e)
 
-        dados_dashboard = (builder
-                          .com_saldo_total()
-                          .com_transacoes_recentes()
-                          .com_resumo_por_categoria()
-                          .com_estatisticas_adicionais()
-                          .com_dados_grafico()
-                          .build())
 
-        # Passar as datas de filtro para o template
-        dados_dashboard['data_inicio'] = data_inicio
-        dados_dashboard['data_fim'] = data_fim
-        dados_dashboard['categoria_selecionada'] = categoria or 'todas'
+@bp.record
+def _registrar_dashboard(estado):
+    # Versão do dashboard escolhida no registro: register_blueprint(bp, assincrono=True) no modo ASGI
+    view = index_assincrono if estado.options.get('assincrono') else index
+    estado.add_url_rule('/', 'index', view)
 
-        return render_template('index.html', **dados_dashboard)
 
-    except Exception as e:
-        flash(f'Erro ao carregar dashboard: {str(e)}', 'error')
+def _periodo_dashboard():
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
+    categoria = request.args.get('categoria')
+
+    # Default dates: Current month
+    if not data_inicio:
         today = datetime.now()
-        return render_template('index.html',
-                             saldo_total=0,
-                             total_receitas=0,
-                             total_despesas=0,
-                             transacoes_recentes=[],
-                             resumo_por_categoria={'receitas': [], 'despesas': []},
-                             quantidade_receitas=0,
-                             quantidade_despesas=0,
-                             dados_grafico={},
-                             filtros_ativos={},
-                             data_inicio=today.replace(day=1).strftime('%Y-%m-%d'),
-                             data_fim=today.strftime('%Y-%m-%d'),
-                             categoria_selecionada='todas')
+        data_inicio = today.replace(day=1).strftime('%Y-%m-%d')
+
+    if not data_fim:
+        today = datetime.now()
+        data_fim = today.strftime('%Y-%m-%d')
+
+    return data_inicio, data_fim, categoria
+
+
+def _renderizar_dashboard(dados_dashboard, data_inicio, data_fim, categoria):
+    # Passar as datas de filtro para o template
+    dados_dashboard['data_inicio'] = data_inicio
+    dados_dashboard['data_fim'] = data_fim
+    dados_dashboard['categoria_selecionada'] = categoria or 'todas'
+    dados_dashboard['stream_ativo'] = current_app.config['STREAM_TEMPO_REAL']
+
+    return render_template('index.html', **dados_dashboard)
+
+
+def _renderizar_dashboard_com_erro(e):
+    flash(f'Erro ao carregar dashboard: {str(e)}', 'error')
+    today = datetime.now()
+    return render_template('index.html',
+                         saldo_total=0,
+                         total_receitas=0,
+                         total_despesas=0,
+                         transacoes_recentes=[],
+                         resumo_por_categoria={'receitas': [], 'despesas': []},
+                         quantidade_receitas=0,
+                         quantidade_despesas=0,
+                         dados_grafico={},
+                         filtros_ativos={},
+                         data_inicio=today.replace(day=1).strftime('%Y-%m-%d'),
+                         data_fim=today.strftime('%Y-%m-%d'),
+                         categoria_selecionada='todas')
 
 
 @bp.route('/nova-transacao', methods=['GET'])
@@ -140,6 +175,7 @@ def nova_transacao_submit():
 
 @bp.route('/api/resumo')
 @login_required
+@com_etag
 def api_resumo():
     try:
         resumo = transacao_controller.obter_resumo_financeiro()
@@ -148,44 +184,142 @@ def api_resumo():
         return jsonify({'erro': str(e)}), 500
 
 
+@bp.route('/api/stream')
+@login_required
+def api_stream():
+    # Server-Sent Events: a cada transação salva (por qualquer worker), a nova linha
+    # e o incremento da categoria. Opcional: cada conexão ocupa uma thread do servidor
+    if not current_app.config['STREAM_TEMPO_REAL']:
+        abort(404)
+    canal = CanalEventos()
+    user_id = current_user.id
+    fila = canal.assinar(user_id, BancoDeDados().fonte_eventos, current_app.config['STREAM_MAX_CONEXOES'])
+    if fila is None:
+        return jsonify({'erro': 'Limite de conexões de tempo real atingido'}), 503, {'Retry-After': '60'}
+    resposta = Response(
+        canal.eventos(user_id, fila),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Libera a conexão mesmo se o corpo nunca chegar a ser percorrido
+    resposta.call_on_close(lambda: canal.cancelar(user_id, fila))
+    return resposta
+
+
+@bp.route('/api/metricas/http')
+@login_required
+def api_metricas_http():
+    return jsonify(AuthController.estatisticas_http())
+
+
+@bp.route('/metrics')
+def metrics():
+    # Formato de exposição do Prometheus (histogramas + indicadores de cache e HTTP).
+    # Só com METRICAS_TOKEN configurado, e o coletor envia o token como Bearer
+    token = current_app.config['METRICAS_TOKEN']
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Não autorizado\n', 401, {'WWW-Authenticate': 'Bearer'}, mimetype='text/plain')
+    corpo = Metricas().exportar({
+        'cliente_http': AuthController.estatisticas_http(),
+        'cache_transacoes': BancoDeDados().estatisticas_cache(),
+        'cache_identidade': CacheIdentidade().estatisticas(),
+        'cache_dashboard': CacheDashboard().estatisticas(),
+        'ouvinte_transacoes': BancoDeDados().estatisticas_ouvinte() or {},
+        'stream': CanalEventos().estatisticas()
+    })
+    return Response(corpo, mimetype='text/plain; version=0.0.4')
+
+
 @bp.route('/api/transacoes')
 @login_required
+@com_etag
 def api_transacoes():
     try:
-        dados = transacao_controller.listar_transacoes()
-        return jsonify(dados)
+        dados = transacao_controller.listar_transacoes(
+            limite=request.args.get('limite', type=int),
+            cursor=request.args.get('cursor'),
+            data_inicio=request.args.get('data_inicio'),
+            data_fim=request.args.get('data_fim'),
+            categoria=request.args.get('categoria')
+        )
+        return resposta_transacoes(dados)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@bp.route('/api/transacoes/export')
+@login_required
+def api_exportar_transacoes():
+    formato = request.args.get('formato', 'ndjson')
+    try:
+        linhas = transacao_controller.exportar_transacoes(
+            formato,
+            data_inicio=request.args.get('data_inicio'),
+            data_fim=request.args.get('data_fim'),
+            categoria=request.args.get('categoria')
+        )
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(linhas),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=transacoes.{formato}'}
+    )
+
+
+@bp.route('/api/transacoes/importar', methods=['POST'])
+@login_required
+def api_importar_transacoes():
+    arquivo = request.files.get('arquivo')
+    if not arquivo or not arquivo.filename:
+        return jsonify({'erro': "O campo 'arquivo' é obrigatório"}), 400
+
+    formato = request.form.get('formato') or os.path.splitext(arquivo.filename)[1].lstrip('.').lower()
+    try:
+        # StreamReader só chama read(): aceita o SpooledTemporaryFile do
+        # upload, que antes do Python 3.11 não tem readable() para o TextIOWrapper
+        texto = codecs.getreader('utf-8-sig')(arquivo.stream, errors='replace')
+        relatorio = transacao_controller.importar_transacoes(texto, formato)
+        return jsonify(relatorio)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@bp.route('/api/transacoes/lote', methods=['POST'])
+@login_required
+def api_criar_transacoes_lote():
+    try:
+        relatorio = transacao_controller.criar_transacoes_em_lote(request.get_json(silent=True))
+        return jsonify(relatorio)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
 
 @bp.route('/api/transacoes/<tipo>')
 @login_required
+@com_etag
 def api_transacoes_por_tipo(tipo):
     try:
-        banco = BancoDeDados()
-        transacoes = banco.obter_transacoes_por_tipo(current_user.id, tipo)
-
-        # Garantir serialização
-        transacoes_serializaveis = []
-        for t in transacoes:
-            transacao_serializada = {
-                'tipo': str(t.get('tipo', '')),
-                'valor': float(t.get('valor', 0)),
-                'data': str(t.get('data', '')),
-                'descricao': str(t.get('descricao', '')),
-                'categoria': str(t.get('categoria', ''))
-            }
-            if tipo == 'receita':
-                transacao_serializada['conta_destino'] = str(t.get('conta_destino', ''))
-            else:
-                transacao_serializada['metodo_pagamento'] = str(t.get('metodo_pagamento', ''))
-                transacao_serializada['estabelecimento'] = str(t.get('estabelecimento', ''))
-            transacoes_serializaveis.append(transacao_serializada)
-
-        return jsonify({
-            'tipo': tipo,
-            'transacoes': transacoes_serializaveis,
-            'quantidade': len(transacoes)
-        })
+        dados = transacao_controller.listar_transacoes_por_tipo(
+            tipo,
+            limite=request.args.get('limite', type=int),
+            cursor=request.args.get('cursor'),
+            data_inicio=request.args.get('data_inicio'),
+            data_fim=request.args.get('data_fim'),
+            categoria=request.args.get('categoria')
+        )
+        return resposta_transacoes(dados)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
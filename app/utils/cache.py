@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import time
+
+
+class CacheLRU:
+    """Cache em memória com expiração (TTL), despejo LRU e limite de peso."""
+
+    def __init__(
+        self,
+        max_itens: int = 256,
+        ttl_segundos: Optional[float] = 300.0,
+        max_peso: Optional[int] = None,
+        peso: Optional[Callable[[Any], int]] = None
+    ) -> None:
+        self._max_itens = max_itens
+        self._ttl = ttl_segundos
+        self._max_peso = max_peso
+        self._peso = peso or (lambda valor: 1)
+        self._itens: 'OrderedDict[Hashable, Tuple[Any, float, int]]' = OrderedDict()
+        self._peso_total = 0
+        self._lock = Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return padrao
+
+            valor, expira_em, _ = item
+            if expira_em and expira_em < time.monotonic():
+                self._remover(chave)
+                self.falhas += 1
+                return padrao
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any) -> None:
+        peso = self._peso(valor)
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+
+            # Itens maiores que o limite inteiro nunca são armazenados
+            if self._max_peso is not None and peso > self._max_peso:
+                return
+
+            expira_em = time.monotonic() + self._ttl if self._ttl else 0.0
+            self._itens[chave] = (valor, expira_em, peso)
+            self._peso_total += peso
+            self._despejar()
+
+    def atualizar(self, chave: Hashable, funcao: Callable[[Any], Any]) -> bool:
+        """Aplica `funcao` ao valor em cache sem renovar o TTL."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return False
+
+            valor, expira_em, peso_antigo = item
+            novo_valor = funcao(valor)
+            novo_peso = self._peso(novo_valor)
+            self._itens[chave] = (novo_valor, expira_em, novo_peso)
+            self._itens.move_to_end(chave)
+            self._peso_total += novo_peso - peso_antigo
+            self._despejar()
+            return True
+
+    def invalidar(self, chave: Hashable) -> None:
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._peso_total = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'itens': len(self._itens),
+                'peso_total': self._peso_total,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'despejos': self.despejos
+            }
+
+    def __contains__(self, chave: Hashable) -> bool:
+        """Indica se `obter` encontraria a chave; itens expirados são removidos, como em `obter`."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return False
+            _, expira_em, _ = item
+            if expira_em and expira_em < time.monotonic():
+                self._remover(chave)
+                return False
+            return True
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def _remover(self, chave: Hashable) -> None:
+        _, _, peso = self._itens.pop(chave)
+        self._peso_total -= peso
+
+    def _despejar(self) -> None:
+        while self._itens and (
+            len(self._itens) > self._max_itens
+            or (self._max_peso is not None and self._peso_total > self._max_peso)
+        ):
+            chave, (_, _, peso) = self._itens.popitem(last=False)
+            self._peso_total -= peso
+            self.despejos += 1
@@ -0,0 +1,133 @@
+from collections import deque
+from threading import Lock
+from typing import Any, Deque, Dict, Optional, Tuple
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class RetryLimitado(Retry):
+    """Retry que não repete POST em 429 e limita a espera pedida em Retry-After.
+
+    Um 429 indica limite de taxa: reenviar o login só aumenta a contagem do
+    cliente. Nos demais casos o Retry-After é respeitado até ESPERA_MAXIMA_S,
+    para que uma resposta não prenda a thread da requisição por minutos.
+    """
+
+    ESPERA_MAXIMA_S: float = 5.0
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code == 429 and method.upper() == 'POST':
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        espera = super().get_retry_after(response)
+        return None if espera is None else min(espera, self.ESPERA_MAXIMA_S)
+
+
+class ClienteHTTP:
+    """Sessão HTTP compartilhada: keep-alive, pool limitado, timeouts e retry com backoff.
+
+    Registra a latência de cada chamada e quantas vezes o pool ficou saturado
+    (todas as conexões em uso no início de uma requisição).
+    """
+
+    AMOSTRAS_LATENCIA = 1024
+
+    def __init__(
+        self,
+        max_conexoes: int = 10,
+        timeout_conexao: float = 3.05,
+        timeout_leitura: float = 10.0,
+        tentativas: int = 2,
+        backoff: float = 0.3
+    ) -> None:
+        self._max_conexoes = max_conexoes
+        self._timeout: Tuple[float, float] = (timeout_conexao, timeout_leitura)
+
+        retry = RetryLimitado(
+            total=tentativas,
+            connect=tentativas,
+            read=0,
+            status=tentativas,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'POST'}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        # pool_block: com o pool cheio, a thread espera uma conexão livre em
+        # vez de abrir conexões extras sem limite
+        adaptador = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_conexoes,
+            pool_block=True,
+            max_retries=retry
+        )
+        self._sessao = requests.Session()
+        self._sessao.mount('https://', adaptador)
+        self._sessao.mount('http://', adaptador)
+
+        self._lock = Lock()
+        self._em_uso = 0
+        self._latencias: Deque[float] = deque(maxlen=self.AMOSTRAS_LATENCIA)
+        self.requisicoes = 0
+        self.erros = 0
+        self.saturacoes = 0
+        self.pico_em_uso = 0
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._requisitar('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._requisitar('GET', url, **kwargs)
+
+    def _requisitar(self, metodo: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault('timeout', self._timeout)
+        with self._lock:
+            if self._em_uso >= self._max_conexoes:
+                self.saturacoes += 1
+            self._em_uso += 1
+            self.pico_em_uso = max(self.pico_em_uso, self._em_uso)
+
+        inicio = time.perf_counter()
+        try:
+            return self._sessao.request(metodo, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.erros += 1
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            with self._lock:
+                self._em_uso -= 1
+                self.requisicoes += 1
+                self._latencias.append(duracao)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            latencias = sorted(self._latencias)
+            em_uso = self._em_uso
+
+        def percentil(p: float) -> float:
+            if not latencias:
+                return 0.0
+            return latencias[min(len(latencias) - 1, int(p * len(latencias)))]
+
+        return {
+            'requisicoes': self.requisicoes,
+            'erros': self.erros,
+            'em_uso': em_uso,
+            'pico_em_uso': self.pico_em_uso,
+            'max_conexoes': self._max_conexoes,
+            'saturacoes': self.saturacoes,
+            'latencia_p50_s': percentil(0.50),
+            'latencia_p99_s': percentil(0.99),
+            'latencia_media_s': sum(latencias) / len(latencias) if latencias else 0.0
+        }
+
+    def fechar(self) -> None:
+        self._sessao.close()
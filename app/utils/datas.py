@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+
+
+def converter_data(valor: Any) -> datetime:
+    """Converte datas do Firestore (timestamp ou ISO) para datetime ingênuo em UTC."""
+    if isinstance(valor, datetime):
+        if valor.tzinfo is not None:
+            return valor.astimezone(timezone.utc).replace(tzinfo=None)
+        return valor
+    return datetime.fromisoformat(str(valor))
+
+
+def converter_data_filtro(texto: Optional[str], fim_do_dia: bool = False) -> Optional[datetime]:
+    """Converte datas YYYY-MM-DD dos filtros; valores inválidos são ignorados (None)."""
+    if not texto:
+        return None
+    try:
+        data = datetime.strptime(texto, '%Y-%m-%d')
+    except ValueError:
+        return None
+    if fim_do_dia:
+        # Adicionar 23:59:59 para incluir o dia inteiro
+        data = data.replace(hour=23, minute=59, second=59)
+    return data
+
+
+def data_da_transacao(transacao: dict) -> datetime:
+    # Documentos antigos só possuem a data em texto ISO
+    return converter_data(transacao.get('data_ts') or transacao['data'])
+
+
+def chave_mes(data: datetime) -> str:
+    return data.strftime('%Y-%m')
+
+
+def inicio_do_mes(data: datetime) -> datetime:
+    return data.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def proximo_mes(data: datetime) -> datetime:
+    inicio = inicio_do_mes(data)
+    if inicio.month == 12:
+        return inicio.replace(year=inicio.year + 1, month=1)
+    return inicio.replace(month=inicio.month + 1)
+
+
+def dividir_em_meses(
+    inicio: Optional[datetime],
+    fim: Optional[datetime]
+) -> Optional[Tuple[Optional[str], Optional[str], List[Tuple[Optional[datetime], Optional[datetime]]]]]:
+    """Separa um intervalo em meses completos e nas bordas parciais.
+
+    Retorna (primeiro_mes, ultimo_mes, bordas) com os meses no formato YYYY-MM
+    (None = sem limite) e as bordas como intervalos inclusivos de datas, ou
+    None quando o intervalo não contém nenhum mês completo.
+    """
+    primeiro = None
+    if inicio is not None:
+        primeiro = inicio if inicio == inicio_do_mes(inicio) else proximo_mes(inicio)
+
+    # Início do mês seguinte ao último mês completo
+    depois_do_ultimo = None
+    if fim is not None:
+        depois_do_ultimo = proximo_mes(fim) if proximo_mes(fim) - fim <= timedelta(seconds=1) else inicio_do_mes(fim)
+
+    if primeiro is not None and depois_do_ultimo is not None and primeiro >= depois_do_ultimo:
+        return None
+
+    bordas: List[Tuple[Optional[datetime], Optional[datetime]]] = []
+    if inicio is not None and inicio < primeiro:
+        bordas.append((inicio, primeiro - timedelta(microseconds=1)))
+    if fim is not None and depois_do_ultimo <= fim:
+        bordas.append((depois_do_ultimo, fim))
+
+    ultimo_mes = None
+    if depois_do_ultimo is not None:
+        ultimo_mes = chave_mes(depois_do_ultimo - timedelta(days=1))
+
+    return (
+        chave_mes(primeiro) if primeiro is not None else None,
+        ultimo_mes,
+        bordas
+    )
@@ -0,0 +1,38 @@
+from functools import wraps
+from typing import Any, Callable
+import hashlib
+
+from flask import current_app, request
+from flask_login import current_user
+
+from app.models.banco_de_dados import BancoDeDados
+
+
+def gerar_etag(user_id: str, versao: int) -> str:
+    """ETag forte: versão dos dados do usuário + recurso pedido (rota e parâmetros)."""
+    identidade = '|'.join((user_id, request.full_path, type(current_app.json).__name__))
+    resumo = hashlib.blake2b(identidade.encode(), digest_size=8).hexdigest()
+    return f'{versao}-{resumo}'
+
+
+def com_etag(funcao: Callable) -> Callable:
+    """GET condicional: com If-None-Match igual à versão atual, responde 304
+    sem executar a rota (uma única leitura, a da versão)."""
+
+    @wraps(funcao)
+    def envolvida(*args: Any, **kwargs: Any) -> Any:
+        # A versão é lida antes dos dados: uma gravação concorrente só faz o
+        # próximo GET condicional responder 200 de novo, nunca um 304 obsoleto
+        etag = gerar_etag(current_user.id, BancoDeDados().obter_versao(current_user.id))
+        if etag in request.if_none_match:
+            resposta = current_app.response_class(status=304)
+        else:
+            resposta = current_app.make_response(funcao(*args, **kwargs))
+            if resposta.status_code != 200:
+                return resposta
+        resposta.set_etag(etag)
+        # O navegador guarda a resposta, mas revalida a cada uso
+        resposta.headers['Cache-Control'] = 'private, no-cache'
+        return resposta
+
+    return envolvida
@@ -0,0 +1,204 @@
+from queue import Empty, Full, Queue
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+import json
+
+from app.models.armazenamento import Armazenamento
+from app.models.armazenamento.base import Mudanca
+from app.models.ouvinte_transacoes import OuvinteTransacoes
+from app.models.transacao import Transacao
+from app.utils.serializacao import serializar_valor
+
+
+class CanalEventos:
+    """Difusão de eventos por usuário para as conexões SSE (/api/stream).
+
+    A origem dos eventos é o próprio backend: na primeira conexão do usuário
+    no processo, o canal assina as mudanças (on_snapshot no Firestore) e
+    converte as transações novas em eventos. Assim, gravações feitas por
+    outro worker ou host também chegam a todas as conexões. Com o
+    OuvinteTransacoes ativo, a assinatura é a dele (OuvinteTransacoes.observar),
+    e o backend não recebe uma segunda.
+    Backends sem notificações (SQLite) recebem os eventos publicados pelo
+    próprio processo que gravou (publicar_local).
+
+    Cada conexão tem uma fila limitada; o evento é serializado uma única vez
+    e entregue às filas do usuário. Uma conexão lenta que enche a fila perde
+    os eventos pendentes e recebe 'recarregar', pois os deltas seguintes já
+    não fechariam com o que o cliente exibe. Cada conexão ocupa uma thread do
+    servidor enquanto está aberta; acima de MAX_CONEXOES no processo, novas
+    conexões são recusadas.
+    """
+
+    _instancia: Optional['CanalEventos'] = None
+    _lock: Lock = Lock()
+
+    MAX_FILA: int = 64
+    MAX_CONEXOES: int = 32
+    INTERVALO_PING_SEGUNDOS: float = 15.0
+    RETRY_MS: int = 5000
+
+    def __new__(cls) -> 'CanalEventos':
+        if cls._instancia is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = super().__new__(cls)
+                    cls._instancia._inicializar()
+        return cls._instancia
+
+    def _inicializar(self) -> None:
+        self._filas: Dict[str, Set[Queue]] = {}
+        # Assinatura do backend por usuário com conexões abertas (None: backend sem notificações)
+        self._observacoes: Dict[str, Optional[Callable[[], None]]] = {}
+        self._lock_filas = Lock()
+        self._publicados = 0
+        self._descartes = 0
+        self._recusadas = 0
+
+    def assinar(
+        self,
+        user_id: str,
+        fonte: Optional[Union[Armazenamento, OuvinteTransacoes]] = None,
+        max_conexoes: Optional[int] = None
+    ) -> Optional[Queue]:
+        """Abre uma conexão do usuário; None quando o processo já está no limite de conexões.
+
+        `fonte` é quem oferece observar: o backend ou, quando ativo, o ouvinte em tempo real.
+        """
+        limite = max_conexoes if max_conexoes is not None else self.MAX_CONEXOES
+        fila: Queue = Queue(maxsize=self.MAX_FILA)
+        with self._lock_filas:
+            if sum(len(filas) for filas in self._filas.values()) >= limite:
+                self._recusadas += 1
+                return None
+            filas = self._filas.setdefault(user_id, set())
+            primeira = not filas
+            filas.add(fila)
+
+        if primeira and fonte is not None:
+            self._observar(user_id, fonte)
+        return fila
+
+    def cancelar(self, user_id: str, fila: Queue) -> None:
+        cancelar_observacao = None
+        with self._lock_filas:
+            filas = self._filas.get(user_id)
+            if filas is None or fila not in filas:
+                return
+            filas.discard(fila)
+            if not filas:
+                del self._filas[user_id]
+                cancelar_observacao = self._observacoes.pop(user_id, None)
+        if cancelar_observacao is not None:
+            cancelar_observacao()
+
+    def publicar(self, user_id: str, evento: str, dados: Dict[str, Any]) -> int:
+        """Entrega o evento às conexões abertas do usuário; devolve quantas receberam."""
+        with self._lock_filas:
+            filas = list(self._filas.get(user_id, ()))
+            self._publicados += 1
+        if not filas:
+            return 0
+
+        mensagem = self.formatar(evento, dados)
+        for fila in filas:
+            try:
+                fila.put_nowait(mensagem)
+            except Full:
+                self._descartar_pendentes(fila)
+        return len(filas)
+
+    def publicar_local(self, user_id: str, evento: str, dados: Dict[str, Any]) -> int:
+        """Publica uma gravação feita neste processo, se o backend não a notificar por observar."""
+        with self._lock_filas:
+            if self._observacoes.get(user_id) is not None:
+                return 0
+        return self.publicar(user_id, evento, dados)
+
+    def _observar(self, user_id: str, fonte: Union[Armazenamento, OuvinteTransacoes]) -> None:
+        # O primeiro aviso de observar é o estado atual, que o cliente já exibe
+        estado_inicial = [True]
+
+        def ao_mudar_transacoes(mudancas: List[Mudanca]) -> None:
+            if estado_inicial[0]:
+                estado_inicial[0] = False
+                return
+            self._publicar_mudancas(user_id, mudancas)
+
+        try:
+            cancelar = fonte.observar(user_id, ao_mudar_transacoes, lambda _resumo: None)
+        except Exception as e:
+            print(f"Erro ao observar transações: {e}")
+            cancelar = None
+
+        with self._lock_filas:
+            if user_id in self._filas and user_id not in self._observacoes:
+                self._observacoes[user_id] = cancelar
+                return
+        # Última conexão encerrada (ou outra assinatura criada) enquanto esta era criada
+        if cancelar is not None:
+            cancelar()
+
+    def _publicar_mudancas(self, user_id: str, mudancas: List[Mudanca]) -> None:
+        novas = [documento for tipo, _, documento in mudancas if tipo == 'adicionado']
+        if len(novas) != len(mudancas):
+            # Alterações e remoções não têm delta no cliente
+            self.publicar(user_id, 'recarregar', {})
+        elif len(novas) == 1:
+            self.publicar(user_id, 'transacao', self.delta_transacao(Transacao.de_documento(novas[0])))
+        elif novas:
+            self.publicar(user_id, 'lote', {'quantidade': len(novas)})
+
+    @staticmethod
+    def delta_transacao(transacao: Transacao) -> Dict[str, Any]:
+        # Delta para o cliente: a nova linha e o incremento da categoria (O(1) por evento)
+        return {
+            'transacao': transacao,
+            'categoria': {
+                'categoria': transacao.categoria,
+                'tipo': transacao.obter_tipo(),
+                'incremento': float(transacao.valor)
+            }
+        }
+
+    def _descartar_pendentes(self, fila: Queue) -> None:
+        while True:
+            try:
+                fila.get_nowait()
+            except Empty:
+                break
+        try:
+            fila.put_nowait(self.formatar('recarregar', {}))
+        except Full:
+            pass
+        with self._lock_filas:
+            self._descartes += 1
+
+    def eventos(self, user_id: str, fila: Queue) -> Iterator[str]:
+        """Corpo da resposta SSE: eventos da fila e comentários periódicos que mantêm a conexão."""
+        try:
+            yield f'retry: {self.RETRY_MS}\n\n'
+            while True:
+                try:
+                    yield fila.get(timeout=self.INTERVALO_PING_SEGUNDOS)
+                except Empty:
+                    yield ': ping\n\n'
+        finally:
+            # Executado também quando o servidor fecha o gerador (cliente desconectou)
+            self.cancelar(user_id, fila)
+
+    @staticmethod
+    def formatar(evento: str, dados: Dict[str, Any]) -> str:
+        corpo = json.dumps(dados, default=serializar_valor, separators=(',', ':'))
+        return f'event: {evento}\ndata: {corpo}\n\n'
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock_filas:
+            return {
+                'usuarios': len(self._filas),
+                'conexoes': sum(len(filas) for filas in self._filas.values()),
+                'observados': sum(cancelar is not None for cancelar in self._observacoes.values()),
+                'publicados': self._publicados,
+                'descartes': self._descartes,
+                'recusadas': self._recusadas
+            }
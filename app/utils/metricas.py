@@ -0,0 +1,175 @@
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import time
+
+from flask import Flask, g, has_request_context, request, template_rendered, before_render_template
+
+
+PREFIXO = 'controle_financeiro'
+
+BUCKETS_SEGUNDOS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+BUCKETS_LEITURAS: Tuple[float, ...] = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+# Indicadores que só crescem desde o início do processo: exportados como counter (sufixo _total)
+CONTADORES = frozenset({
+    'acertos', 'acertos_sessao', 'falhas', 'despejos',
+    'requisicoes', 'erros', 'saturacoes',
+    'mudancas_aplicadas', 'desanexados',
+    'publicados', 'descartes', 'recusadas'
+})
+
+
+class Histograma:
+    """Histograma cumulativo no formato de exposição do Prometheus."""
+
+    def __init__(self, nome: str, descricao: str, buckets: Sequence[float]) -> None:
+        self.nome = f'{PREFIXO}_{nome}'
+        self.descricao = descricao
+        self._buckets = tuple(buckets)
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[Any]] = {}
+        self._lock = Lock()
+
+    def observar(self, valor: float, **rotulos: str) -> None:
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                # [contagens por bucket, soma, total]
+                serie = self._series[chave] = [[0] * len(self._buckets), 0.0, 0]
+            for i, limite in enumerate(self._buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self) -> List[str]:
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        with self._lock:
+            series = [(chave, list(contagens), soma, total) for chave, (contagens, soma, total) in self._series.items()]
+        for chave, contagens, soma, total in sorted(series):
+            rotulos = ','.join(f'{nome}="{valor}"' for nome, valor in chave)
+            separador = ',' if rotulos else ''
+            for limite, contagem in zip(self._buckets, contagens):
+                linhas.append(f'{self.nome}_bucket{{{rotulos}{separador}le="{limite}"}} {contagem}')
+            linhas.append(f'{self.nome}_bucket{{{rotulos}{separador}le="+Inf"}} {total}')
+            sufixo = f'{{{rotulos}}}' if rotulos else ''
+            linhas.append(f'{self.nome}_sum{sufixo} {soma}')
+            linhas.append(f'{self.nome}_count{sufixo} {total}')
+        return linhas
+
+
+class Metricas:
+    """Registro global das métricas de requisições e etapas (spans)."""
+
+    _instancia: Optional['Metricas'] = None
+    _lock: Lock = Lock()
+
+    def __new__(cls) -> 'Metricas':
+        if cls._instancia is None:
+            with cls._lock:
+                if cls._instancia is None:
+                    cls._instancia = super().__new__(cls)
+                    cls._instancia._inicializar()
+        return cls._instancia
+
+    def _inicializar(self) -> None:
+        self.spans = Histograma('span_duracao_segundos', 'Duração de cada etapa nomeada.', BUCKETS_SEGUNDOS)
+        self.requisicoes = Histograma('requisicao_duracao_segundos', 'Duração total das requisições.', BUCKETS_SEGUNDOS)
+        self.leituras = Histograma(
+            'leituras_documentos_por_requisicao', 'Documentos lidos do armazenamento por requisição.', BUCKETS_LEITURAS
+        )
+
+    def exportar(self, indicadores: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Texto do /metrics; `indicadores` são agrupados por prefixo (ex.: estatísticas de cache).
+
+        Os nomes em CONTADORES viram counters com sufixo _total; os demais, gauges.
+        """
+        linhas: List[str] = []
+        for histograma in (self.requisicoes, self.spans, self.leituras):
+            linhas.extend(histograma.exportar())
+        for grupo, valores in (indicadores or {}).items():
+            for nome, valor in valores.items():
+                if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                    continue
+                metrica = f'{PREFIXO}_{grupo}_{nome}'
+                if nome in CONTADORES:
+                    metrica += '_total'
+                    linhas.append(f'# TYPE {metrica} counter')
+                else:
+                    linhas.append(f'# TYPE {metrica} gauge')
+                linhas.append(f'{metrica} {valor}')
+        return '\n'.join(linhas) + '\n'
+
+
+@contextmanager
+def span(nome: str) -> Iterator[None]:
+    """Cronometra uma etapa: vai para o Server-Timing da requisição e para o histograma."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registrar_span(nome, time.perf_counter() - inicio)
+
+
+def _registrar_span(nome: str, duracao: float) -> None:
+    Metricas().spans.observar(duracao, span=nome)
+    if has_request_context() and hasattr(g, 'spans'):
+        g.spans[nome] = g.spans.get(nome, 0.0) + duracao
+
+
+def cronometrado(nome: str) -> Callable:
+    def decorador(funcao: Callable) -> Callable:
+        @wraps(funcao)
+        def envolvida(*args: Any, **kwargs: Any) -> Any:
+            with span(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def registrar_leituras(quantidade: int) -> None:
+    if has_request_context() and hasattr(g, 'leituras_documentos'):
+        g.leituras_documentos += quantidade
+
+
+def instrumentar(app: Flask) -> None:
+    """Registra os ganchos de medição de requisições e de renderização de templates."""
+
+    @app.before_request
+    def _iniciar_medicao() -> None:
+        g.inicio_requisicao = time.perf_counter()
+        g.spans = {}
+        g.leituras_documentos = 0
+
+    @app.after_request
+    def _emitir_server_timing(response):
+        if not hasattr(g, 'inicio_requisicao'):
+            return response
+        total = time.perf_counter() - g.inicio_requisicao
+        metricas = Metricas()
+        metricas.requisicoes.observar(total, rota=request.endpoint or 'desconhecida', metodo=request.method)
+        metricas.leituras.observar(g.leituras_documentos, rota=request.endpoint or 'desconhecida')
+
+        partes = [f'{nome};dur={duracao * 1000:.2f}' for nome, duracao in g.spans.items()]
+        partes.append(f'leituras;desc="{g.leituras_documentos} documentos"')
+        partes.append(f'total;dur={total * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(partes)
+        return response
+
+    # Sinais guardam referências fracas: os receptores ficam no nível do módulo
+    before_render_template.connect(_iniciar_render, app)
+    template_rendered.connect(_finalizar_render, app)
+
+
+def _iniciar_render(sender: Flask, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+    g.inicio_render = time.perf_counter()
+
+
+def _finalizar_render(sender: Flask, template: Any, context: Dict[str, Any], **extra: Any) -> None:
+    inicio = g.pop('inicio_render', None)
+    if inicio is not None:
+        _registrar_span('render', time.perf_counter() - inicio)
@@ -0,0 +1,142 @@
+from datetime import date, datetime
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, Iterable, List
+import json
+
+from flask import Flask, Response, current_app
+from flask.json.provider import DefaultJSONProvider
+
+from app.models.dinheiro import Dinheiro
+from app.models.transacao import Despesa, Receita, Transacao
+from app.utils.metricas import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+# Conversões por classe exata: uma busca em dicionário em vez de uma cadeia de isinstance
+_CONVERSORES: Dict[type, Callable[[Any], Any]] = {
+    Dinheiro: float,
+    Decimal: float,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    Receita: Receita.para_json,
+    Despesa: Despesa.para_json,
+}
+
+
+def serializar_valor(obj: Any) -> Any:
+    """Converte os tipos do domínio para tipos nativos do JSON."""
+    conversor = _CONVERSORES.get(type(obj))
+    if conversor is not None:
+        return conversor(obj)
+    # Subclasses (ex.: datetime com fuso de outra biblioteca)
+    for tipo, conversor in _CONVERSORES.items():
+        if isinstance(obj, tipo):
+            return conversor(obj)
+    return DefaultJSONProvider.default(obj)
+
+
+class CustomJSONProvider(DefaultJSONProvider):
+    """Provider JSON com conversão direta de Dinheiro, Decimal, datas e transações."""
+
+    default = staticmethod(serializar_valor)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with span('serializacao'):
+            return super().dumps(obj, **kwargs)
+
+
+class OrjsonJSONProvider(CustomJSONProvider):
+    """Provider baseado em orjson (opcional); mesma conversão de tipos do domínio.
+
+    A saída é UTF-8 sem escapes \\uXXXX, equivalente à do provider padrão.
+    """
+
+    def _opcoes(self, kwargs: Dict[str, Any]) -> int:
+        opcoes = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            opcoes |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with span('serializacao'):
+            return orjson.dumps(obj, default=serializar_valor, option=self._opcoes(kwargs)).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            # Opções do json padrão (ex.: object_hook da sessão assinada) não existem no orjson
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = {'indent': 2} if self.compact is False or (self.compact is None and self._app.debug) else {}
+        with span('serializacao'):
+            corpo = orjson.dumps(obj, default=serializar_valor, option=self._opcoes(indent))
+        return self._app.response_class(corpo + b'\n', mimetype=self.mimetype)
+
+
+def configurar_json(app: Flask) -> None:
+    """Usa orjson quando instalado (JSON_ORJSON=auto), com o provider padrão como alternativa."""
+    usar_orjson = app.config.get('JSON_ORJSON', 'auto') != 'nao' and orjson is not None
+    app.json_provider_class = OrjsonJSONProvider if usar_orjson else CustomJSONProvider
+    app.json = app.json_provider_class(app)
+
+
+def _texto(valor: Any) -> str:
+    if valor.__class__ is str:
+        return encode_basestring_ascii(valor)
+    return json.dumps(valor, default=serializar_valor)
+
+
+# Moldes com as chaves já ordenadas e escapadas: por linha, só os valores são codificados
+_MOLDE_RECEITA = '{"categoria":%s,"conta_destino":%s,"data":%s,"descricao":%s,"tipo":"receita","valor":%r}'
+_MOLDE_DESPESA = (
+    '{"categoria":%s,"data":%s,"descricao":%s,"estabelecimento":%s,'
+    '"metodo_pagamento":%s,"tipo":"despesa","valor":%r}'
+)
+
+
+def codificar_transacao(t: Transacao) -> str:
+    """JSON de uma transação, idêntico ao de para_json() com chaves ordenadas."""
+    if isinstance(t, Receita):
+        return _MOLDE_RECEITA % (
+            _texto(t.categoria), _texto(t.conta_destino), _texto(t.data_texto),
+            _texto(t.descricao), float(t.valor)
+        )
+    return _MOLDE_DESPESA % (
+        _texto(t.categoria), _texto(t.data_texto), _texto(t.descricao),
+        _texto(t.estabelecimento), _texto(t.metodo_pagamento), float(t.valor)
+    )
+
+
+def codificar_transacoes(transacoes: Iterable[Transacao]) -> str:
+    return '[' + ','.join([codificar_transacao(t) for t in transacoes]) + ']'
+
+
+def resposta_transacoes(dados: Dict[str, Any], chave: str = 'transacoes') -> Response:
+    """Resposta JSON de uma listagem. Sem orjson, a lista de transações usa os moldes
+    pré-montados e os demais campos passam pelo provider da aplicação."""
+    provider = current_app.json
+    if isinstance(provider, OrjsonJSONProvider) or provider.compact is False or (
+        provider.compact is None and current_app.debug
+    ):
+        # orjson já é mais rápido que os moldes; saída indentada (debug) também fica com o provider
+        return provider.response(dados)
+
+    with span('serializacao'):
+        partes: List[str] = []
+        for nome in sorted(dados):
+            if nome == chave:
+                valor = codificar_transacoes(dados[nome])
+            else:
+                valor = provider.dumps(dados[nome])
+            partes.append(f'{encode_basestring_ascii(nome)}:{valor}')
+        corpo = '{' + ','.join(partes) + '}\n'
+    return current_app.response_class(corpo, mimetype=provider.mimetype)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Os benchmarks rodam sempre offline; o backend real é escolhido por --backend
+os.environ['BACKEND_ARMAZENAMENTO'] = 'memoria'
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000]
+LOTE_FORMULARIOS = 100
+
+
+def executar(args: argparse.Namespace) -> int:
+    import numpy as np
+    from flask_login import login_user
+
+    from app import criar_app
+    from app.builders.cache_dashboard import CacheDashboard
+    from app.models.armazenamento import ArmazenamentoMemoria, ArmazenamentoSQLite
+    from app.models.user import User
+    from benchmarks.casos import CASOS, ContextoBenchmark
+    from benchmarks.gerador import gerar_formularios, gerar_transacoes
+    from benchmarks.medicao import medir
+
+    casos = [caso for caso in CASOS if not args.casos or caso.nome in args.casos]
+    app = criar_app()
+    resultados: List[Dict[str, Any]] = []
+    user_id = 'benchmark'
+
+    with app.test_request_context():
+        login_user(User(uid=user_id, email='benchmark@exemplo.com', nome='Benchmark'))
+        formularios = list(gerar_formularios(LOTE_FORMULARIOS, args.semente))
+        ctx = ContextoBenchmark(user_id, formularios)
+
+        for i, tamanho in enumerate(args.tamanhos):
+            with tempfile.TemporaryDirectory() as diretorio:
+                if args.backend == 'sqlite':
+                    armazenamento = ArmazenamentoSQLite(os.path.join(diretorio, 'benchmark.db'))
+                else:
+                    armazenamento = ArmazenamentoMemoria()
+                ctx.banco.usar_armazenamento(armazenamento)
+                # Versões recomeçam no backend novo: dashboards do tamanho anterior não servem
+                CacheDashboard().limpar()
+
+                inicio = time.perf_counter()
+                ctx.banco.salvar_transacoes_em_lote(user_id, gerar_transacoes(tamanho, args.semente))
+                print(f'{tamanho} transações geradas em {time.perf_counter() - inicio:.1f}s', file=sys.stderr)
+
+                for caso in casos:
+                    if not caso.por_tamanho and i > 0:
+                        continue
+                    funcao, preparar = caso.montar(ctx)
+                    medida = medir(funcao, preparar, duracao_minima=args.duracao)
+                    resultado = {
+                        'caso': caso.nome,
+                        'tamanho': tamanho if caso.por_tamanho else None,
+                        **medida
+                    }
+                    resultados.append(resultado)
+                    print(_formatar(resultado), file=sys.stderr)
+
+    saida = {
+        'metadados': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'backend': args.backend,
+            'semente': args.semente,
+            'tamanhos': args.tamanhos
+        },
+        'resultados': resultados
+    }
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(saida, arquivo, indent=2, ensure_ascii=False)
+    print(f'Resultados gravados em {args.saida}', file=sys.stderr)
+
+    if args.baseline:
+        return _comparar_arquivos(args.baseline, args.saida, args.tolerancia)
+    return 0
+
+
+def comparar(args: argparse.Namespace) -> int:
+    return _comparar_arquivos(args.baseline, args.atual, args.tolerancia)
+
+
+def _comparar_arquivos(caminho_base: str, caminho_atual: str, tolerancia: float) -> int:
+    """Compara dois resultados; regressão = ops/s menor ou p99 maior além da tolerância."""
+    base = _indexar(caminho_base)
+    atual = _indexar(caminho_atual)
+    regressoes = 0
+
+    for chave in sorted(atual, key=lambda c: (c[0], c[1] or 0)):
+        if chave not in base:
+            continue
+        antes, depois = base[chave], atual[chave]
+        variacao_ops = depois['ops_por_segundo'] / antes['ops_por_segundo'] - 1
+        variacao_p99 = depois['p99_ms'] / antes['p99_ms'] - 1 if antes['p99_ms'] else 0.0
+        regressao = variacao_ops < -tolerancia or variacao_p99 > tolerancia
+        regressoes += regressao
+        caso, tamanho = chave
+        print(
+            f"{'REGRESSÃO' if regressao else 'ok':>9}  {caso:<40} {str(tamanho or '-'):>8}  "
+            f"ops/s {variacao_ops:+7.1%}  p99 {variacao_p99:+7.1%}"
+        )
+
+    print(f'{regressoes} regressão(ões) acima de {tolerancia:.0%}.')
+    return 1 if regressoes else 0
+
+
+def _indexar(caminho: str) -> Dict[Tuple[str, Optional[int]], Dict[str, Any]]:
+    with open(caminho, encoding='utf-8') as arquivo:
+        dados = json.load(arquivo)
+    return {(r['caso'], r['tamanho']): r for r in dados['resultados']}
+
+
+def _formatar(resultado: Dict[str, Any]) -> str:
+    return (
+        f"{resultado['caso']:<40} {str(resultado['tamanho'] or '-'):>8}  "
+        f"{resultado['ops_por_segundo']:>10.1f} ops/s  p50 {resultado['p50_ms']:8.2f} ms  "
+        f"p99 {resultado['p99_ms']:8.2f} ms  pico {resultado['memoria_pico_kb']:10.1f} KiB"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks dos caminhos críticos.')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p_executar = comandos.add_parser('executar', help='Mede os caminhos críticos com usuários sintéticos.')
+    p_executar.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                            help='Quantidades de transações por usuário (ex.: 1000 10000 1000000).')
+    p_executar.add_argument('--semente', type=int, default=42)
+    p_executar.add_argument('--backend', choices=['memoria', 'sqlite'], default='memoria')
+    p_executar.add_argument('--casos', nargs='*', help='Executar apenas estes casos.')
+    p_executar.add_argument('--duracao', type=float, default=1.0, help='Tempo mínimo de medição por caso (s).')
+    p_executar.add_argument('--saida', default='benchmarks/resultados.json')
+    p_executar.add_argument('--baseline', help='Comparar com este resultado ao final.')
+    p_executar.add_argument('--tolerancia', type=float, default=0.10)
+    p_executar.set_defaults(funcao=executar)
+
+    p_comparar = comandos.add_parser('comparar', help='Aponta regressões em relação a um resultado de referência.')
+    p_comparar.add_argument('baseline')
+    p_comparar.add_argument('atual')
+    p_comparar.add_argument('--tolerancia', type=float, default=0.10)
+    p_comparar.set_defaults(funcao=comparar)
+
+    args = parser.parse_args(argv)
+    return args.funcao(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import types
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+from app.adapters.request_adapter import RequestAdapter
+from app.builders.cache_dashboard import CacheDashboard
+from app.builders.dashboard_builder import DashboardBuilder
+from app.controllers.transacao_controller import TransacaoController
+from app.models.banco_de_dados import BancoDeDados
+from app.utils.serializacao import CustomJSONProvider, OrjsonJSONProvider, orjson, resposta_transacoes
+
+
+Funcao = Callable[[], Any]
+
+
+class Caso:
+    """Um caminho crítico medido: monta (função medida, preparação por iteração)."""
+
+    def __init__(
+        self,
+        nome: str,
+        montar: Callable[['ContextoBenchmark'], Tuple[Funcao, Optional[Funcao]]],
+        por_tamanho: bool = True
+    ) -> None:
+        self.nome = nome
+        self.montar = montar
+        # Casos que não dependem do histórico rodam uma única vez
+        self.por_tamanho = por_tamanho
+
+
+class ContextoBenchmark:
+    def __init__(self, user_id: str, formularios: List[Dict[str, str]]) -> None:
+        self.user_id = user_id
+        self.formularios = formularios
+        self.banco = BancoDeDados()
+        self.controller = TransacaoController()
+
+
+def _dashboard_frio(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    # Caches vazios: inclui a leitura do histórico no armazenamento
+    def preparar() -> None:
+        ctx.banco.invalidar_cache(ctx.user_id)
+        CacheDashboard().limpar()
+
+    return lambda: DashboardBuilder().build_completo(), preparar
+
+
+def _dashboard_agregacao(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    # Histórico em cache, mas sem o dashboard pronto: mede a agregação
+    return lambda: DashboardBuilder().build_completo(), CacheDashboard().limpar
+
+
+def _dashboard_quente(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    return lambda: DashboardBuilder().build_completo(), None
+
+
+def _dashboard_filtrado(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    def funcao() -> Dict[str, Any]:
+        return (DashboardBuilder()
+                .com_filtros(data_inicio='2025-03-15', data_fim='2025-10-20', categoria='Alimentação')
+                .com_saldo_total()
+                .com_transacoes_recentes()
+                .com_resumo_por_categoria()
+                .com_estatisticas_adicionais()
+                .com_dados_grafico()
+                .build())
+
+    return funcao, lambda: ctx.banco.invalidar_cache(ctx.user_id)
+
+
+def _listar_transacoes(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    return lambda: ctx.controller.listar_transacoes(), None
+
+
+def _resumo_financeiro(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    return lambda: ctx.controller.obter_resumo_financeiro(), None
+
+
+def _adaptar_formulario(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    # Cada operação adapta um lote de formulários (custo por formulário = tempo / lote)
+    def funcao() -> None:
+        for formulario in ctx.formularios:
+            RequestAdapter.adaptar_formulario_transacao(formulario)
+
+    return funcao, None
+
+
+def _adaptar_lote(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    # Mesmo lote do caso anterior, validado coluna a coluna
+    return lambda: RequestAdapter.adaptar_lote_transacoes(ctx.formularios), None
+
+
+def _pagina_transacoes(ctx: ContextoBenchmark) -> Dict[str, Any]:
+    return ctx.controller.listar_transacoes(limite=500)
+
+
+def _serializar_provider(classe: type) -> Callable[[ContextoBenchmark], Tuple[Funcao, Optional[Funcao]]]:
+    # Página de 500 linhas serializada pelo provider, via para_json() de cada transação
+    def montar(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+        provider = classe(current_app._get_current_object())
+        dados = _pagina_transacoes(ctx)
+        return lambda: provider.response(dados), None
+    return montar
+
+
+class ProviderOriginal(DefaultJSONProvider):
+    """Provider JSON anterior à serialização rápida, mantido só como referência de medida."""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        if isinstance(obj, date):
+            return obj.isoformat()
+        if isinstance(obj, (types.MethodType, types.FunctionType, types.BuiltinMethodType, types.BuiltinFunctionType)):
+            try:
+                return obj()
+            except Exception:
+                return str(obj)
+        return super().default(obj)
+
+
+def _serializar_original(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    # Referência: a mesma página no caminho antigo, com o dicionário de cada
+    # linha montado como no controller original e o provider original
+    provider = ProviderOriginal(current_app._get_current_object())
+    dados = _pagina_transacoes(ctx)
+    documentos, _ = ctx.banco.listar_pagina(ctx.user_id, 500)
+
+    def funcao() -> Any:
+        transacoes = []
+        for t in documentos:
+            transacao = {
+                'tipo': str(t.get('tipo', '')),
+                'valor': float(t.get('valor', 0)),
+                'data': str(t.get('data', '')),
+                'descricao': str(t.get('descricao', '')),
+                'categoria': str(t.get('categoria', ''))
+            }
+            if t.get('tipo') == 'receita':
+                transacao['conta_destino'] = str(t.get('conta_destino', ''))
+            else:
+                transacao['metodo_pagamento'] = str(t.get('metodo_pagamento', ''))
+                transacao['estabelecimento'] = str(t.get('estabelecimento', ''))
+            transacoes.append(transacao)
+        return provider.response({**dados, 'transacoes': transacoes})
+
+    return funcao, None
+
+
+def _serializar_moldes(ctx: ContextoBenchmark) -> Tuple[Funcao, Optional[Funcao]]:
+    dados = _pagina_transacoes(ctx)
+    return lambda: resposta_transacoes(dados), None
+
+
+CASOS: List[Caso] = [
+    Caso('dashboard.build_completo.frio', _dashboard_frio),
+    Caso('dashboard.build_completo.agregacao', _dashboard_agregacao),
+    Caso('dashboard.build_completo.quente', _dashboard_quente),
+    Caso('dashboard.filtrado.frio', _dashboard_filtrado),
+    Caso('controller.listar_transacoes', _listar_transacoes),
+    Caso('controller.obter_resumo_financeiro', _resumo_financeiro),
+    Caso('adapter.adaptar_formulario_transacao', _adaptar_formulario, por_tamanho=False),
+    Caso('adapter.adaptar_lote_transacoes', _adaptar_lote, por_tamanho=False),
+    Caso('json.transacoes.original', _serializar_original, por_tamanho=False),
+    Caso('json.transacoes.provider_padrao', _serializar_provider(CustomJSONProvider), por_tamanho=False),
+    Caso('json.transacoes.moldes', _serializar_moldes, por_tamanho=False),
+]
+
+if orjson is not None:
+    CASOS.append(Caso('json.transacoes.orjson', _serializar_provider(OrjsonJSONProvider), por_tamanho=False))
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+import math
+import random
+
+from app.adapters.request_adapter import RequestAdapter
+from app.models.transacao_factory import TransacaoFactory
+
+
+# (categoria, peso, mediana do valor em reais)
+CATEGORIAS_RECEITA: List[Tuple[str, float, float]] = [
+    ('Salário', 0.55, 5200.0),
+    ('Freelance', 0.25, 900.0),
+    ('Investimentos', 0.20, 150.0),
+]
+CATEGORIAS_DESPESA: List[Tuple[str, float, float]] = [
+    ('Alimentação', 0.32, 45.0),
+    ('Transporte', 0.18, 28.0),
+    ('Lazer', 0.14, 80.0),
+    ('Saúde', 0.08, 120.0),
+    ('Moradia', 0.06, 1400.0),
+    ('Educação', 0.05, 350.0),
+    ('Outros', 0.17, 60.0),
+]
+PROPORCAO_RECEITAS = 0.12
+METODOS_PAGAMENTO = ['Cartão de Crédito', 'Cartão de Débito', 'PIX', 'Dinheiro', 'Boleto']
+ESTABELECIMENTOS = ['Mercado Central', 'Posto Avenida', 'Farmácia Popular', 'Restaurante Sabor', 'Loja Online', 'Padaria']
+CONTAS = ['Conta Corrente', 'Poupança', 'Conta Investimento']
+
+# Data final fixa: a mesma semente gera sempre o mesmo histórico
+DATA_FINAL = datetime(2025, 12, 31)
+
+
+def gerar_formularios(quantidade: int, semente: int = 42, meses: int = 24) -> Iterator[Dict[str, str]]:
+    """Formulários de transação (como enviados pelo navegador) com distribuições realistas.
+
+    Valores seguem uma log-normal em torno da mediana de cada categoria e as
+    datas são uniformes nos últimos `meses` meses.
+    """
+    aleatorio = random.Random(semente)
+    dias = meses * 30
+    receitas = _sorteio(CATEGORIAS_RECEITA)
+    despesas = _sorteio(CATEGORIAS_DESPESA)
+
+    for _ in range(quantidade):
+        eh_receita = aleatorio.random() < PROPORCAO_RECEITAS
+        categoria, mediana = (receitas if eh_receita else despesas)(aleatorio)
+        valor = round(aleatorio.lognormvariate(math.log(mediana), 0.6), 2) or 0.01
+        data = DATA_FINAL - timedelta(days=aleatorio.randrange(dias))
+
+        formulario = {
+            'tipo': 'receita' if eh_receita else 'despesa',
+            'valor': f'{valor:.2f}',
+            'data': data.strftime('%Y-%m-%d'),
+            'descricao': f'{categoria} #{aleatorio.randrange(1000)}',
+            'categoria': categoria
+        }
+        if eh_receita:
+            formulario['conta_destino'] = aleatorio.choice(CONTAS)
+        else:
+            formulario['metodo_pagamento'] = aleatorio.choice(METODOS_PAGAMENTO)
+            formulario['estabelecimento'] = aleatorio.choice(ESTABELECIMENTOS)
+        yield formulario
+
+
+def gerar_transacoes(quantidade: int, semente: int = 42, meses: int = 24) -> Iterator[Dict[str, Any]]:
+    """Documentos de transação produzidos pelo mesmo caminho do cadastro (Adapter + Factory)."""
+    for formulario in gerar_formularios(quantidade, semente, meses):
+        dados = RequestAdapter.adaptar_formulario_transacao(formulario)
+        yield TransacaoFactory.criar_transacao(**dados).para_dicionario()
+
+
+def _sorteio(categorias: List[Tuple[str, float, float]]):
+    nomes = [(nome, mediana) for nome, _, mediana in categorias]
+    pesos = [peso for _, peso, _ in categorias]
+
+    def sortear(aleatorio: random.Random) -> Tuple[str, float]:
+        return aleatorio.choices(nomes, weights=pesos)[0]
+
+    return sortear
@@ -0,0 +1,55 @@
+from typing import Any, Callable, Dict, List, Optional
+import time
+import tracemalloc
+
+
+def medir(
+    funcao: Callable[[], Any],
+    preparar: Optional[Callable[[], Any]] = None,
+    duracao_minima: float = 1.0,
+    min_iteracoes: int = 5,
+    max_iteracoes: int = 10_000
+) -> Dict[str, Any]:
+    """Executa `funcao` repetidamente e devolve ops/s, p50/p99 e pico de memória.
+
+    `preparar` roda antes de cada chamada, fora do tempo medido (ex.: esfriar
+    um cache). O pico de memória vem de uma execução extra sob tracemalloc,
+    para não distorcer os tempos.
+    """
+    if preparar:
+        preparar()
+    funcao()  # aquecimento
+
+    tempos: List[float] = []
+    inicio = time.perf_counter()
+    while len(tempos) < max_iteracoes and (
+        len(tempos) < min_iteracoes or time.perf_counter() - inicio < duracao_minima
+    ):
+        if preparar:
+            preparar()
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tempos.sort()
+    total = sum(tempos)
+    return {
+        'iteracoes': len(tempos),
+        'ops_por_segundo': len(tempos) / total if total else float('inf'),
+        'p50_ms': _percentil(tempos, 0.50) * 1000,
+        'p99_ms': _percentil(tempos, 0.99) * 1000,
+        'memoria_pico_kb': pico / 1024
+    }
+
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from app.builders.agregador_dashboard import AgregadorDashboard
+from app.models.dinheiro import Dinheiro
+from app.models.transacao_frame import TransacaoFrame
+
+
+def _despesa(categoria: str, centavos: int, dia: int = 10):
+    return {
+        'tipo': 'despesa',
+        'valor_centavos': centavos,
+        'valor': centavos / 100,
+        'data_ts': datetime(2024, 3, dia),
+        'categoria': categoria
+    }
+
+
+def _resumo(categoria: str, centavos: int, quantidade: int = 1):
+    return {
+        'tipo': 'despesa',
+        'mes': '2024-02',
+        'categoria': categoria,
+        'categoria_chave': categoria.strip().lower(),
+        'soma_centavos': centavos,
+        'quantidade': quantidade,
+        'minimo_centavos': centavos,
+        'maximo_centavos': centavos
+    }
+
+
+def test_resumos_e_frame_agrupam_pela_chave_da_categoria():
+    frame = TransacaoFrame.de_transacoes([_despesa('alimentação', 500), _despesa(' Alimentação ', 250, dia=11)])
+    agregador = AgregadorDashboard().adicionar_resumos([_resumo('Alimentação', 1000, 2)]).agregar(frame)
+
+    assert agregador.despesas_por_categoria == {'Alimentação': Dinheiro(1750)}
+    assert agregador.quantidade_despesas == 4
+
+
+def test_nome_exibido_nao_depende_da_ordem_das_leituras():
+    frame = TransacaoFrame.de_transacoes([_despesa('alimentação', 500)])
+    primeiro = AgregadorDashboard().agregar(frame).adicionar_resumos([_resumo('Alimentação', 1000)])
+    segundo = AgregadorDashboard().adicionar_resumos([_resumo('Alimentação', 1000)]).agregar(frame)
+
+    assert primeiro.despesas_por_categoria == segundo.despesas_por_categoria == {'Alimentação': Dinheiro(1500)}
@@ -0,0 +1,17 @@
+import pytest
+
+from app import criar_app
+
+
+@pytest.mark.parametrize('assincrono, view', [(False, 'index'), (True, 'index_assincrono')])
+def test_dashboard_registrado_pelo_blueprint(monkeypatch, assincrono, view):
+    monkeypatch.setenv('BACKEND_ARMAZENAMENTO', 'memoria')
+    app = criar_app(assincrono=assincrono)
+
+    assert app.view_functions['main.index'].__name__ == view
+    [regra] = [regra for regra in app.url_map.iter_rules() if regra.endpoint == 'main.index']
+    assert regra.rule == '/'
+    # Sem login, ambas as versões redirecionam para a página de login
+    resposta = app.test_client().get('/')
+    assert resposta.status_code == 302
+    assert '/login' in resposta.headers['Location']
@@ -0,0 +1,260 @@
+from collections import defaultdict
+from datetime import datetime
+import itertools
+
+import pytest
+
+firestore = pytest.importorskip('firebase_admin.firestore')
+
+from app.models.armazenamento.armazenamento_firestore import ArmazenamentoFirestore
+from app.models.dinheiro import Dinheiro
+from app.models.transacao_factory import TransacaoFactory
+
+
+class _Referencia:
+
+    def __init__(self, banco: '_BancoFalso', colecao: str, doc_id: str) -> None:
+        self._banco = banco
+        self.colecao = colecao
+        self.id = doc_id
+
+    def get(self, field_paths=None, transaction=None) -> '_Documento':
+        if self.colecao == 'resumos':
+            return _Documento(self._banco.resumo, self.id)
+        if self.colecao == 'resumos_mensais':
+            return _Documento(self._banco.mensais.get(self.id), self.id)
+        return _Documento(None, self.id)
+
+
+class _Documento:
+
+    def __init__(self, dados, doc_id=None) -> None:
+        self._dados = dados
+        self.id = doc_id
+        self.exists = dados is not None
+
+    def to_dict(self):
+        return self._dados
+
+    def get(self, campo):
+        return self._dados[campo]
+
+
+class _Lote:
+
+    def __init__(self, banco: '_BancoFalso') -> None:
+        self._banco = banco
+        self.escritas = []
+
+    def set(self, ref, dados, merge=False) -> None:
+        self.escritas.append(('set', ref, dados))
+
+    def update(self, ref, dados) -> None:
+        self.escritas.append(('update', ref, dados))
+
+    def delete(self, ref) -> None:
+        self.escritas.append(('delete', ref, None))
+
+    def commit(self) -> None:
+        if len(self._banco.commits) == self._banco.falhar_no_commit:
+            raise RuntimeError('falha simulada')
+        self._banco.commits.append(self.escritas)
+
+
+class _Consulta:
+
+    def __init__(self, banco: '_BancoFalso', nome: str) -> None:
+        self._banco = banco
+        self._nome = nome
+
+    def where(self, filter=None) -> '_Consulta':
+        return self
+
+    def select(self, campos) -> '_Consulta':
+        return self
+
+    def get(self, transaction=None):
+        if self._nome == 'transacoes':
+            return [_Documento(t, f'h{i}') for i, t in enumerate(self._banco.historico)]
+        if self._nome == 'resumos_mensais':
+            return [_Documento(dados, doc_id) for doc_id, dados in self._banco.mensais.items()]
+        return [_Documento(self._banco.resumo, 'u9')] if self._banco.resumo is not None else []
+
+    def stream(self):
+        return iter(self.get())
+
+
+class _Colecao(_Consulta):
+
+    def document(self, doc_id=None) -> _Referencia:
+        return _Referencia(self._banco, self._nome, doc_id or f'auto{next(self._banco.ids)}')
+
+
+class _BancoFalso:
+
+    def __init__(self, resumo) -> None:
+        self.resumo = resumo
+        self.historico = []
+        self.mensais = {}
+        self.commits = []
+        self.falhar_no_commit = None
+        self.ids = itertools.count()
+
+    def collection(self, nome: str) -> _Colecao:
+        return _Colecao(self, nome)
+
+    def batch(self) -> _Lote:
+        return _Lote(self)
+
+    def transaction(self) -> _Lote:
+        return _Lote(self)
+
+
+def _transacional(funcao):
+    # Uma tentativa, com o commit ao final, como @firestore.transactional sem contenção
+    def executar(transaction):
+        resultado = funcao(transaction)
+        transaction.commit()
+        return resultado
+
+    return executar
+
+
+def _transacoes(quantidade: int):
+    for i in range(quantidade):
+        yield TransacaoFactory.criar_transacao(
+            tipo='despesa' if i % 3 else 'receita',
+            valor=Dinheiro(100 + i),
+            data=datetime(2024, 1 + i % 12, 1 + i % 28),
+            descricao='Teste',
+            categoria=f'Categoria {i % 40}',
+            metodo_pagamento='Pix',
+            estabelecimento='Mercado',
+            conta_destino='Conta'
+        ).para_dicionario()
+
+
+@pytest.fixture
+def armazenamento():
+    armazenamento = object.__new__(ArmazenamentoFirestore)
+    armazenamento.db = _BancoFalso({'saldo_centavos': 0, 'versao': 3})
+    return armazenamento
+
+
+def test_cada_lote_leva_os_proprios_agregados(armazenamento):
+    transacoes = list(_transacoes(1200))
+    assert armazenamento.salvar_em_lote('u1', iter(transacoes)) == 1200
+
+    commits = armazenamento.db.commits
+    assert len(commits) >= 3
+    documentos = 0
+    totais = defaultdict(int)
+    for escritas in commits:
+        assert len(escritas) <= ArmazenamentoFirestore.LIMITE_ESCRITAS_LOTE
+        novos = [dados for op, ref, dados in escritas if ref.colecao == 'transacoes']
+        mensais = [(ref, dados) for op, ref, dados in escritas if ref.colecao == 'resumos_mensais']
+        [(op, _, resumo)] = [(op, ref, dados) for op, ref, dados in escritas if ref.colecao == 'resumos']
+        assert op == 'update'
+        assert resumo['versao'].value == 1
+        assert resumo['quantidade_receitas'].value + resumo['quantidade_despesas'].value == len(novos)
+        assert sum(dados['quantidade'].value for _, dados in mensais) == len(novos)
+        assert len({ref.id for ref, _ in mensais}) == len(mensais)
+        for _, dados in mensais:
+            assert isinstance(dados['minimo_centavos'], firestore.Minimum)
+            assert isinstance(dados['maximo_centavos'], firestore.Maximum)
+        documentos += len(novos)
+        totais['saldo'] += resumo['saldo_centavos'].value
+
+    assert documentos == 1200
+    esperado = sum(t['valor_centavos'] * (1 if t['tipo'] == 'receita' else -1) for t in transacoes)
+    assert totais['saldo'] == esperado
+
+
+def test_falha_no_meio_mantem_os_lotes_gravados_coerentes(armazenamento):
+    armazenamento.db.falhar_no_commit = 1
+    with pytest.raises(RuntimeError):
+        armazenamento.salvar_em_lote('u1', _transacoes(800))
+
+    [escritas] = armazenamento.db.commits
+    novos = sum(ref.colecao == 'transacoes' for _, ref, _ in escritas)
+    [resumo] = [dados for _, ref, dados in escritas if ref.colecao == 'resumos']
+    assert resumo['quantidade_receitas'].value + resumo['quantidade_despesas'].value == novos
+
+
+def _saldo(transacoes) -> int:
+    return sum(t['valor_centavos'] * (1 if t['tipo'] == 'receita' else -1) for t in transacoes)
+
+
+@pytest.fixture
+def sem_resumo(armazenamento, monkeypatch):
+    # Usuário com histórico anterior aos resumos (e um resumo mensal que ele não produz mais)
+    monkeypatch.setattr(firestore, 'transactional', _transacional)
+    armazenamento.db.resumo = None
+    armazenamento.db.historico = list(_transacoes(30))
+    armazenamento.db.mensais = {'u1_2019-01_despesa_extinta': {'user_id': 'u1', 'mes': '2019-01'}}
+    return armazenamento
+
+
+def test_primeira_gravacao_materializa_o_historico(sem_resumo):
+    nova = next(_transacoes(1))
+    sem_resumo.salvar('u1', nova)
+
+    [escritas] = sem_resumo.db.commits
+    [(op, resumo)] = [(op, dados) for op, ref, dados in escritas if ref.colecao == 'resumos']
+    assert op == 'set'
+    assert resumo['versao'] == 1
+    assert resumo['saldo_centavos'] == _saldo(sem_resumo.db.historico + [nova])
+    assert resumo['quantidade_receitas'] + resumo['quantidade_despesas'] == 31
+    mensais = [(op, ref.id, dados) for op, ref, dados in escritas if ref.colecao == 'resumos_mensais']
+    assert ('delete', 'u1_2019-01_despesa_extinta', None) in mensais
+    assert sum(dados['quantidade'] for op, _, dados in mensais if op == 'set') == 31
+    assert sum(ref.colecao == 'transacoes' for _, ref, _ in escritas) == 1
+
+
+def test_lote_materializa_o_historico_antes_dos_incrementos(sem_resumo):
+    transacoes = list(_transacoes(10))
+    assert sem_resumo.salvar_em_lote('u1', iter(transacoes)) == 10
+
+    materializacao, lote = sem_resumo.db.commits
+    [criado] = [dados for op, ref, dados in materializacao if ref.colecao == 'resumos']
+    [incrementos] = [dados for op, ref, dados in lote if ref.colecao == 'resumos']
+    assert criado['saldo_centavos'] == _saldo(sem_resumo.db.historico)
+    assert criado['saldo_centavos'] + incrementos['saldo_centavos'].value == _saldo(sem_resumo.db.historico + transacoes)
+    assert sum(ref.colecao == 'transacoes' for _, ref, _ in lote) == 10
+
+
+def test_leituras_sem_resumo_calculam_do_historico_sem_gravar(sem_resumo):
+    sem_resumo.reconciliar_resumos = lambda user_id=None: pytest.fail('reconciliação na leitura')
+
+    resumo = sem_resumo.obter_resumo('u1')
+    assert resumo['saldo_centavos'] == _saldo(sem_resumo.db.historico)
+    assert resumo['quantidade_receitas'] + resumo['quantidade_despesas'] == 30
+
+    mensais = sem_resumo.obter_resumos_mensais('u1', '2024-02', '2024-03')
+    assert {mensal['mes'] for mensal in mensais} == {'2024-02', '2024-03'}
+    assert sum(mensal['quantidade'] for mensal in mensais) == sum(
+        t['data_ts'].month in (2, 3) for t in sem_resumo.db.historico
+    )
+    assert sem_resumo.db.commits == []
+
+
+def test_reconciliacao_regrava_na_transacao_e_remove_mensais_extintos(sem_resumo):
+    sem_resumo.db.resumo = {'saldo_centavos': 1, 'versao': 7}
+
+    [(user_id, resumo)] = sem_resumo.reconciliar_resumos('u1').items()
+    assert user_id == 'u1'
+    assert resumo['saldo_centavos'] == _saldo(sem_resumo.db.historico)
+
+    [escritas] = sem_resumo.db.commits
+    [gravado] = [dados for op, ref, dados in escritas if ref.colecao == 'resumos']
+    assert gravado['versao'] == 8
+    assert ('delete', 'u1_2019-01_despesa_extinta') in [(op, ref.id) for op, ref, _ in escritas]
+
+
+def test_reconciliacao_geral_inclui_usuarios_so_com_resumo(sem_resumo):
+    sem_resumo.db.resumo = {'saldo_centavos': 1, 'versao': 2}
+    for transacao in sem_resumo.db.historico:
+        transacao['user_id'] = 'u1'
+
+    assert set(sem_resumo.reconciliar_resumos()) == {'u1', 'u9'}
+    assert len(sem_resumo.db.commits) == 2
@@ -0,0 +1,115 @@
+import math
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.models.armazenamento import ArmazenamentoMemoria
+from app.models.armazenamento.armazenamento_sqlite import ArmazenamentoSQLite
+from app.models.banco_de_dados import BancoDeDados
+from benchmarks.gerador import gerar_transacoes
+
+
+def _documentos(quantidade, semente=42):
+    return [BancoDeDados._preparar_documento('u1', t) for t in gerar_transacoes(quantidade, semente)]
+
+
+@pytest.fixture
+def backends(tmp_path):
+    sqlite = ArmazenamentoSQLite(str(tmp_path / 'transacoes.db'))
+    memoria = ArmazenamentoMemoria()
+    documentos = _documentos(300)
+    for backend in (sqlite, memoria):
+        assert backend.salvar_em_lote('u1', documentos) == 300
+        backend.salvar('u2', documentos[0])
+    return sqlite, memoria
+
+
+def test_resumo_por_sum_group_by(backends):
+    sqlite, memoria = backends
+
+    resumo = sqlite.obter_resumo('u1')
+    esperado = memoria.obter_resumo('u1')
+    for campo in ('total_receitas_centavos', 'total_despesas_centavos', 'saldo_centavos',
+                  'quantidade_receitas', 'quantidade_despesas'):
+        assert resumo[campo] == esperado[campo]
+    assert resumo['quantidade_receitas'] + resumo['quantidade_despesas'] == 300
+    outro = sqlite.obter_resumo('u2')
+    assert outro['quantidade_receitas'] + outro['quantidade_despesas'] == 1
+
+
+@pytest.mark.parametrize('filtros', [{}, {'categoria_chave': 'alimentação'}, {'mes_inicio': '2025-03', 'mes_fim': '2025-06'}])
+def test_resumos_mensais_por_group_by(backends, filtros):
+    sqlite, memoria = backends
+
+    def campos(resumos):
+        return sorted(
+            (r['mes'], r['tipo'], r['categoria_chave'], r['soma_centavos'], r['quantidade'],
+             r['minimo_centavos'], r['maximo_centavos'])
+            for r in resumos
+        )
+
+    mensais = sqlite.obter_resumos_mensais('u1', **filtros)
+    assert mensais
+    assert campos(mensais) == campos(memoria.obter_resumos_mensais('u1', **filtros))
+
+
+def test_paginas_com_limit(backends):
+    sqlite, _ = backends
+    vistas, cursor, paginas = [], None, 0
+    while True:
+        pagina, cursor = sqlite.listar_pagina('u1', 40, cursor, tipo='despesa', data_inicio=datetime(2025, 1, 1))
+        assert len(pagina) <= 40
+        vistas.extend(pagina)
+        paginas += 1
+        if cursor is None:
+            break
+
+    esperadas = list(sqlite.consultar('u1', data_inicio=datetime(2025, 1, 1), tipo='despesa'))
+    assert len(vistas) == len(esperadas)
+    assert paginas == math.ceil(len(esperadas) / 40)
+    datas = [t['data_ts'] for t in vistas]
+    assert datas == sorted(datas, reverse=True)
+    assert sorted(datas) == [t['data_ts'] for t in esperadas]
+
+
+def test_cursor_invalido(backends):
+    sqlite, _ = backends
+    _, cursor = sqlite.listar_pagina('u1', 5)
+    data_ts, _ = sqlite._decodificar_cursor(cursor)
+
+    with pytest.raises(ValueError, match='Cursor de paginação inválido'):
+        sqlite.listar_pagina('u1', 5, sqlite._codificar_cursor(data_ts, 'abc'))
+
+
+def test_versao_incrementa_por_gravacao(backends):
+    sqlite, _ = backends
+    versao = sqlite.obter_versao('u1')
+
+    sqlite.salvar('u1', _documentos(1, semente=7)[0])
+    assert sqlite.obter_versao('u1') == versao + 1
+    # Lote vazio não é uma gravação
+    assert sqlite.salvar_em_lote('u1', []) == 0
+    assert sqlite.obter_versao('u1') == versao + 1
+    assert sqlite.obter_versao('ninguem') == 0
+
+
+def test_uma_conexao_por_thread(backends):
+    sqlite, _ = backends
+    conexoes, quantidades = [], []
+
+    def ler():
+        conexoes.append(sqlite._conexao())
+        # Reaproveitada dentro da mesma thread
+        assert sqlite._conexao() is conexoes[-1]
+        resumo = sqlite.obter_resumo('u1')
+        quantidades.append(resumo['quantidade_receitas'] + resumo['quantidade_despesas'])
+
+    threads = [threading.Thread(target=ler) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert quantidades == [300] * 4
+    assert len({id(conexao) for conexao in conexoes + [sqlite._conexao()]}) == 5
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from app.models.armazenamento import ArmazenamentoMemoria
+from app.models.banco_de_dados import BancoDeDados
+from benchmarks.gerador import gerar_transacoes
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    monkeypatch.setenv('BACKEND_ARMAZENAMENTO', 'memoria')
+    monkeypatch.setenv('OUVINTE_TEMPO_REAL', 'false')
+    banco = BancoDeDados()
+    banco.usar_armazenamento(ArmazenamentoMemoria())
+    for transacao in gerar_transacoes(20):
+        banco.salvar_transacao('u1', transacao)
+    yield banco
+    banco.invalidar_cache()
+
+
+def test_gravacao_de_outro_processo_descarta_o_historico_em_cache(banco):
+    banco.obter_versao('u1')
+    assert len(banco.obter_todas_transacoes('u1')) == 20
+    assert banco.historico_em_cache('u1')
+
+    # Gravação feita por outro worker: só o backend a vê
+    transacao = next(gerar_transacoes(1, semente=7))
+    banco.armazenamento.salvar('u1', banco._preparar_documento('u1', transacao))
+
+    assert banco.obter_versao('u1') == banco.armazenamento.obter_versao('u1')
+    assert not banco.historico_em_cache('u1')
+    assert len(banco.obter_todas_transacoes('u1')) == 21
+
+
+def test_gravacao_local_mantem_o_historico_em_cache(banco):
+    banco.obter_versao('u1')
+    banco.obter_todas_transacoes('u1')
+
+    banco.salvar_transacao('u1', next(gerar_transacoes(1, semente=9)))
+
+    assert asyncio.run(banco.obter_versao_async('u1')) == banco.armazenamento.obter_versao('u1')
+    assert banco.historico_em_cache('u1')
+    assert len(banco.obter_todas_transacoes('u1')) == 21
+
+
+def test_historico_expirado_nao_conta_como_em_cache(banco, monkeypatch):
+    banco.obter_todas_transacoes('u1')
+    assert banco.historico_em_cache('u1')
+
+    agora = time.monotonic() + banco._cache._ttl + 1
+    monkeypatch.setattr(time, 'monotonic', lambda: agora)
+    assert not banco.historico_em_cache('u1')
+
+
+def test_versoes_registradas_sao_limitadas(banco):
+    limite = banco.CACHE_MAX_USUARIOS * 4
+    for indice in range(limite + 50):
+        banco.obter_versao(f'outro{indice}')
+    assert len(banco._versao_historico) == limite
@@ -0,0 +1,26 @@
+import time
+
+from app.utils.cache import CacheLRU
+
+
+def test_item_expirado_nao_esta_em_cache(monkeypatch):
+    agora = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: agora[0])
+    cache = CacheLRU(ttl_segundos=10)
+    cache.definir('u1', [1, 2, 3])
+    assert 'u1' in cache
+
+    agora[0] = 111.0
+    assert 'u1' not in cache
+    assert len(cache) == 0
+    assert cache.estatisticas()['peso_total'] == 0
+
+
+def test_contem_nao_altera_estatisticas():
+    cache = CacheLRU(ttl_segundos=None)
+    cache.definir('u1', 'valor')
+    assert 'u1' in cache
+    assert 'u2' not in cache
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['falhas']) == (0, 0)
+
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from app.models.cache_identidade import CacheIdentidade
+from app.models.user import User
+
+
+@pytest.fixture
+def cache():
+    cache = CacheIdentidade()
+    yield cache
+    cache._inicializar()
+
+
+def test_identidade_da_sessao_dispensa_o_cache(cache):
+    sessao = {}
+    cache.armazenar(User('u1', 'u1@exemplo.com', 'Usuário'), sessao)
+    cache._cache.invalidar('u1')
+
+    user = cache.obter('u1', sessao)
+
+    assert (user.id, user.email, user.nome) == ('u1', 'u1@exemplo.com', 'Usuário')
+    assert cache.acertos_sessao == 1
+    # Identidade de outro usuário na sessão não é usada
+    assert cache.obter('u2', sessao) is None
+
+
+def test_identidade_da_sessao_expira(cache, monkeypatch):
+    sessao = {}
+    cache.armazenar(User('u1', 'u1@exemplo.com', 'Usuário'), sessao)
+    cache._cache.invalidar('u1')
+
+    agora = time.time() + cache.TTL_SEGUNDOS + 1
+    monkeypatch.setattr(time, 'time', lambda: agora)
+
+    # Expirada, a sessão não basta: sem entrada no LRU, cabe ao auth.get_user
+    assert cache.obter('u1', sessao) is None
+    assert cache.acertos_sessao == 0
+
+    cache.armazenar(User('u1', 'u1@exemplo.com', 'Renomeado'), sessao)
+    assert cache.obter('u1', sessao).nome == 'Renomeado'
+    assert cache.acertos_sessao == 1
+
+
+def test_sessao_sem_horario_de_confirmacao_nao_e_aceita(cache):
+    sessao = {CacheIdentidade.CHAVE_SESSAO: {'uid': 'u1', 'email': 'u1@exemplo.com', 'nome': 'Usuário'}}
+
+    assert cache.obter('u1', sessao) is None
+
+
+def test_ttl_do_cache_em_memoria(cache, monkeypatch):
+    cache.armazenar(User('u1', 'u1@exemplo.com', 'Usuário'))
+    assert cache.obter('u1').id == 'u1'
+
+    agora = time.monotonic() + cache.TTL_SEGUNDOS + 1
+    monkeypatch.setattr(time, 'monotonic', lambda: agora)
+
+    assert cache.obter('u1') is None
+
+
+def test_logout_invalida_cache_e_sessao(cache):
+    sessao = {}
+    cache.armazenar(User('u1', 'u1@exemplo.com', 'Usuário'), sessao)
+
+    cache.invalidar('u1', sessao)
+
+    assert CacheIdentidade.CHAVE_SESSAO not in sessao
+    assert cache.obter('u1', sessao) is None
+    assert cache.obter('u1') is None
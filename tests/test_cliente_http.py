@@ -0,0 +1,124 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Thread
+import time
+
+import pytest
+import requests
+
+from app.utils.cliente_http import ClienteHTTP, RetryLimitado
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    """Respostas por caminho: /ok, /lento, /erro (503), /limite (429) e /travado."""
+
+    def do_GET(self) -> None:
+        self._responder()
+
+    def do_POST(self) -> None:
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(tamanho)
+        self._responder()
+
+    def _responder(self) -> None:
+        servidor = self.server
+        servidor.acessos[(self.command, self.path)] += 1
+        if self.path == '/lento':
+            time.sleep(0.2)
+            self._enviar(200)
+        elif self.path == '/erro':
+            self._enviar(503)
+        elif self.path == '/limite':
+            self._enviar(429, {'Retry-After': '120'})
+        elif self.path == '/travado':
+            servidor.liberar.wait(5)
+        else:
+            self._enviar(200)
+
+    def _enviar(self, status: int, cabecalhos: dict = None) -> None:
+        corpo = b'{}'
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def servidor():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Manipulador)
+    servidor.daemon_threads = True
+    servidor.acessos = Counter()
+    servidor.liberar = Event()
+    Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor
+    servidor.liberar.set()
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _url(servidor, caminho: str) -> str:
+    return f'http://127.0.0.1:{servidor.server_address[1]}{caminho}'
+
+
+def test_timeout_de_leitura_nao_repete_e_conta_erro(servidor):
+    cliente = ClienteHTTP(timeout_leitura=0.3, backoff=0)
+    inicio = time.perf_counter()
+    with pytest.raises(requests.RequestException):
+        cliente.get(_url(servidor, '/travado'))
+
+    assert time.perf_counter() - inicio < 2
+    assert servidor.acessos[('GET', '/travado')] == 1
+    assert cliente.estatisticas()['erros'] == 1
+    assert cliente.estatisticas()['requisicoes'] == 1
+
+
+@pytest.mark.parametrize('metodo', ['GET', 'POST'])
+def test_5xx_repete_ate_o_limite_de_tentativas(servidor, metodo):
+    cliente = ClienteHTTP(tentativas=2, backoff=0)
+    resposta = cliente.post(_url(servidor, '/erro'), json={}) if metodo == 'POST' else cliente.get(_url(servidor, '/erro'))
+
+    assert resposta.status_code == 503
+    assert servidor.acessos[(metodo, '/erro')] == 3
+    assert cliente.estatisticas()['erros'] == 0
+
+
+def test_post_com_429_nao_e_repetido(servidor):
+    cliente = ClienteHTTP(tentativas=2, backoff=0)
+    resposta = cliente.post(_url(servidor, '/limite'), json={})
+
+    assert resposta.status_code == 429
+    assert servidor.acessos[('POST', '/limite')] == 1
+
+
+def test_get_com_429_respeita_retry_after_limitado(servidor, monkeypatch):
+    monkeypatch.setattr(RetryLimitado, 'ESPERA_MAXIMA_S', 0.05)
+    cliente = ClienteHTTP(tentativas=2, backoff=0)
+    inicio = time.perf_counter()
+    resposta = cliente.get(_url(servidor, '/limite'))
+
+    assert resposta.status_code == 429
+    assert servidor.acessos[('GET', '/limite')] == 3
+    assert time.perf_counter() - inicio < 2
+
+
+def test_pool_saturado_e_latencia(servidor):
+    cliente = ClienteHTTP(max_conexoes=1, backoff=0)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        respostas = list(executor.map(lambda _: cliente.get(_url(servidor, '/lento')), range(3)))
+
+    assert [r.status_code for r in respostas] == [200, 200, 200]
+    estatisticas = cliente.estatisticas()
+    assert estatisticas['requisicoes'] == 3
+    assert estatisticas['saturacoes'] >= 1
+    assert estatisticas['pico_em_uso'] >= 2
+    assert estatisticas['em_uso'] == 0
+    assert estatisticas['latencia_p50_s'] >= 0.2
+    assert estatisticas['latencia_p99_s'] >= estatisticas['latencia_p50_s']
+    cliente.fechar()
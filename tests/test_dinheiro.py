@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.dinheiro import Dinheiro
+
+
+@pytest.mark.parametrize('valor, centavos', [
+    (0.001, 0),
+    ('0.004', 0),
+    (0.005, 1),
+    ('-0.005', -1),
+    (1.005, 101),
+    (0.1 + 0.2, 30),
+    ('10', 1000),
+    (Decimal('2.675'), 268),
+    (7, 700),
+])
+def test_de_reais_arredonda_meio_para_cima(valor, centavos):
+    assert Dinheiro.de_reais(valor).centavos == centavos
+
+
+@pytest.mark.parametrize('valor', ['nan', float('nan'), 'sNaN', 'inf', float('-inf'), '', 'abc', '1e30'])
+def test_de_reais_rejeita_valores_invalidos(valor):
+    with pytest.raises(ValueError, match='Valor monetário inválido'):
+        Dinheiro.de_reais(valor)
+
+
+def test_de_documento_prefere_centavos():
+    assert Dinheiro.de_documento({'valor_centavos': 1999, 'valor': 1.0}).centavos == 1999
+    # Documentos antigos, só com o float
+    assert Dinheiro.de_documento({'valor': 19.99}).centavos == 1999
+    assert Dinheiro.de_documento({}).centavos == 0
+
+
+def test_somas_exatas():
+    total = Dinheiro()
+    for _ in range(10):
+        total += Dinheiro.de_reais(0.1)
+
+    assert total == Dinheiro(100)
+    assert float(total) == 1.0
+    assert str(Dinheiro(-5)) == '-0.05'
+    assert f"{Dinheiro(123456):,.2f}" == '1,234.56'
@@ -0,0 +1,123 @@
+from datetime import datetime
+import json
+
+import pytest
+
+from app.models.armazenamento import ArmazenamentoMemoria, ArmazenamentoSQLite
+from app.models.dinheiro import Dinheiro
+from app.models.ouvinte_transacoes import OuvinteTransacoes
+from app.models.transacao_factory import TransacaoFactory
+from app.utils.eventos import CanalEventos
+
+
+def _transacao(valor_centavos: int, dia: int = 1):
+    return TransacaoFactory.criar_transacao(
+        tipo='despesa',
+        valor=Dinheiro(valor_centavos),
+        data=datetime(2024, 1, dia),
+        descricao='Teste',
+        categoria='Alimentação',
+        metodo_pagamento='Pix',
+        estabelecimento='Mercado'
+    )
+
+
+def _eventos(fila):
+    eventos = []
+    while not fila.empty():
+        cabecalho, dados, _ = fila.get_nowait().split('\n', 2)
+        eventos.append((cabecalho.removeprefix('event: '), json.loads(dados.removeprefix('data: '))))
+    return eventos
+
+
+@pytest.fixture
+def canal():
+    canal = CanalEventos()
+    canal._inicializar()
+    yield canal
+    canal._inicializar()
+
+
+@pytest.fixture
+def backend():
+    backend = ArmazenamentoMemoria()
+    backend.salvar('u1', _transacao(1000).para_dicionario())
+    return backend
+
+
+def test_gravacao_de_outro_processo_chega_pelo_backend(canal, backend):
+    fila = canal.assinar('u1', backend)
+    # O estado inicial do observar não é publicado
+    assert _eventos(fila) == []
+
+    backend.salvar('u1', _transacao(2550, dia=2).para_dicionario())
+
+    [(evento, dados)] = _eventos(fila)
+    assert evento == 'transacao'
+    assert dados['transacao']['valor'] == 25.5
+    assert dados['categoria'] == {'categoria': 'Alimentação', 'tipo': 'despesa', 'incremento': 25.5}
+
+
+def test_lote_e_publicacao_local_sem_duplicar(canal, backend):
+    fila = canal.assinar('u1', backend)
+    backend.salvar_em_lote('u1', [_transacao(100, dia=3).para_dicionario(), _transacao(200, dia=4).para_dicionario()])
+
+    # O backend já notifica: a publicação do processo que gravou é ignorada
+    assert canal.publicar_local('u1', 'lote', {'quantidade': 2}) == 0
+    assert _eventos(fila) == [('lote', {'quantidade': 2})]
+
+
+def test_backend_sem_notificacoes_usa_a_publicacao_local(canal, tmp_path):
+    fila = canal.assinar('u1', ArmazenamentoSQLite(str(tmp_path / 'dados.db')))
+
+    assert canal.publicar_local('u1', 'transacao', CanalEventos.delta_transacao(_transacao(300))) == 1
+    assert [evento for evento, _ in _eventos(fila)] == ['transacao']
+
+
+def test_ultima_conexao_cancela_a_assinatura(canal, backend):
+    primeira = canal.assinar('u1', backend)
+    segunda = canal.assinar('u1', backend)
+    assert len(backend._observadores['u1']) == 1
+
+    canal.cancelar('u1', primeira)
+    assert len(backend._observadores['u1']) == 1
+    canal.cancelar('u1', segunda)
+    canal.cancelar('u1', segunda)
+    assert backend._observadores['u1'] == []
+    assert canal.estatisticas()['conexoes'] == 0
+
+
+def test_limite_de_conexoes_por_processo(canal, backend):
+    filas = [canal.assinar(f'u{i}', backend, max_conexoes=2) for i in range(3)]
+
+    assert filas[0] is not None and filas[1] is not None
+    assert filas[2] is None
+    assert canal.estatisticas()['recusadas'] == 1
+
+
+def test_fila_cheia_recebe_recarregar(canal, backend, monkeypatch):
+    monkeypatch.setattr(CanalEventos, 'MAX_FILA', 2)
+    fila = canal.assinar('u1', backend)
+    for dia in range(2, 6):
+        backend.salvar('u1', _transacao(100, dia=dia).para_dicionario())
+
+    assert [evento for evento, _ in _eventos(fila)][0] == 'recarregar'
+    assert canal.estatisticas()['descartes'] >= 1
+
+
+def test_com_ouvinte_o_backend_tem_uma_unica_assinatura(canal, backend):
+    ouvinte = OuvinteTransacoes(backend)
+    assert ouvinte.origem('u1') is ouvinte.replica
+    fila = canal.assinar('u1', ouvinte)
+    assert len(backend._observadores['u1']) == 1
+    assert _eventos(fila) == []
+
+    backend.salvar('u1', _transacao(300, dia=5).para_dicionario())
+    [(evento, dados)] = _eventos(fila)
+    assert evento == 'transacao'
+    assert dados['transacao']['valor'] == 3.0
+    assert ouvinte.origem('u1') is ouvinte.replica
+
+    canal.cancelar('u1', fila)
+    assert ouvinte._usuarios['u1'].observadores == []
+    assert len(backend._observadores['u1']) == 1
@@ -0,0 +1,112 @@
+import codecs
+import csv
+import io
+
+import pytest
+from flask_login import login_user
+
+from app import criar_app
+from app.adapters.importacao_adapter import ImportacaoAdapter
+from app.builders.cache_dashboard import CacheDashboard
+from app.controllers.transacao_controller import TransacaoController
+from app.models.armazenamento import ArmazenamentoMemoria
+from app.models.banco_de_dados import BancoDeDados
+from app.models.user import User
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<BANKACCTFROM><ACCTID>12345-6</BANKACCTFROM>
+<BANKTRANLIST>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250305120000<TRNAMT>1500,00<MEMO>Salário</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250306
+<TRNAMT>-42.50
+<NAME>Padaria
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setenv('BACKEND_ARMAZENAMENTO', 'memoria')
+    monkeypatch.setenv('OUVINTE_TEMPO_REAL', 'false')
+    app = criar_app()
+    banco = BancoDeDados()
+    banco.usar_armazenamento(ArmazenamentoMemoria())
+
+    with app.test_request_context():
+        login_user(User('u1', 'u1@exemplo.com', 'Usuário'))
+        yield TransacaoController()
+    banco.invalidar_cache()
+    CacheDashboard().limpar()
+
+
+def test_ler_csv():
+    arquivo = io.StringIO(
+        'tipo,valor,data,descricao,categoria,conta_destino\n'
+        'receita, 100.50 ,2025-03-01T00:00:00,Salário,,Conta Corrente\n'
+    )
+    [(numero, dados)] = list(ImportacaoAdapter.ler_csv(arquivo))
+
+    assert numero == 1
+    assert dados['valor'] == '100.50'
+    assert dados['data'] == '2025-03-01'
+    assert dados['categoria'] == ImportacaoAdapter.CATEGORIA_PADRAO
+
+
+def test_ler_ofx():
+    receita, despesa = [dados for _, dados in ImportacaoAdapter.ler_ofx(io.StringIO(OFX))]
+
+    assert receita == {
+        'tipo': 'receita', 'valor': '1500.00', 'data': '2025-03-05', 'descricao': 'Salário',
+        'categoria': 'Outros', 'conta_destino': '12345-6'
+    }
+    assert despesa['tipo'] == 'despesa'
+    assert despesa['valor'] == '42.50'
+    assert despesa['estabelecimento'] == despesa['descricao'] == 'Padaria'
+
+
+def test_registro_csv_ilegivel_nao_interrompe_a_leitura():
+    arquivo = io.StringIO(
+        'tipo,valor\n'
+        'receita,1\n'
+        'despesa,' + 'x' * (csv.field_size_limit() + 1) + '\n'
+        'receita,3\n'
+    )
+    registros = list(ImportacaoAdapter.ler_csv(arquivo))
+
+    assert [numero for numero, _ in registros] == [1, 2, 3]
+    assert isinstance(registros[1][1], ValueError)
+    assert registros[2][1]['valor'] == '3'
+
+
+def test_importar_csv_relata_erros_por_linha(controller):
+    conteudo = (
+        'tipo,valor,data,descricao,categoria,metodo_pagamento,estabelecimento,conta_destino\n'
+        'despesa,10.00,2025-03-01,Café,Alimentação,PIX,Padaria,\n'
+        'despesa,abc,2025-03-02,Inválida,Alimentação,PIX,Padaria,\n'
+        'despesa,' + 'x' * (csv.field_size_limit() + 1) + ',2025-03-03,Enorme,Outros,PIX,Loja,\n'
+        'receita,100.00,2025-03-04,Salário,Salário,,,Conta Corrente\n'
+    ).encode('utf-8-sig')
+    # Mesmo leitor da rota de upload, sobre um fluxo binário
+    texto = codecs.getreader('utf-8-sig')(io.BytesIO(conteudo), errors='replace')
+
+    relatorio = controller.importar_transacoes(texto, 'csv')
+
+    assert relatorio['importadas'] == 2
+    assert [erro['linha'] for erro in relatorio['erros']] == [2, 3]
+    assert relatorio['saldo'] == 90.0
+    assert len(BancoDeDados().obter_todas_transacoes('u1')) == 2
+
+
+def test_importar_ofx(controller):
+    relatorio = controller.importar_transacoes(io.StringIO(OFX), 'ofx')
+
+    assert relatorio == {'importadas': 2, 'erros': [], 'saldo': 1457.5}
+
+
+def test_formato_invalido(controller):
+    with pytest.raises(ValueError, match='Formato inválido'):
+        controller.importar_transacoes(io.StringIO(''), 'xls')
@@ -0,0 +1,34 @@
+import pytest
+
+from app import criar_app
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    def _criar(token: str):
+        monkeypatch.setenv('BACKEND_ARMAZENAMENTO', 'memoria')
+        monkeypatch.setenv('METRICAS_TOKEN', token)
+        app = criar_app()
+        app.testing = True
+        return app.test_client()
+    return _criar
+
+
+def test_metrics_desativado_sem_token(cliente):
+    assert cliente('').get('/metrics').status_code == 404
+
+
+def test_metrics_exige_o_token(cliente):
+    c = cliente('segredo')
+    assert c.get('/metrics').status_code == 401
+    assert c.get('/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    assert c.get('/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 200
+
+
+def test_contadores_exportados_como_counter(cliente):
+    corpo = cliente('segredo').get('/metrics', headers={'Authorization': 'Bearer segredo'}).get_data(as_text=True)
+
+    assert '# TYPE controle_financeiro_cache_dashboard_acertos_total counter' in corpo
+    assert '# TYPE controle_financeiro_cliente_http_requisicoes_total counter' in corpo
+    assert '# TYPE controle_financeiro_cache_dashboard_itens gauge' in corpo
+    assert 'controle_financeiro_cache_dashboard_acertos ' not in corpo
@@ -0,0 +1,216 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from app.models.transacao_factory import TransacaoFactory
+from app.models.armazenamento import ArmazenamentoMemoria, ArmazenamentoSQLite
+from app.models.armazenamento.base import Mudanca
+from app.models.dinheiro import Dinheiro
+from app.models.ouvinte_transacoes import OuvinteTransacoes
+
+
+def _transacao(valor_centavos: int, tipo: str = 'despesa', dia: int = 1) -> Dict[str, Any]:
+    extras = {'conta_destino': 'Conta'} if tipo == 'receita' else {'metodo_pagamento': 'Pix', 'estabelecimento': 'Mercado'}
+    return TransacaoFactory.criar_transacao(
+        tipo=tipo,
+        valor=Dinheiro(valor_centavos),
+        data=datetime(2024, 1, dia),
+        descricao='Teste',
+        categoria='Alimentação',
+        **extras
+    ).para_dicionario()
+
+
+class _Relogio:
+
+    def __init__(self) -> None:
+        self.agora = 0.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+class _EntregaAtrasada(ArmazenamentoMemoria):
+    """Entrega o resumo na hora e segura as transações até `entregar`, como duas assinaturas separadas."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pendentes: List[List[Mudanca]] = []
+        self.atrasar = False
+
+    def _notificar(self, user_id: str, mudancas: List[Mudanca]) -> None:
+        if not self.atrasar:
+            return super()._notificar(user_id, mudancas)
+        for ao_mudar_transacoes, ao_mudar_resumo in self._observadores.get(user_id, ()):
+            self.pendentes.append((ao_mudar_transacoes, mudancas))
+            ao_mudar_resumo(self._resumo_publicado(user_id))
+
+    def entregar(self) -> None:
+        pendentes, self.pendentes = self.pendentes, []
+        for ao_mudar_transacoes, mudancas in pendentes:
+            ao_mudar_transacoes(mudancas)
+
+
+@pytest.fixture
+def backend() -> ArmazenamentoMemoria:
+    backend = ArmazenamentoMemoria()
+    backend.salvar('u1', _transacao(10000, 'receita'))
+    backend.salvar('u1', _transacao(2500, dia=2))
+    return backend
+
+
+def _resumo_sem_versao(resumo: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: v for k, v in (resumo or {}).items() if k != 'versao'}
+
+
+def test_primeira_leitura_anexa_e_replica_responde(backend):
+    ouvinte = OuvinteTransacoes(backend)
+
+    assert ouvinte.origem('u1') is ouvinte.replica
+    assert ouvinte.replica.obter_resumo('u1') == backend.obter_resumo('u1')
+    assert ouvinte.versao('u1') == backend.obter_versao('u1')
+    assert ouvinte.estatisticas()['usuarios'] == 1
+    assert ouvinte.estatisticas()['em_dia'] == 1
+
+
+def test_mudancas_sao_aplicadas_na_replica(backend):
+    atualizados = []
+    ouvinte = OuvinteTransacoes(backend, ao_atualizar=atualizados.append)
+    ouvinte.origem('u1')
+
+    backend.salvar('u1', _transacao(1000, dia=3))
+    backend.salvar_em_lote('u1', [_transacao(200, dia=4), _transacao(300, dia=5)])
+
+    assert ouvinte.origem('u1') is ouvinte.replica
+    resumo = ouvinte.replica.obter_resumo('u1')
+    assert resumo['quantidade_despesas'] == 4
+    assert resumo == backend.obter_resumo('u1')
+    assert ouvinte.versao('u1') == backend.obter_versao('u1')
+    assert atualizados.count('u1') == 3
+    assert ouvinte.estatisticas()['mudancas_aplicadas'] == 2 + 1 + 2
+
+
+def test_gravacao_local_espera_o_aviso_da_nova_versao(backend):
+    ouvinte = OuvinteTransacoes(backend)
+    ouvinte.origem('u1')
+
+    ouvinte.aguardar_gravacao('u1')
+    assert ouvinte.origem('u1') is None
+    assert ouvinte.versao('u1') is None
+
+    backend.salvar('u1', _transacao(700, dia=6))
+    assert ouvinte.origem('u1') is ouvinte.replica
+    assert ouvinte.versao('u1') == backend.obter_versao('u1')
+
+
+def test_quantidades_divergentes_voltam_ao_backend():
+    backend = _EntregaAtrasada()
+    backend.salvar('u1', _transacao(10000, 'receita'))
+    ouvinte = OuvinteTransacoes(backend)
+    assert ouvinte.origem('u1') is ouvinte.replica
+
+    backend.atrasar = True
+    backend.salvar('u1', _transacao(500, dia=2))
+    assert _resumo_sem_versao(backend._resumo_publicado('u1'))['quantidade_despesas'] == 1
+    assert ouvinte.replica.obter_resumo('u1')['quantidade_despesas'] == 0
+    assert ouvinte.origem('u1') is None
+
+    backend.entregar()
+    assert ouvinte.origem('u1') is ouvinte.replica
+    assert ouvinte.replica.obter_resumo('u1') == backend.obter_resumo('u1')
+
+
+def test_usuario_ocioso_e_desanexado(backend):
+    relogio = _Relogio()
+    ouvinte = OuvinteTransacoes(backend, tempo_ocioso=10, relogio=relogio)
+    ouvinte.origem('u1')
+    backend.salvar('u2', _transacao(100))
+    relogio.agora = 5
+    ouvinte.origem('u2')
+
+    relogio.agora = 12
+    assert ouvinte.desanexar_ociosos() == 1
+    estatisticas = ouvinte.estatisticas()
+    assert estatisticas['usuarios'] == 1
+    assert estatisticas['desanexados'] == 1
+    assert ouvinte.replica.obter_resumo('u1')['quantidade_receitas'] == 0
+    assert backend._observadores['u1'] == []
+
+    # Gravações do usuário desanexado não chegam mais à réplica
+    backend.salvar('u1', _transacao(100, dia=7))
+    assert ouvinte.replica.obter_resumo('u1')['quantidade_despesas'] == 0
+
+    # Um novo acesso volta a anexar com o estado atual
+    assert ouvinte.origem('u1') is ouvinte.replica
+    assert ouvinte.replica.obter_resumo('u1') == backend.obter_resumo('u1')
+
+
+def test_acima_da_capacidade_desanexa_o_menos_recente(backend):
+    relogio = _Relogio()
+    ouvinte = OuvinteTransacoes(backend, relogio=relogio)
+    ouvinte.MAX_USUARIOS = 2
+    backend.salvar('u2', _transacao(100))
+    backend.salvar('u3', _transacao(100))
+    for indice, user_id in enumerate(('u1', 'u2', 'u3')):
+        relogio.agora = indice
+        ouvinte.origem(user_id)
+
+    assert set(ouvinte._usuarios) == {'u2', 'u3'}
+    assert ouvinte.estatisticas()['desanexados'] == 1
+    assert backend._observadores['u1'] == []
+
+
+def test_backend_sem_notificacoes_le_sempre_do_backend(tmp_path):
+    ouvinte = OuvinteTransacoes(ArmazenamentoSQLite(str(tmp_path / 'dados.db')))
+
+    assert ouvinte.origem('u1') is None
+    assert ouvinte.origem('u1') is None
+    assert ouvinte.estatisticas()['usuarios'] == 0
+
+
+def test_observadores_compartilham_a_assinatura_e_fixam_o_usuario(backend):
+    relogio = _Relogio()
+    ouvinte = OuvinteTransacoes(backend, tempo_ocioso=10, relogio=relogio)
+    ouvinte.origem('u1')
+    avisos: List[List[Mudanca]] = []
+    cancelar = ouvinte.observar('u1', avisos.append, lambda _resumo: None)
+
+    # Primeiro aviso: o estado atual, vindo da réplica
+    assert len(avisos[0]) == 2
+    backend.salvar('u1', _transacao(300, dia=3))
+    assert [tipo for tipo, _, _ in avisos[1]] == ['adicionado']
+    assert len(backend._observadores['u1']) == 1
+
+    relogio.agora = 60
+    assert ouvinte.desanexar_ociosos() == 0
+    cancelar()
+    relogio.agora = 80
+    assert ouvinte.desanexar_ociosos() == 1
+    assert backend._observadores['u1'] == []
+
+
+def test_observar_sem_notificacoes_devolve_none(tmp_path):
+    ouvinte = OuvinteTransacoes(ArmazenamentoSQLite(str(tmp_path / 'dados.db')))
+    assert ouvinte.observar('u1', lambda _m: None, lambda _r: None) is None
+    assert ouvinte.estatisticas()['usuarios'] == 0
+
+
+def test_usuario_sem_resumo_remoto_nao_e_anexado(backend):
+    relogio = _Relogio()
+    ouvinte = OuvinteTransacoes(backend, relogio=relogio)
+    leituras = []
+    obter_versao = backend.obter_versao
+    backend.obter_versao = lambda user_id: leituras.append(user_id) or obter_versao(user_id)
+
+    assert ouvinte.origem('u2') is None
+    assert ouvinte.origem('u2') is None
+    assert 'u2' not in backend._observadores
+    # Verificado uma vez por intervalo, não a cada acesso
+    assert leituras == ['u2']
+
+    # A gravação cria o resumo: o próximo acesso anexa
+    ouvinte.aguardar_gravacao('u2')
+    backend.salvar('u2', _transacao(100))
+    assert ouvinte.origem('u2') is ouvinte.replica
+    assert len(backend._observadores['u2']) == 1
@@ -0,0 +1,79 @@
+import pytest
+from werkzeug.datastructures import ImmutableMultiDict
+
+from app.adapters.request_adapter import RequestAdapter
+from benchmarks.gerador import gerar_formularios
+
+DESPESA = {
+    'tipo': 'despesa', 'valor': '45.90', 'data': '2025-03-01', 'descricao': 'Almoço',
+    'categoria': 'Alimentação', 'metodo_pagamento': 'PIX', 'estabelecimento': 'Restaurante'
+}
+RECEITA = {
+    'tipo': 'Receita', 'valor': '5200', 'data': '2025-03-05', 'descricao': 'Salário',
+    'categoria': 'Salário', 'conta_destino': 'Conta Corrente'
+}
+
+VARIACOES = [
+    {},
+    {'valor': '45,9'},
+    {'valor': ' 1.005 '},
+    {'valor': '1e2'},
+    {'valor': '0,00'},
+    {'valor': '-10'},
+    {'valor': 'abc'},
+    {'valor': 'NaN'},
+    {'valor': 'Infinity'},
+    {'valor': '1234567890123456'},
+    {'valor': '0.001'},
+    {'data': '2025-3-1'},
+    {'data': '2025-02-30'},
+    {'data': '01/03/2025'},
+    {'data': ''},
+    {'descricao': '   '},
+    {'categoria': ''},
+    {'tipo': 'transferencia'},
+    {'tipo': ''},
+    {'metodo_pagamento': ''},
+    {'estabelecimento': ' '},
+]
+
+
+def _adaptar_formulario(dados):
+    try:
+        return RequestAdapter.adaptar_formulario_transacao(ImmutableMultiDict(dados))
+    except ValueError as e:
+        return str(e)
+
+
+def _adaptar_lote(itens):
+    validos, erros = RequestAdapter.adaptar_lote_transacoes(itens)
+    resultado = dict(validos)
+    resultado.update(erros)
+    return [resultado[indice] for indice in range(len(itens))]
+
+
+@pytest.mark.parametrize('base', [DESPESA, RECEITA], ids=['despesa', 'receita'])
+def test_lote_equivale_ao_formulario(base):
+    itens = [{**base, **variacao} for variacao in VARIACOES]
+
+    assert _adaptar_lote(itens) == [_adaptar_formulario(item) for item in itens]
+
+
+def test_lote_equivale_ao_formulario_em_dados_gerados():
+    itens = list(gerar_formularios(500))
+
+    assert _adaptar_lote(itens) == [_adaptar_formulario(item) for item in itens]
+
+
+def test_itens_que_nao_sao_objetos():
+    validos, erros = RequestAdapter.adaptar_lote_transacoes([DESPESA, 'texto', None])
+
+    assert [indice for indice, _ in validos] == [0]
+    assert set(erros) == {1, 2}
+    assert erros[1].endswith('Cada transação deve ser um objeto JSON')
+
+
+def test_numeros_json_aceitos_como_texto():
+    [(_, numerico)], _ = RequestAdapter.adaptar_lote_transacoes([{**DESPESA, 'valor': 45.9}])
+
+    assert numerico == _adaptar_formulario(DESPESA | {'valor': '45.9'})
@@ -0,0 +1,76 @@
+import pytest
+from flask_login import login_user
+
+from app import criar_app
+from app.builders.cache_dashboard import CacheDashboard
+from app.builders.dashboard_builder import DashboardBuilder
+from app.controllers.transacao_controller import TransacaoController
+from app.models.armazenamento import ArmazenamentoMemoria
+from app.models.banco_de_dados import BancoDeDados
+from app.models.user import User
+from benchmarks.gerador import gerar_transacoes
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setenv('BACKEND_ARMAZENAMENTO', 'memoria')
+    monkeypatch.setenv('OUVINTE_TEMPO_REAL', 'false')
+    app = criar_app()
+    banco = BancoDeDados()
+    banco.usar_armazenamento(ArmazenamentoMemoria())
+    for transacao in gerar_transacoes(120):
+        banco.salvar_transacao('u1', transacao)
+
+    with app.test_request_context():
+        login_user(User('u1', 'u1@exemplo.com', 'Usuário'))
+        yield TransacaoController()
+    banco.invalidar_cache()
+    CacheDashboard().limpar()
+
+
+def test_tipo_invalido(controller):
+    with pytest.raises(ValueError, match="Tipo inválido: 'foo'"):
+        controller.listar_transacoes_por_tipo('foo')
+
+
+@pytest.mark.parametrize('tipo', ['receita', 'despesa'])
+def test_paginas_por_cursor_cobrem_a_listagem(controller, tipo):
+    vistos, cursor = [], None
+    while True:
+        pagina = controller.listar_transacoes_por_tipo(tipo, limite=7, cursor=cursor)
+        vistos.extend(pagina['transacoes'])
+        cursor = pagina['proximo_cursor']
+        if cursor is None:
+            break
+
+    esperadas = [t for t in BancoDeDados().obter_todas_transacoes('u1') if t['tipo'] == tipo]
+    assert len(vistos) == len(esperadas) == pagina['quantidade']
+    assert {t.obter_tipo() for t in vistos} == {tipo}
+    # Sem repetições nem lacunas entre as páginas
+    assert sorted(t.data_texto for t in vistos) == sorted(t['data'] for t in esperadas)
+    datas = [t.data for t in vistos]
+    assert datas == sorted(datas, reverse=True)
+
+
+def test_totais_filtrados_calculados_uma_vez_por_versao(controller, monkeypatch):
+    chamadas = []
+    original = DashboardBuilder.com_saldo_total
+
+    def contar(self):
+        chamadas.append(1)
+        return original(self)
+
+    monkeypatch.setattr(DashboardBuilder, 'com_saldo_total', contar)
+    filtros = {'data_inicio': '2025-03-01', 'categoria': 'Alimentação'}
+
+    primeira = controller.listar_transacoes_por_tipo('despesa', limite=5, **filtros)
+    segunda = controller.listar_transacoes_por_tipo(
+        'despesa', limite=5, cursor=primeira['proximo_cursor'], **filtros
+    )
+    assert primeira['quantidade'] == segunda['quantidade'] > 0
+    assert len(chamadas) == 1
+
+    # Uma gravação nova muda a versão e os totais são recalculados
+    BancoDeDados().salvar_transacao('u1', next(gerar_transacoes(1, semente=3)))
+    controller.listar_transacoes_por_tipo('despesa', limite=5, **filtros)
+    assert len(chamadas) == 2